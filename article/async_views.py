@@ -0,0 +1,67 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from threading import Lock
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from .views import CommentApiViewSet, ContentApiViewSet, ContentTagFilterApiViewSet, ContentTopicFilterApiViewSet
+
+
+DEFAULTS = {
+    'THREADS': 16,
+}
+
+_executor = None
+_executor_lock = Lock()
+
+
+def async_views_setting(name):
+    return getattr(settings, 'ASYNC_VIEWS', {}).get(name, DEFAULTS[name])
+
+
+def get_executor():
+    """
+    Threads the async views run their ORM and serializer work on, shared by
+    every request of the process
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(async_views_setting('THREADS'), thread_name_prefix='async-view')
+    return _executor
+
+
+def run_view(view, request, *args, **kwargs):
+    # Pool threads keep their connection between requests, drop it like
+    # request_started/request_finished do for the request thread.
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render') and callable(response.render):
+            response = response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def async_view(view):
+    """
+    Async view running a sync DRF view and rendering its response on the
+    thread pool. Under ASGI the event loop only waits, so slow clients and
+    slow queries no longer hold the single thread sync views are run on.
+    Django 3.2 has no async ORM, the pool is the bridge.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        run = sync_to_async(run_view, thread_sensitive=False, executor=get_executor())
+        return await run(view, request, *args, **kwargs)
+    return wrapper
+
+
+content_list = async_view(ContentApiViewSet.as_view({'get': 'list'}))
+content_detail = async_view(ContentApiViewSet.as_view({'get': 'retrieve'}))
+content_tag = async_view(ContentTagFilterApiViewSet.as_view({'get': 'list'}))
+content_topic = async_view(ContentTopicFilterApiViewSet.as_view({'get': 'list'}))
+comment_list = async_view(CommentApiViewSet.as_view({'get': 'list'}))
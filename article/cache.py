@@ -0,0 +1,284 @@
+from collections import OrderedDict
+from hashlib import sha1
+from threading import Lock
+from time import monotonic
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.response import Response
+
+from .conditional import is_not_modified, not_modified_response, validator_headers
+
+
+class BaseResponseCache:
+    """
+    Response cache for anonymous reads. Every entry remembers the version of
+    each group (a row or a list) it was built from, a write bumps the versions
+    of the groups it touches and entries holding an old version are misses.
+
+    Every invalidation also bumps a write sequence. A response is only stored
+    if the sequence has not moved since the `snapshot()` taken before its
+    queries ran, otherwise a write landing in between would be cached under
+    the versions it just created.
+    """
+    WRITES = '*writes'
+
+    def __init__(self, timeout=300):
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+        self._stats_lock = Lock()
+
+    def _get(self, key):
+        raise NotImplementedError
+
+    def _set(self, key, value):
+        raise NotImplementedError
+
+    def _get_versions(self, groups):
+        raise NotImplementedError
+
+    def _set_versions(self, versions):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def get(self, key):
+        entry = self._get(key)
+        if entry is not None:
+            data, versions = entry
+            if self._get_versions(versions) == versions:
+                self._count('hits')
+                return data
+        self._count('misses')
+        return None
+
+    def snapshot(self):
+        """
+        Current write sequence, taken before building a response for `set`
+        """
+        sequence = self._get_versions({self.WRITES}).get(self.WRITES)
+        if sequence is None:
+            sequence = uuid4().hex
+            self._set_versions({self.WRITES: sequence})
+        return sequence
+
+    def set(self, key, data, groups, snapshot=None):
+        """
+        Store `data` under the current versions of `groups`. Returns False,
+        storing nothing, when a write happened since `snapshot`.
+        """
+        groups = set(groups)
+        versions = self._get_versions(groups | {self.WRITES})
+        # Versions are read with the sequence, a write after this check bumps
+        # them past the ones stored with the entry.
+        sequence = versions.pop(self.WRITES, None)
+        if snapshot is not None and sequence != snapshot:
+            return False
+        missing = {group: uuid4().hex for group in groups if group not in versions}
+        if missing:
+            self._set_versions(missing)
+            versions.update(missing)
+        self._set(key, (data, versions))
+        return True
+
+    def invalidate(self, groups):
+        groups = set(groups)
+        if groups:
+            self._set_versions({group: uuid4().hex for group in groups | {self.WRITES}})
+            self._count('invalidations', len(groups))
+
+    def stats(self):
+        return {
+            'backend': type(self).__name__,
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+            'evictions': self.evictions,
+        }
+
+
+class LocMemLRUCache(BaseResponseCache):
+    """
+    In process cache holding at most `max_entries` responses, least recently used go first
+    """
+    def __init__(self, max_entries=1000, **kwargs):
+        super().__init__(**kwargs)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = Lock()
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires is not None and expires < monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _set(self, key, value):
+        expires = monotonic() + self.timeout if self.timeout is not None else None
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        if evicted:
+            self._count('evictions', evicted)
+
+    def _get_versions(self, groups):
+        with self._lock:
+            return {group: self._versions[group] for group in groups if group in self._versions}
+
+    def _set_versions(self, versions):
+        with self._lock:
+            self._versions.update(versions)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+
+class DjangoCacheBackend(BaseResponseCache):
+    """
+    Stores entries in a Django cache alias (file based, memcached, redis ...)
+    so every worker shares them. Versions never expire, a version lost to
+    eviction only turns the entries that used it into misses.
+    """
+    def __init__(self, alias='default', prefix='response-cache', **kwargs):
+        super().__init__(**kwargs)
+        self.prefix = prefix
+        self.cache = caches[alias]
+
+    def _entry_key(self, key):
+        return f'{self.prefix}:entry:{key}'
+
+    def _version_key(self, group):
+        return f'{self.prefix}:version:{group}'
+
+    def _get(self, key):
+        return self.cache.get(self._entry_key(key))
+
+    def _set(self, key, value):
+        self.cache.set(self._entry_key(key), value, self.timeout)
+
+    def _get_versions(self, groups):
+        keys = {self._version_key(group): group for group in groups}
+        found = self.cache.get_many(keys)
+        return {keys[key]: version for key, version in found.items()}
+
+    def _set_versions(self, versions):
+        self.cache.set_many(
+            {self._version_key(group): version for group, version in versions.items()},
+            None
+        )
+
+    def clear(self):
+        self.cache.clear()
+
+
+_cache = None
+
+
+def get_response_cache():
+    """
+    Cache configured by settings.RESPONSE_CACHE, a local LRU by default
+    """
+    global _cache
+    if _cache is None:
+        config = getattr(settings, 'RESPONSE_CACHE', {})
+        backend = import_string(config.get('BACKEND', 'article.cache.LocMemLRUCache'))
+        _cache = backend(**config.get('OPTIONS', {}))
+    return _cache
+
+
+def response_cache_enabled():
+    return getattr(settings, 'RESPONSE_CACHE', {}).get('ENABLED', True)
+
+
+def content_groups(content):
+    """
+    Groups a serialized content depends on
+    """
+    groups = {f'content:{content.id}', f'topic:{content.topic_id}', f'user:{content.author_id}'}
+    groups.update(f'tag:{tag.id}' for tag in content.tags.all())
+    return groups
+
+
+class CachedResponseMixin:
+    """
+    Serve list and retrieve to anonymous users from the response cache.
+    A list also depends on `cache_list_group`, bumped when rows join the list.
+    """
+    cache_list_group = None
+
+    def get_serializer(self, *args, **kwargs):
+        if args:
+            self._cache_instance = args[0]
+            self._cache_many = kwargs.get('many', False)
+        return super().get_serializer(*args, **kwargs)
+
+    def get_cache_list_group(self):
+        return self.cache_list_group
+
+    def get_cache_groups(self, instance, many):
+        if not many:
+            return content_groups(instance)
+        groups = {self.get_cache_list_group()}
+        for content in instance:
+            groups.update(content_groups(content))
+        return groups
+
+    def get_cache_key(self, request):
+        path = request.get_full_path()
+        accept = request.accepted_renderer.format
+        return sha1(f'{accept}:{path}'.encode()).hexdigest()
+
+    def cached_response(self, request, handler, *args, **kwargs):
+        if request.user.is_authenticated or not response_cache_enabled():
+            return handler(request, *args, **kwargs)
+
+        cache = get_response_cache()
+        key = self.get_cache_key(request)
+        entry = cache.get(key)
+        if entry is not None:
+            data, validators = entry
+            headers = validator_headers(*validators) if validators else {}
+            if validators and is_not_modified(request, *validators):
+                return not_modified_response(headers)
+            response = Response(data, headers=headers)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        self._cache_instance = None
+        self._validators = None
+        snapshot = cache.snapshot()
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200 and self._cache_instance is not None:
+            groups = self.get_cache_groups(self._cache_instance, self._cache_many)
+            cache.set(key, (response.data, self._validators), groups, snapshot)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, super().retrieve, *args, **kwargs)
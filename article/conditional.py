@@ -0,0 +1,105 @@
+from hashlib import sha1
+
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+
+VALIDATOR_HEADERS = ('ETag', 'Last-Modified')
+
+
+def is_not_modified(request, etag, last_modified):
+    """
+    Evaluate If-None-Match, or If-Modified-Since when no ETag was sent
+    """
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        return '*' in etags or etag in etags
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    if if_modified_since is not None and last_modified is not None:
+        return int(last_modified.timestamp()) <= if_modified_since
+    return False
+
+
+def validator_headers(etag, last_modified):
+    headers = {'ETag': etag}
+    if last_modified is not None:
+        headers['Last-Modified'] = http_date(last_modified.timestamp())
+    return headers
+
+
+def not_modified_response(headers):
+    return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+
+class ConditionalGetMixin:
+    """
+    Strong ETag for list and retrieve, computed from `updated_at` before
+    anything is serialized, plus Last-Modified on retrieve. A matching
+    conditional request is answered with 304 and no body.
+
+    A list is validated by the rows of the page being served, read with one
+    narrow query. It sends no Last-Modified, the newest edit of a page can
+    not tell that a row was deleted or left it, the ETag can.
+
+    State that belongs to the requesting user, not to the rows, comes from
+    `get_user_state` and only moves that user's ETag. Last-Modified keeps
+    reporting edits of the rows themselves.
+    """
+    def make_etag(self, request, *parts):
+        raw = ':'.join(str(part) for part in (request.accepted_renderer.format, request.user.pk, *parts))
+        return quote_etag(sha1(raw.encode()).hexdigest())
+
+    def get_user_state(self, request, rows):
+        return ()
+
+    def get_list_validators(self, request, rows):
+        etag = self.make_etag(
+            request, request.get_full_path(), *(f'{row.pk}@{row.updated_at}' for row in rows),
+            *self.get_user_state(request, rows)
+        )
+        return etag, None
+
+    def get_object_validators(self, request, instance):
+        etag = self.make_etag(request, instance.pk, instance.updated_at, *self.get_user_state(request, [instance]))
+        return etag, instance.updated_at
+
+    def conditional(self, request, etag, last_modified, build):
+        self._validators = (etag, last_modified)
+        headers = validator_headers(etag, last_modified)
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(headers)
+        response = build()
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        # Only the key and the ordering fields, no joins or prefetches.
+        validated = queryset.select_related(None).prefetch_related(None).only('pk', 'updated_at')
+        rows = self.paginate_queryset(validated)
+        paginated = rows is not None
+        if not paginated:
+            rows = list(validated)
+        etag, last_modified = self.get_list_validators(request, rows)
+        return self.conditional(
+            request, etag, last_modified,
+            lambda: self.list_response(queryset, rows, paginated)
+        )
+
+    def list_response(self, queryset, rows, paginated):
+        if not paginated:
+            return Response(self.get_serializer(queryset, many=True).data)
+        instances = queryset.in_bulk([row.pk for row in rows])
+        page = [instances[row.pk] for row in rows if row.pk in instances]
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag, last_modified = self.get_object_validators(request, instance)
+        return self.conditional(
+            request, etag, last_modified,
+            lambda: Response(self.get_serializer(instance).data)
+        )
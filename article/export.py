@@ -0,0 +1,52 @@
+from django.core.serializers.json import DjangoJSONEncoder
+
+from core.models import Content
+
+
+CONTENT_EXPORT_FIELDS = (
+    'id', 'title', 'body', 'author_id', 'topic_id', 'topic__title',
+    'like_count', 'created_at', 'updated_at',
+)
+
+
+def iter_published_content(after=0, chunk_size=1000):
+    """
+    Yield published contents as dicts in id order, one keyset chunk at a time.
+    Memory stays bounded by `chunk_size` and `after` resumes an interrupted export.
+    """
+    Through = Content.tags.through
+    while True:
+        rows = list(
+            Content.objects.filter(publish=True, id__gt=after)
+            .order_by('id')
+            .values(*CONTENT_EXPORT_FIELDS)[:chunk_size]
+        )
+        if not rows:
+            return
+
+        tags = {}
+        tag_rows = Through.objects.filter(
+            content_id__in=[row['id'] for row in rows]
+        ).order_by('tag__title').values_list('content_id', 'tag__title')
+        for content_id, title in tag_rows:
+            tags.setdefault(content_id, []).append(title)
+
+        for row in rows:
+            yield {
+                'id': row['id'],
+                'title': row['title'],
+                'body': row['body'],
+                'author': row['author_id'],
+                'topic': {'id': row['topic_id'], 'title': row['topic__title']},
+                'tags': tags.get(row['id'], []),
+                'likes': row['like_count'],
+                'created_at': row['created_at'],
+                'updated_at': row['updated_at'],
+            }
+        after = rows[-1]['id']
+
+
+def ndjson_lines(rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(row) + '\n'
@@ -0,0 +1,176 @@
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q, prefetch_related_objects
+from django.db.models.expressions import RawSQL
+
+from core.models import Content, Follow, TimelineEntry
+from .utils import chunked
+
+
+DEFAULTS = {
+    'TIMELINE_LENGTH': 500,
+    'CELEBRITY_FOLLOWERS': 10000,
+    'BACKFILL': 20,
+    'BATCH_SIZE': 500,
+}
+
+TRIM_SQL = """
+DELETE FROM {table} WHERE id IN (
+    SELECT id FROM (
+        SELECT id, ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY content_id DESC) AS position
+        FROM {table} WHERE user_id IN ({users})
+    ) ranked WHERE position > %s
+)
+"""
+
+
+# Newest published contents of one author, a range scan of its partial
+# (author, id) index. One per celebrity, joined with UNION ALL.
+# PostgreSQL before 16 requires the alias on the derived table.
+PULL_SQL = """
+SELECT id FROM (
+    SELECT id FROM {table} WHERE author_id = %s AND publish{before} ORDER BY id DESC LIMIT %s
+) AS pulled
+"""
+
+PULL_AUTHORS = 250
+
+
+def feed_setting(name):
+    return getattr(settings, 'FEED', {}).get(name, DEFAULTS[name])
+
+
+def is_celebrity(user):
+    """
+    Authors with this many followers are pulled at read time instead of fanned out
+    """
+    return user.follower_count >= feed_setting('CELEBRITY_FOLLOWERS')
+
+
+def push(user_ids, content_ids):
+    """
+    Insert timeline rows for every (user, content) pair then trim those timelines
+    """
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(user_id=user_id, content_id=content_id) for user_id in user_ids for content_id in content_ids],
+        ignore_conflicts=True,
+    )
+    trim_timelines(user_ids)
+
+
+def trim_timelines(user_ids):
+    """
+    Keep the newest TIMELINE_LENGTH entries of each user
+    """
+    if not user_ids:
+        return 0
+    sql = TRIM_SQL.format(
+        table=connection.ops.quote_name(TimelineEntry._meta.db_table),
+        users=', '.join(['%s'] * len(user_ids)),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [*user_ids, feed_setting('TIMELINE_LENGTH')])
+        return cursor.rowcount
+
+
+def fan_out(content_id):
+    """
+    Push a newly published content to the timelines of everyone following
+    its topic, one of its tags or its author, unless the author is popular
+    enough to be pulled at read time. Returns the number of timelines.
+    """
+    content = Content.objects.select_related('author').filter(pk=content_id, publish=True).first()
+    if content is None:
+        return 0
+    targets = Q(topic_id=content.topic_id) | Q(tag__in=content.tags.all())
+    if not is_celebrity(content.author):
+        targets |= Q(author_id=content.author_id)
+    followers = Follow.objects.filter(targets).exclude(user_id=content.author_id)
+    followers = followers.order_by().values_list('user_id', flat=True).distinct()
+
+    total = 0
+    for user_ids in chunked(followers.iterator(), feed_setting('BATCH_SIZE')):
+        with transaction.atomic():
+            push(user_ids, [content.id])
+        total += len(user_ids)
+    return total
+
+
+def backfill(follow):
+    """
+    Seed a new follower's timeline with the latest contents of what they followed
+    """
+    if follow.author_id is not None:
+        if is_celebrity(follow.author):
+            return
+        contents = Content.objects.filter(author_id=follow.author_id)
+    elif follow.topic_id is not None:
+        contents = Content.objects.filter(topic_id=follow.topic_id)
+    else:
+        contents = Content.objects.filter(tags=follow.tag_id)
+    content_ids = list(
+        contents.filter(publish=True).exclude(author_id=follow.user_id)
+        .order_by('-id').values_list('id', flat=True)[:feed_setting('BACKFILL')]
+    )
+    if content_ids:
+        push([follow.user_id], content_ids)
+
+
+def pull_contents(author_ids, before, limit):
+    """
+    The newest `limit` contents below `before` of each author, one query per
+    PULL_AUTHORS authors (SQLite caps compound selects at 500 terms)
+    """
+    pull = PULL_SQL.format(
+        table=connection.ops.quote_name(Content._meta.db_table),
+        before=' AND id < %s' if before is not None else '',
+    )
+    contents = []
+    for batch in chunked(author_ids, PULL_AUTHORS):
+        params = []
+        for author_id in batch:
+            params += [author_id] + ([before] if before is not None else []) + [limit]
+        sql = ' UNION ALL '.join([pull] * len(batch))
+        contents += Content.objects.filter(id__in=RawSQL(sql, params)).select_related('author', 'topic')
+    return contents
+
+
+def load_feed(user, before=None, limit=10):
+    """
+    One page of a user's home feed, newest first. Timeline rows come from a
+    range scan of the (user, content) index, followed celebrity authors add
+    one query whatever their number, a range scan of the author index each,
+    merged in here.
+    Returns (contents, next cursor).
+    """
+    entries = TimelineEntry.objects.filter(user=user).select_related('content__author', 'content__topic')
+    if before is not None:
+        entries = entries.filter(content_id__lt=before)
+    sources = [[entry.content for entry in entries.order_by('-content')[:limit]]]
+
+    celebrities = list(Follow.objects.filter(
+        user=user, author__follower_count__gte=feed_setting('CELEBRITY_FOLLOWERS')
+    ).values_list('author_id', flat=True))
+    if celebrities:
+        pulled = sorted(pull_contents(celebrities, before, limit), key=lambda content: content.id, reverse=True)
+        by_author = {}
+        for content in pulled:
+            by_author.setdefault(content.author_id, []).append(content)
+        sources += by_author.values()
+
+    # A full source may hold more rows below its last id, only rows at or
+    # above the highest such id are known to be complete.
+    floor = max((rows[-1].id for rows in sources if len(rows) == limit), default=None)
+
+    merged = {content.id: content for rows in sources for content in rows if content.publish}
+    contents = sorted(
+        (content for content in merged.values() if floor is None or content.id >= floor),
+        key=lambda content: content.id, reverse=True
+    )
+    page = contents[:limit]
+    if len(contents) > limit:
+        next_before = page[-1].id
+    else:
+        next_before = floor
+    prefetch_related_objects(page, 'tags')
+    return page, next_before
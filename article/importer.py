@@ -0,0 +1,188 @@
+import csv
+import json
+from multiprocessing import Pool
+
+from django.db import connection, transaction
+from django.db.models import Max
+
+from core.models import Content, Tag, Topic, User
+from .search import get_search_backend
+from .utils import chunked
+from .signals import invalidate
+
+
+class RecordError(ValueError):
+    pass
+
+
+def normalize(record):
+    """
+    Turn an NDJSON object or CSV row into the fields the importer writes.
+    Accepts the shape produced by export_content as well.
+    """
+    if not isinstance(record, dict):
+        raise RecordError('record must be an object')
+    title = record.get('title')
+    if not title:
+        raise RecordError('title is required')
+    author = record.get('author')
+    if author in (None, ''):
+        raise RecordError('author is required')
+    if isinstance(author, str) and author.isdigit():
+        author = int(author)
+    topic = record.get('topic')
+    if isinstance(topic, dict):
+        topic = topic.get('title')
+    if not topic:
+        raise RecordError('topic is required')
+    tags = record.get('tags') or []
+    if isinstance(tags, str):
+        tags = [tag for tag in tags.split('|') if tag]
+    publish = record.get('publish', True)
+    if isinstance(publish, str):
+        publish = publish.strip().lower() in ('1', 'true', 'yes')
+    return {
+        'title': str(title)[:255],
+        'body': str(record.get('body') or ''),
+        'author': author,
+        'topic': str(topic),
+        'tags': [str(tag) for tag in tags],
+        'publish': bool(publish),
+    }
+
+
+def parse_ndjson_lines(numbered_lines):
+    """
+    Parse a chunk of (line number, text) pairs, runs in pool workers
+    """
+    parsed = []
+    for number, line in numbered_lines:
+        if not line.strip():
+            continue
+        try:
+            parsed.append((number, normalize(json.loads(line)), None))
+        except (ValueError, TypeError) as error:
+            parsed.append((number, None, str(error)))
+    return parsed
+
+
+def normalize_rows(numbered_rows):
+    parsed = []
+    for number, row in numbered_rows:
+        try:
+            parsed.append((number, normalize(row), None))
+        except RecordError as error:
+            parsed.append((number, None, str(error)))
+    return parsed
+
+
+class ContentImporter:
+    """
+    Insert contents in chunked bulk_create batches, resolving authors,
+    topics and tags through lookup maps loaded once up front
+    """
+    def __init__(self, batch_size=1000, create_missing=False):
+        self.batch_size = batch_size
+        self.create_missing = create_missing
+        self.imported = 0
+        self.errors = []
+        self.users_by_email = dict(User.objects.values_list('email', 'id'))
+        self.user_ids = set(self.users_by_email.values())
+        self.topics = dict(Topic.objects.values_list('title', 'id'))
+        self.tags = dict(Tag.objects.values_list('title', 'id'))
+
+    def parsed_records(self, stream, fmt, workers):
+        if fmt == 'csv':
+            rows = enumerate(csv.DictReader(stream), start=2)
+            parse = normalize_rows
+        else:
+            rows = enumerate(stream, start=1)
+            parse = parse_ndjson_lines
+        chunks = chunked(rows, self.batch_size)
+        if workers > 1:
+            with Pool(workers) as pool:
+                yield from pool.imap(parse, chunks)
+        else:
+            yield from map(parse, chunks)
+
+    def run(self, stream, fmt='ndjson', workers=1):
+        for chunk in self.parsed_records(stream, fmt, workers):
+            records = []
+            for number, record, error in chunk:
+                if error:
+                    self.errors.append((number, error))
+                else:
+                    records.append((number, record))
+            if records:
+                self.write_batch(records)
+        return self.imported
+
+    def resolve_author(self, author):
+        if isinstance(author, int):
+            return author if author in self.user_ids else None
+        return self.users_by_email.get(author)
+
+    def ensure(self, model, lookup, titles):
+        missing = [title for title in dict.fromkeys(titles) if title not in lookup]
+        if not missing or not self.create_missing:
+            return
+        model.objects.bulk_create([model(title=title) for title in missing], ignore_conflicts=True)
+        lookup.update(model.objects.filter(title__in=missing).values_list('title', 'id'))
+
+    def write_batch(self, records):
+        self.ensure(Topic, self.topics, [record['topic'] for _, record in records])
+        self.ensure(Tag, self.tags, [tag for _, record in records for tag in record['tags']])
+
+        contents, tag_ids = [], []
+        for number, record in records:
+            author_id = self.resolve_author(record['author'])
+            topic_id = self.topics.get(record['topic'])
+            missing_tags = [tag for tag in record['tags'] if tag not in self.tags]
+            if author_id is None:
+                self.errors.append((number, f"unknown author {record['author']!r}"))
+            elif topic_id is None:
+                self.errors.append((number, f"unknown topic {record['topic']!r}"))
+            elif missing_tags:
+                self.errors.append((number, f'unknown tags {missing_tags!r}'))
+            else:
+                contents.append(Content(
+                    author_id=author_id,
+                    topic_id=topic_id,
+                    title=record['title'],
+                    body=record['body'],
+                    publish=record['publish'],
+                ))
+                tag_ids.append({self.tags[tag] for tag in record['tags']})
+        if not contents:
+            return
+
+        Through = Content.tags.through
+        with transaction.atomic():
+            if connection.features.can_return_rows_from_bulk_insert:
+                Content.objects.bulk_create(contents)
+                ids = [content.id for content in contents]
+            else:
+                # Ids are not returned here; the batch owns every id above the
+                # previous maximum because the write transaction is serialized.
+                last_id = Content.objects.aggregate(last=Max('id'))['last'] or 0
+                Content.objects.bulk_create(contents)
+                ids = list(Content.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True))
+                if len(ids) != len(contents):
+                    raise RuntimeError('Concurrent content inserts during import batch')
+                for content, content_id in zip(contents, ids):
+                    content.id = content_id
+            Through.objects.bulk_create(
+                [Through(content_id=content_id, tag_id=tag_id)
+                 for content_id, tags in zip(ids, tag_ids) for tag_id in tags],
+                batch_size=self.batch_size,
+            )
+            get_search_backend().index_many(contents)
+
+        self.imported += len(contents)
+        titles = {title for _, record in records for title in record['tags']}
+        topics = {record['topic'] for _, record in records}
+        invalidate(
+            'list:contents',
+            *(f'list:tag:{title}' for title in titles),
+            *(f'list:topic:{title}' for title in topics),
+        )
@@ -0,0 +1,70 @@
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.models import Content, Like
+from .signals import invalidate
+
+
+def _quoted(model):
+    return connection.ops.quote_name(model._meta.db_table)
+
+
+def supports_returning():
+    # UPDATE ... RETURNING needs SQLite 3.35, PostgreSQL always had it.
+    return connection.vendor != 'sqlite' or connection.Database.sqlite_version_info >= (3, 35)
+
+
+def _apply(cursor, content_id, delta):
+    """
+    Move the counter by `delta` and read it back, in the same statement when
+    the database supports UPDATE ... RETURNING. The counter never goes below
+    zero, a drifted count must not break the positive CHECK on unlike.
+    """
+    content = _quoted(Content)
+    if delta:
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+        update = (
+            f'UPDATE {content} SET updated_at = %s, '
+            f'like_count = CASE WHEN like_count + %s < 0 THEN 0 ELSE like_count + %s END '
+            f'WHERE id = %s'
+        )
+        if supports_returning():
+            cursor.execute(f'{update} RETURNING like_count', [now, delta, delta, content_id])
+            row = cursor.fetchone()
+            if row is None:
+                raise Content.DoesNotExist
+            return row[0]
+        # The UPDATE holds the write lock until commit, the SELECT reads our own count.
+        cursor.execute(update, [now, delta, delta, content_id])
+    cursor.execute(f'SELECT like_count FROM {content} WHERE id = %s', [content_id])
+    row = cursor.fetchone()
+    if row is None:
+        raise Content.DoesNotExist
+    return row[0]
+
+
+def set_like(user_id, content_id, liked):
+    """
+    Idempotently like or unlike a content in two queries (three on SQLite
+    before 3.35, INSERT ... ON CONFLICT itself needs 3.24). The (user, content)
+    unique constraint settles concurrent double taps: only the request whose
+    INSERT (or DELETE) actually touched a row moves the counter.
+    Returns (changed, like count); raises Content.DoesNotExist.
+    """
+    like = _quoted(Like)
+    with transaction.atomic(), connection.cursor() as cursor:
+        if liked:
+            cursor.execute(
+                f'INSERT INTO {like} (user_id, content_id, liked) VALUES (%s, %s, %s) '
+                f'ON CONFLICT (user_id, content_id) DO NOTHING',
+                [user_id, content_id, True]
+            )
+            delta = cursor.rowcount
+        else:
+            cursor.execute(f'DELETE FROM {like} WHERE user_id = %s AND content_id = %s', [user_id, content_id])
+            delta = -cursor.rowcount
+        count = _apply(cursor, content_id, delta)
+
+    if delta:
+        invalidate(f'content:{content_id}')
+    return bool(delta), count
@@ -0,0 +1,62 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from article.views import CommentApiViewSet
+from core.models import Comment, Content, Topic
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    """
+    Measure comment POST latency on contents that already have many comments.
+    Everything is written inside a transaction that is rolled back at the end.
+    """
+    help = 'Benchmark posting a reply against the existing comment count'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--counts', type=int, nargs='+', default=[10, 1000, 10000, 100000])
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, options):
+        user = get_user_model().objects.create_user(email='bench@comment.local', username='bench-comment')
+        topic = Topic.objects.create(title='bench-comment')
+        view = CommentApiViewSet.as_view({'post': 'create'})
+        factory = APIRequestFactory()
+
+        for count in options['counts']:
+            content = Content.objects.create(author=user, topic=topic, title='bench', body='body', publish=True)
+            Comment.objects.bulk_create(
+                (Comment(author=user, content=content, body='comment') for _ in range(count)),
+                batch_size=5000,
+            )
+            reply_to = Comment.objects.filter(content=content).order_by('id').values_list('id', flat=True).first()
+
+            timings = []
+            for _ in range(options['repeat']):
+                request = factory.post('/', {'body': 'reply', 'reply': reply_to}, format='json')
+                force_authenticate(request, user=user)
+                started = time.perf_counter()
+                response = view(request, content_id=content.id)
+                timings.append((time.perf_counter() - started) * 1000)
+                assert response.status_code == 201, response.data
+
+            self.stdout.write(
+                f'{count:>8} comments: median {statistics.median(timings):.2f} ms, '
+                f'max {max(timings):.2f} ms over {options["repeat"]} posts'
+            )
@@ -0,0 +1,89 @@
+import random
+import string
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.contrib.auth import get_user_model
+
+from article.search import LikeSearchBackend, get_search_backend
+from core.models import Content, Topic
+
+VOCABULARY_SIZE = 50_000
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    """
+    Compare the full text backend with the icontains filter on a synthetic corpus.
+    Everything is written inside a transaction that is rolled back at the end.
+    """
+    help = 'Benchmark content search backends on a generated corpus'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000)
+        parser.add_argument('--words', type=int, default=200, help='Words per article body')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def vocabulary(self, rng):
+        words = set()
+        while len(words) < VOCABULARY_SIZE:
+            words.add(''.join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 9))))
+        return sorted(words)
+
+    def pick(self, rng, words, k):
+        # Zipf-like skew: a few words are everywhere, most are rare.
+        return ' '.join(words[int(rng.paretovariate(1.0)) % len(words)] for _ in range(k))
+
+    def run(self, options):
+        rng = random.Random(0)
+        words = self.vocabulary(rng)
+        author = get_user_model().objects.create_user(email='bench@search.local', username='bench-search')
+        topic = Topic.objects.create(title='bench-search')
+
+        started = time.perf_counter()
+        rows, chunk = options['rows'], options['chunk_size']
+        for offset in range(0, rows, chunk):
+            Content.objects.bulk_create(
+                Content(
+                    author=author,
+                    topic=topic,
+                    title=self.pick(rng, words, 6),
+                    body=self.pick(rng, words, options['words']),
+                    publish=True,
+                )
+                for _ in range(min(chunk, rows - offset))
+            )
+        self.stdout.write(f'Generated {rows} contents in {time.perf_counter() - started:.1f}s')
+
+        backend = get_search_backend()
+        started = time.perf_counter()
+        backend.rebuild(chunk_size=chunk)
+        self.stdout.write(f'Indexed with {type(backend).__name__} in {time.perf_counter() - started:.1f}s')
+
+        queryset = Content.objects.filter(publish=True)
+        # A very common word, a mid frequency word, a rare word and a two word query.
+        terms = [[words[1]], [words[50]], [words[5000]], [words[2], words[30]]]
+        for name, search in (('icontains', LikeSearchBackend()), ('fulltext', backend)):
+            for term in terms:
+                timings = []
+                for _ in range(options['repeat']):
+                    started = time.perf_counter()
+                    list(search.search(queryset, term).values_list('id', flat=True)[:10])
+                    # Counting forces a full pass, like a page number paginator would.
+                    search.search(queryset, term).count()
+                    timings.append(time.perf_counter() - started)
+                best = min(timings) * 1000
+                self.stdout.write(f'{name:<10} {" ".join(term):<24} best of {options["repeat"]}: {best:.2f} ms')
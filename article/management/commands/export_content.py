@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from article.export import iter_published_content, ndjson_lines
+
+
+class Command(BaseCommand):
+    """
+    Dump every published content as NDJSON
+    """
+    help = 'Export published contents as newline delimited JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', '-o', help='File to write, stdout by default')
+        parser.add_argument('--after', type=int, default=0, help='Resume after this content id')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        rows = iter_published_content(after=options['after'], chunk_size=options['chunk_size'])
+        total = 0
+        if options['output']:
+            with open(options['output'], 'a' if options['after'] else 'w', encoding='utf-8') as out:
+                for line in ndjson_lines(rows):
+                    out.write(line)
+                    total += 1
+        else:
+            for line in ndjson_lines(rows):
+                self.stdout.write(line, ending='')
+                total += 1
+        self.stderr.write(f'Exported {total} content(s)')
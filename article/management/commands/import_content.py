@@ -0,0 +1,45 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from article.importer import ContentImporter
+
+
+class Command(BaseCommand):
+    """
+    Bulk import contents from NDJSON or CSV
+    """
+    help = 'Import contents from an NDJSON or CSV file (or - for stdin)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to read, - for stdin')
+        parser.add_argument('--format', choices=('ndjson', 'csv'), help='Guessed from the file extension by default')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=1, help='Processes used to parse records')
+        parser.add_argument('--create-missing', action='store_true', help='Create unknown topics and tags')
+        parser.add_argument('--max-errors', type=int, default=20, help='Errors to print')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('csv' if path.endswith('.csv') else 'ndjson')
+        importer = ContentImporter(batch_size=options['batch_size'], create_missing=options['create_missing'])
+
+        started = time.perf_counter()
+        try:
+            if path == '-':
+                importer.run(sys.stdin, fmt, options['workers'])
+            else:
+                with open(path, newline='', encoding='utf-8') as stream:
+                    importer.run(stream, fmt, options['workers'])
+        except OSError as error:
+            raise CommandError(error)
+        elapsed = time.perf_counter() - started
+
+        for number, error in importer.errors[:options['max_errors']]:
+            self.stderr.write(f'line {number}: {error}')
+        rate = importer.imported / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {importer.imported} content(s), skipped {len(importer.errors)} '
+            f'in {elapsed:.2f}s ({rate:.0f} rows/s)'
+        ))
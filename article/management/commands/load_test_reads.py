@@ -0,0 +1,157 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.test import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.models import Comment, Content, Tag, Topic
+
+SEED_TITLE = 'load-test-reads'
+
+
+class Command(BaseCommand):
+    """
+    Compare the sync read endpoints served by the WSGI application on a pool
+    of threads (like gunicorn gthread) with their async variants served by
+    the ASGI application on one event loop (like uvicorn). Both applications
+    are driven in process, `--client-delay` keeps every response open that
+    long after it is produced, like a slow client would. Rows are written to
+    the default database and deleted at the end.
+    """
+    help = 'Load test the read endpoints under WSGI and ASGI'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Requests per endpoint and server')
+        parser.add_argument('--threads', type=int, default=8, help='WSGI worker threads')
+        parser.add_argument('--concurrency', type=int, default=100, help='Requests in flight under ASGI')
+        parser.add_argument('--client-delay', type=float, default=0.0, help='Seconds each client takes to read a response')
+        parser.add_argument('--contents', type=int, default=50)
+        parser.add_argument('--cache', action='store_true', help='Keep the anonymous response cache enabled')
+
+    def handle(self, *args, **options):
+        cache = {**getattr(settings, 'RESPONSE_CACHE', {}), 'ENABLED': options['cache']}
+        with override_settings(RESPONSE_CACHE=cache, ALLOWED_HOSTS=['testserver']):
+            try:
+                self.run(*self.seed(options['contents']), options)
+            finally:
+                Content.objects.filter(topic__title=SEED_TITLE).delete()
+                Topic.objects.filter(title=SEED_TITLE).delete()
+                Tag.objects.filter(title=SEED_TITLE).delete()
+                get_user_model().objects.filter(username=SEED_TITLE).delete()
+
+    def seed(self, count):
+        # bulk_create skips the signals, no fan-out tasks or cache churn.
+        user = get_user_model().objects.create_user(email='load@test.local', username=SEED_TITLE)
+        topic = Topic.objects.create(title=SEED_TITLE)
+        tag = Tag.objects.create(title=SEED_TITLE)
+        Content.objects.bulk_create(
+            Content(author=user, topic=topic, title=f'content {n}', body='body ' * 50, publish=True) for n in range(count)
+        )
+        # SQLite does not return the ids of bulk inserted rows.
+        contents = list(Content.objects.filter(topic=topic).order_by('id'))
+        Content.tags.through.objects.bulk_create(
+            Content.tags.through(content_id=content.id, tag_id=tag.id) for content in contents
+        )
+        Comment.objects.bulk_create(
+            Comment(author=user, content=contents[0], body=f'comment {n}') for n in range(20)
+        )
+        return user, topic, tag
+
+    def run(self, user, topic, tag, options):
+        content = Content.objects.filter(topic=topic).order_by('id').first()
+        token = f'Bearer {AccessToken.for_user(user)}'
+        endpoints = [
+            ('content list', 'contents/', None),
+            ('content detail', f'contents/{content.id}/', None),
+            ('tag list', f'tag/{tag.title}/', None),
+            ('topic list', f'topic/{topic.title}/', None),
+            ('comment list', f'{content.id}/comment/', token),
+        ]
+        wsgi, asgi = get_wsgi_application(), get_asgi_application()
+        self.stdout.write(
+            f"{options['requests']} requests per case, {options['threads']} WSGI threads, "
+            f"{options['concurrency']} ASGI in flight, client delay {options['client_delay']}s"
+        )
+        for label, path, authorization in endpoints:
+            for server, path_prefix, runner in (
+                ('wsgi', '/api/article/', lambda p, a: self.run_wsgi(wsgi, p, a, options)),
+                ('asgi', '/api/article/async/', lambda p, a: asyncio.run(self.run_asgi(asgi, p, a, options))),
+            ):
+                statuses, latencies, elapsed = runner(path_prefix + path, authorization)
+                failed = sum(1 for code in statuses if code != 200)
+                self.stdout.write(
+                    f'  {label:<15} {server}  {len(latencies) / elapsed:>8.1f} req/s  '
+                    f'p50 {statistics.median(latencies) * 1000:>7.1f} ms  '
+                    f'p99 {self.percentile(latencies, 0.99) * 1000:>7.1f} ms'
+                    + (f'  {failed} failed' if failed else '')
+                )
+
+    def percentile(self, values, fraction):
+        values = sorted(values)
+        return values[min(int(len(values) * fraction), len(values) - 1)]
+
+    def run_wsgi(self, application, path, authorization, options):
+        def request(_):
+            environ = {
+                'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '', 'SCRIPT_NAME': '',
+                'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'HTTP_HOST': 'testserver',
+                'wsgi.input': BytesIO(), 'wsgi.url_scheme': 'http', 'wsgi.errors': BytesIO(),
+            }
+            if authorization:
+                environ['HTTP_AUTHORIZATION'] = authorization
+            status = []
+            started = time.perf_counter()
+            body = application(environ, lambda code, headers, exc_info=None: status.append(int(code[:3])))
+            try:
+                for _ in body:
+                    pass
+                if options['client_delay']:
+                    time.sleep(options['client_delay'])
+            finally:
+                body.close()
+            return status[0], time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(options['threads']) as pool:
+            results = list(pool.map(request, range(options['requests'])))
+        return [code for code, _ in results], [latency for _, latency in results], time.perf_counter() - started
+
+    async def run_asgi(self, application, path, authorization, options):
+        slots = asyncio.Semaphore(options['concurrency'])
+        headers = [(b'host', b'testserver')]
+        if authorization:
+            headers.append((b'authorization', authorization.encode()))
+
+        async def request():
+            async with slots:
+                scope = {
+                    'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+                    'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'',
+                    'root_path': '', 'headers': headers, 'server': ('testserver', 80), 'client': ('127.0.0.1', 0),
+                }
+                status = []
+                started = time.perf_counter()
+
+                async def receive():
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+                async def send(message):
+                    if message['type'] == 'http.response.start':
+                        status.append(message['status'])
+                    elif not message.get('more_body') and options['client_delay']:
+                        await asyncio.sleep(options['client_delay'])
+
+                await application(scope, receive, send)
+                return status[0], time.perf_counter() - started
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(request() for _ in range(options['requests'])))
+        return [code for code, _ in results], [latency for _, latency in results], time.perf_counter() - started
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from article.search import get_search_backend
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the content full text index from scratch
+    """
+    help = 'Rebuild the full text search index of contents'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        backend.rebuild(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt search index with {type(backend).__name__}'))
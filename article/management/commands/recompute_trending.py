@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from article.trending import recompute_scores
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the trending score table, meant to run periodically from cron
+    """
+    help = 'Recompute the trending score of every published content'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        total = recompute_scores(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Scored {total} content(s)'))
@@ -1,4 +1,125 @@
-from rest_framework.pagination import PageNumberPagination
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination, PageNumberPagination
 
 class DefaultPagination(PageNumberPagination):
-  page_size = 10
\ No newline at end of file
+  page_size = 10
+
+
+class OptionalCursorPagination(CursorPagination):
+  """
+  Keyset pagination on the primary key, enabled only when the request
+  carries a `cursor` query param (`?cursor=` for the first page).
+  Pages never run COUNT(*) or OFFSET over the skipped rows.
+  """
+  page_size = 10
+  ordering = '-id'
+
+  def paginate_queryset(self, queryset, request, view=None):
+    if self.cursor_query_param not in request.query_params:
+      return None
+    return super().paginate_queryset(queryset, request, view)
+
+
+class ContentCursorPagination(OptionalCursorPagination):
+  """
+  Search results, ranked by the search backend, are paged in rank order by
+  an offset carried in the cursor, a keyset on `-id` would drop the ranking
+  after the first page. DRF caps a decoded offset at `offset_cutoff`, so
+  a search lists no more than that plus one page of rows.
+  """
+  ordering = '-id'
+  rank_field = 'search_rank'
+
+  def paginate_queryset(self, queryset, request, view=None):
+    self.ranked = self.rank_field in queryset.query.extra_select
+    if not self.ranked or self.cursor_query_param not in request.query_params:
+      return super().paginate_queryset(queryset, request, view)
+
+    self.request = request
+    self.page_size = self.get_page_size(request)
+    self.base_url = request.build_absolute_uri()
+    cursor = self.decode_cursor(request)
+    self.offset = cursor.offset if cursor else 0
+    results = list(queryset[self.offset:self.offset + self.page_size + 1])
+    self.page = results[:self.page_size]
+    self.has_next = len(results) > self.page_size
+    self.has_previous = self.offset > 0
+    return self.page
+
+  def get_next_link(self):
+    if not self.ranked:
+      return super().get_next_link()
+    offset = self.offset + self.page_size
+    # A deeper offset would decode to the cutoff again and repeat the page.
+    if not self.has_next or offset > self.offset_cutoff:
+      return None
+    return self.encode_cursor(Cursor(offset=offset, reverse=False, position=None))
+
+  def get_previous_link(self):
+    if not self.ranked:
+      return super().get_previous_link()
+    if not self.has_previous:
+      return None
+    return self.encode_cursor(Cursor(offset=max(self.offset - self.page_size, 0), reverse=False, position=None))
+
+
+class CommentCursorPagination(OptionalCursorPagination):
+  ordering = 'id'
+
+
+class TrendingCursorPagination(CursorPagination):
+  """
+  Always paginated, walks the score index from the top. Scores tie all the
+  time (every content without engagement scores 0), so the cursor position
+  is the (score, content) pair of the edge row, DRF's cursor would keep only
+  the score and page through ties by a capped offset.
+  """
+  page_size = 10
+  ordering = ('-score', '-content')
+
+  def paginate_queryset(self, queryset, request, view=None):
+    self.request = request
+    self.page_size = self.get_page_size(request)
+    self.base_url = request.build_absolute_uri()
+    self.cursor = self.decode_cursor(request)
+    reverse = self.cursor is not None and self.cursor.reverse
+
+    if self.cursor is not None and self.cursor.position is not None:
+      score, content = self.parse_position(self.cursor.position)
+      if reverse:
+        queryset = queryset.filter(Q(score__gt=score) | Q(score=score, content__gt=content))
+      else:
+        queryset = queryset.filter(Q(score__lt=score) | Q(score=score, content__lt=content))
+    queryset = queryset.order_by(*(('score', 'content') if reverse else self.ordering))
+
+    results = list(queryset[:self.page_size + 1])
+    self.page = results[:self.page_size]
+    has_more = len(results) > self.page_size
+    if reverse:
+      self.page.reverse()
+      self.has_next, self.has_previous = True, has_more
+    else:
+      self.has_next, self.has_previous = has_more, self.cursor is not None
+    return self.page
+
+  def parse_position(self, position):
+    try:
+      score, content = position.split(':')
+      return float(score), int(content)
+    except ValueError:
+      raise NotFound(self.invalid_cursor_message)
+
+  def keyset_link(self, row, reverse):
+    position = f'{row.score!r}:{row.content_id}'
+    return self.encode_cursor(Cursor(offset=0, reverse=reverse, position=position))
+
+  def get_next_link(self):
+    if not self.has_next or not self.page:
+      return None
+    return self.keyset_link(self.page[-1], reverse=False)
+
+  def get_previous_link(self):
+    if not self.has_previous or not self.page:
+      return None
+    return self.keyset_link(self.page[0], reverse=True)
@@ -0,0 +1,192 @@
+from functools import reduce
+import operator
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.module_loading import import_string
+from rest_framework import filters
+
+from core.models import Content
+
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+class BaseSearchBackend:
+    """
+    Full text search over Content title and body
+    """
+    def setup(self):
+        pass
+
+    def index(self, content):
+        pass
+
+    def index_many(self, contents):
+        for content in contents:
+            self.index(content)
+
+    def remove(self, content_id):
+        pass
+
+    def rebuild(self, chunk_size=2000):
+        pass
+
+    def search(self, queryset, terms):
+        raise NotImplementedError
+
+
+class LikeSearchBackend(BaseSearchBackend):
+    """
+    Fallback backend doing `icontains` scans, the same as DRF SearchFilter
+    """
+    def search(self, queryset, terms):
+        conditions = (
+            Q(title__icontains=term) | Q(body__icontains=term)
+            for term in terms
+        )
+        return queryset.filter(reduce(operator.and_, conditions))
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    """
+    FTS5 inverted index kept in a side table keyed by Content.id
+    """
+    table = 'core_content_fts'
+
+    def setup(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} '
+                f'USING fts5(title, body, tokenize="unicode61")'
+            )
+
+    def index(self, content):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [content.id])
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, title, body) VALUES (%s, %s, %s)',
+                [content.id, content.title, content.body]
+            )
+
+    def index_many(self, contents):
+        rows = [(content.id, content.title, content.body) for content in contents]
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {self.table} WHERE rowid = %s', [row[:1] for row in rows])
+            self._insert(cursor, rows)
+
+    def remove(self, content_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [content_id])
+
+    def rebuild(self, chunk_size=2000):
+        self.setup()
+        rows = Content.objects.order_by('id').values_list('id', 'title', 'body')
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            chunk = []
+            for row in rows.iterator(chunk_size=chunk_size):
+                chunk.append(row)
+                if len(chunk) >= chunk_size:
+                    self._insert(cursor, chunk)
+                    chunk = []
+            if chunk:
+                self._insert(cursor, chunk)
+
+    def _insert(self, cursor, rows):
+        cursor.executemany(
+            f'INSERT INTO {self.table} (rowid, title, body) VALUES (%s, %s, %s)', rows
+        )
+
+    def match_expression(self, terms):
+        # Quote every token so user input can never be parsed as FTS syntax,
+        # and prefix-match it so partial words still hit.
+        tokens = [token for term in terms for token in TOKEN_RE.findall(term)]
+        return ' '.join('"%s"*' % token.replace('"', '""') for token in tokens)
+
+    def search(self, queryset, terms):
+        match = self.match_expression(terms)
+        if not match:
+            return queryset.none()
+        return queryset.extra(
+            tables=[self.table],
+            where=[f'{self.table}.rowid = core_content.id', f'{self.table} MATCH %s'],
+            params=[match],
+            select={'search_rank': f'{self.table}.rank'},
+            # Ties broken by id, search pages are sliced by offset.
+            order_by=['search_rank', '-id'],
+        )
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    tsvector expression with a GIN index, PostgreSQL maintains it on write
+    """
+    config = 'english'
+    index_name = 'core_content_search_idx'
+
+    @property
+    def vector(self):
+        return (
+            f"to_tsvector('{self.config}', "
+            f"coalesce(core_content.title, '') || ' ' || coalesce(core_content.body, ''))"
+        )
+
+    def setup(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {self.index_name} '
+                f'ON core_content USING GIN ({self.vector})'
+            )
+
+    def rebuild(self, chunk_size=2000):
+        self.setup()
+        with connection.cursor() as cursor:
+            cursor.execute(f'REINDEX INDEX {self.index_name}')
+
+    def search(self, queryset, terms):
+        query = f"plainto_tsquery('{self.config}', %s)"
+        text = ' '.join(terms)
+        return queryset.extra(
+            where=[f'{self.vector} @@ {query}'],
+            params=[text],
+            select={'search_rank': f'ts_rank({self.vector}, {query})'},
+            select_params=[text],
+            order_by=['-search_rank', '-id'],
+        )
+
+
+VENDOR_BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+_backend = None
+
+
+def get_search_backend():
+    """
+    Backend from settings.CONTENT_SEARCH_BACKEND, otherwise picked by database vendor
+    """
+    global _backend
+    if _backend is None:
+        path = getattr(settings, 'CONTENT_SEARCH_BACKEND', None)
+        if path:
+            backend_class = import_string(path)
+        else:
+            backend_class = VENDOR_BACKENDS.get(connection.vendor, LikeSearchBackend)
+        _backend = backend_class()
+    return _backend
+
+
+class ContentSearchFilter(filters.SearchFilter):
+    """
+    `?search=` filter that delegates to the configured search backend
+    """
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        return get_search_backend().search(queryset, terms)
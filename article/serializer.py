@@ -2,8 +2,14 @@ from multiprocessing import context
 from rest_framework import serializers
 from core import models
 from django.contrib.auth import get_user_model
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
-from user.serializer import UserSerializer
+from user.serializer import ImageRenditionsField, UserSerializer
+from .signals import invalidate
+from .social import get_social_state
+from .tasks import backfill_follow
 
 class TagSerializer(serializers.ModelSerializer):
     class Meta:
@@ -16,14 +22,34 @@ class TagSerializer(serializers.ModelSerializer):
 
 
 class TopicSerializer(serializers.ModelSerializer):
+    image_sizes = ImageRenditionsField('image')
+
     class Meta:
         model = models.Topic
-        fields = ('title', 'image')
+        fields = ('title', 'image', 'image_sizes')
+
+
+class SocialStateListSerializer(serializers.ListSerializer):
+    """
+    Load the current user's likes and bookmarks for the whole page up front
+    """
+    def to_representation(self, data):
+        items = list(data.all() if hasattr(data, 'all') else data)
+        self.load_social_state(items)
+        return super().to_representation(items)
+
+    def load_social_state(self, contents):
+        get_social_state(self.context).load(
+            getattr(self.context.get('request'), 'user', None),
+            [content.id for content in contents]
+        )
 
 
 class ContentSerializer(serializers.ModelSerializer):
     author = serializers.HiddenField(default=serializers.CurrentUserDefault())
-    likes = serializers.SerializerMethodField()
+    likes = serializers.IntegerField(source='like_count', read_only=True)
+    liked_by_me = serializers.SerializerMethodField()
+    bookmarked_by_me = serializers.SerializerMethodField()
     tags = serializers.PrimaryKeyRelatedField(
         many=True,
         queryset=models.Tag.objects.all()
@@ -31,38 +57,44 @@ class ContentSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = models.Content
-        fields = ('id', 'title', 'body', 'tags', 'topic', 'author', 'likes', 'publish')
+        fields = ('id', 'title', 'body', 'tags', 'topic', 'author', 'likes', 'liked_by_me', 'bookmarked_by_me', 'publish')
         read_only_fields = ('id',)
+        list_serializer_class = SocialStateListSerializer
+
+    def social_state(self, content):
+        state = get_social_state(self.context)
+        state.load(getattr(self.context.get('request'), 'user', None), [content.id])
+        return state
 
-    def get_likes(self, obj):
-        return models.Like.objects.filter(content=obj).count()
-         
+    def get_liked_by_me(self, content):
+        return content.id in self.social_state(content).liked
+
+    def get_bookmarked_by_me(self, content):
+        return content.id in self.social_state(content).bookmarked
+
+
+class TrendingContentSerializer(ContentSerializer):
+    score = serializers.FloatField(source='trending_score', read_only=True)
+
+    class Meta(ContentSerializer.Meta):
+        fields = ContentSerializer.Meta.fields + ('score',)
 
 
 class ContentDetailSerializer(ContentSerializer):
     tags = TagSerializer(many=True, read_only=True)
     author = UserSerializer(many=False, read_only=True)
     topic = TopicSerializer(many=False, read_only=True)
-    likes = serializers.SerializerMethodField()
-
-    def get_likes(self, obj):
-        return models.Like.objects.filter(content=obj).count()
 
 
 class CommentSerializer(serializers.ModelSerializer):
     author = UserSerializer(many=False, read_only=True)
 
     def validate(self, attrs):
-        view = self.context['view']
-        content_id = view.kwargs['content_id']
-        content = models.Content.objects.get(id=content_id)
-        comments_ids = list(models.Comment.objects.filter(content=content).values_list('id', flat=True))
-
-        if attrs.get('reply') is not None:
-            if attrs.get('reply').id in comments_ids:
-                return super().validate(attrs)
-            else:
-                raise serializers.ValidationError('There is no comment id in this content')
+        content = self.context['view'].get_content()
+        reply = attrs.get('reply')
+
+        if reply is not None and reply.content_id != content.id:
+            raise serializers.ValidationError('There is no comment id in this content')
         return super().validate(attrs)
 
     class Meta:
@@ -72,12 +104,10 @@ class CommentSerializer(serializers.ModelSerializer):
     
     
     def create(self, validated_data):
-        view = self.context['view']
-        content_id = view.kwargs['content_id']
         return models.Comment.objects.create(
             **validated_data, 
             author=self.context['request'].user, 
-            content=models.Content.objects.get(id=content_id)
+            content=self.context['view'].get_content()
         )
 
 
@@ -96,13 +126,135 @@ class BookmarkSerializer(serializers.ModelSerializer):
         raise serializers.ValidationError('NotFound')
 
 
+class BookmarkPageSerializer(SocialStateListSerializer):
+    def load_social_state(self, bookmarks):
+        # Every row is one of the user's bookmarks, only likes need a lookup.
+        content_ids = [bookmark.content_id for bookmark in bookmarks]
+        get_social_state(self.context).load(self.context['request'].user, content_ids, bookmarked=content_ids)
+
+
 class BookMarkListSerializer(serializers.ModelSerializer):
     content = ContentSerializer(many=False, read_only=True)
 
     class Meta:
         model = models.Bookmark
         fields = ('content',)
+        list_serializer_class = BookmarkPageSerializer
+
+
+class FollowSerializer(serializers.ModelSerializer):
+    user = serializers.HiddenField(default=serializers.CurrentUserDefault())
+
+    class Meta:
+        model = models.Follow
+        fields = ('id', 'user', 'author', 'topic', 'tag')
+        read_only_fields = ('id',)
+
+    def validate(self, attrs):
+        targets = {name: attrs[name] for name in ('author', 'topic', 'tag') if attrs.get(name) is not None}
+        if len(targets) != 1:
+            raise serializers.ValidationError('Follow exactly one of author, topic or tag')
+        if targets.get('author') == attrs['user']:
+            raise serializers.ValidationError('You can not follow yourself')
+        if models.Follow.objects.filter(user=attrs['user'], **targets).exists():
+            raise serializers.ValidationError('Already followed')
+        return attrs
 
+    def create(self, validated_data):
+        follow = super().create(validated_data)
+        if follow.author_id is not None:
+            get_user_model().objects.filter(pk=follow.author_id).update(follower_count=F('follower_count') + 1)
+        backfill_follow.delay(follow.id)
+        return follow
+
+
+BULK_MAX_ITEMS = 1000
+
+
+class BulkTagSerializer(serializers.Serializer):
+    titles = serializers.ListField(
+        child=serializers.CharField(max_length=100),
+        allow_empty=False,
+        max_length=BULK_MAX_ITEMS,
+    )
+
+    def create(self, validated_data):
+        titles = list(dict.fromkeys(validated_data['titles']))
+        existing = set(models.Tag.objects.filter(title__in=titles).values_list('title', flat=True))
+        models.Tag.objects.bulk_create(
+            [models.Tag(title=title) for title in titles if title not in existing],
+            ignore_conflicts=True,
+        )
+        return [
+            {'title': title, 'status': 'exists' if title in existing else 'created'}
+            for title in titles
+        ]
 
 
+class BulkContentSerializer(serializers.Serializer):
+    """
+    A list of published content ids the current user bookmarks or likes
+    """
+    contents = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=BULK_MAX_ITEMS,
+    )
+    model = None
 
+    def create(self, validated_data):
+        user = self.context['request'].user
+        content_ids = list(dict.fromkeys(validated_data['contents']))
+        published = set(models.Content.objects.filter(
+            id__in=content_ids, publish=True
+        ).values_list('id', flat=True))
+        existing = set(self.model.objects.filter(
+            user=user, content_id__in=published
+        ).values_list('content_id', flat=True))
+        created = [content_id for content_id in content_ids if content_id in published and content_id not in existing]
+        self.model.objects.bulk_create(
+            [self.build(user, content_id) for content_id in created],
+            ignore_conflicts=True,
+        )
+        self.after_create(created)
+
+        results = []
+        for content_id in content_ids:
+            if content_id not in published:
+                item_status = 'not_found'
+            elif content_id in existing:
+                item_status = 'exists'
+            else:
+                item_status = 'created'
+            results.append({'content': content_id, 'status': item_status})
+        return results
+
+    def build(self, user, content_id):
+        return self.model(user=user, content_id=content_id)
+
+    def after_create(self, content_ids):
+        pass
+
+
+class BulkBookmarkSerializer(BulkContentSerializer):
+    model = models.Bookmark
+
+
+class BulkLikeSerializer(BulkContentSerializer):
+    model = models.Like
+
+    def build(self, user, content_id):
+        return self.model(user=user, content_id=content_id, liked=True)
+
+    def after_create(self, content_ids):
+        # Recount rather than add one, a concurrent like may have won the insert.
+        if not content_ids:
+            return
+        likes = models.Like.objects.filter(content=OuterRef('pk')).order_by().values('content').annotate(
+            total=Count('id')
+        ).values('total')
+        models.Content.objects.filter(id__in=content_ids).update(
+            like_count=Coalesce(Subquery(likes, output_field=IntegerField()), 0),
+            updated_at=timezone.now(),
+        )
+        invalidate(*(f'content:{content_id}' for content_id in content_ids))
@@ -0,0 +1,132 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.images import needs_processing
+from core.models import Content, ContentScore, Like, Tag, Topic, User
+from .cache import get_response_cache, response_cache_enabled
+from .tasks import fan_out_content, process_topic_image
+from .search import get_search_backend
+
+
+def setup_search_index(sender, **kwargs):
+    if sender.label == 'core':
+        get_search_backend().setup()
+
+
+def invalidate(*groups):
+    # Again on commit, a read that started before the commit may still be
+    # building its response from the old rows.
+    if response_cache_enabled():
+        get_response_cache().invalidate(groups)
+        transaction.on_commit(lambda: get_response_cache().invalidate(groups))
+
+
+@receiver(post_save, sender=Content)
+def index_content(sender, instance, **kwargs):
+    get_search_backend().index(instance)
+
+
+@receiver(post_delete, sender=Content)
+def remove_content_from_index(sender, instance, **kwargs):
+    get_search_backend().remove(instance.pk)
+
+
+@receiver(post_save, sender=Content)
+def invalidate_saved_content(sender, instance, **kwargs):
+    # The content may have just joined the full list and its topic and tag
+    # lists; lists it was already part of depend on `content:<id>`.
+    if not response_cache_enabled():
+        return
+    topics = Topic.objects.filter(id=instance.topic_id).values_list('title', flat=True)
+    tags = instance.tags.values_list('title', flat=True)
+    invalidate(
+        f'content:{instance.pk}',
+        'list:contents',
+        *(f'list:topic:{title}' for title in topics),
+        *(f'list:tag:{title}' for title in tags),
+    )
+
+
+@receiver(post_save, sender=Content)
+def drop_unpublished_score(sender, instance, **kwargs):
+    # The trending feed reads the score table alone, keep drafts out of it.
+    if not instance.publish and ContentScore.objects.filter(content_id=instance.pk).delete()[0]:
+        invalidate('list:trending')
+
+
+@receiver(pre_save, sender=Content)
+def remember_publish_state(sender, instance, **kwargs):
+    instance._newly_published = instance.publish and not (
+        instance.pk and Content.objects.filter(pk=instance.pk, publish=True).exists()
+    )
+
+
+@receiver(post_save, sender=Content)
+def fan_out_published_content(sender, instance, **kwargs):
+    if getattr(instance, '_newly_published', False):
+        instance._newly_published = False
+        fan_out_content.delay(instance.pk, idempotency_key=f'fan-out:{instance.pk}:{instance.updated_at.timestamp()}')
+
+
+@receiver(post_delete, sender=Content)
+def invalidate_deleted_content(sender, instance, **kwargs):
+    invalidate(f'content:{instance.pk}')
+
+
+@receiver(m2m_changed, sender=Content.tags.through)
+def invalidate_content_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear') or not response_cache_enabled():
+        return
+    if reverse:
+        groups = {f'tag:{instance.pk}', f'list:tag:{instance.title}'}
+        groups.update(f'content:{pk}' for pk in pk_set or ())
+    else:
+        groups = {f'content:{instance.pk}'}
+        if action == 'post_add':
+            titles = Tag.objects.filter(pk__in=pk_set).values_list('title', flat=True)
+            groups.update(f'list:tag:{title}' for title in titles)
+    invalidate(*groups)
+
+
+@receiver(m2m_changed, sender=Content.tags.through)
+def touch_content_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    # Tags are part of the content representation, keep its ETag honest.
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        Content.objects.filter(pk=instance.pk).update(updated_at=timezone.now())
+    elif pk_set:
+        Content.objects.filter(pk__in=pk_set).update(updated_at=timezone.now())
+    elif action == 'post_clear':
+        instance.content_set.update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Like)
+@receiver(post_delete, sender=Like)
+def invalidate_liked_content(sender, instance, **kwargs):
+    invalidate(f'content:{instance.content_id}')
+
+
+@receiver(post_save, sender=Tag)
+def invalidate_saved_tag(sender, instance, **kwargs):
+    invalidate(f'tag:{instance.pk}', f'list:tag:{instance.title}')
+
+
+@receiver(post_save, sender=Topic)
+def invalidate_saved_topic(sender, instance, **kwargs):
+    invalidate(f'topic:{instance.pk}', f'list:topic:{instance.title}')
+
+
+@receiver(post_save, sender=Topic)
+def queue_topic_image_processing(sender, instance, **kwargs):
+    if needs_processing(instance, 'image', 'image_renditions'):
+        process_topic_image.delay(instance.pk, instance.image.name)
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Topic)
+@receiver(post_save, sender=User)
+def invalidate_row(sender, instance, **kwargs):
+    invalidate(f'{sender.__name__.lower()}:{instance.pk}')
@@ -0,0 +1,41 @@
+from core.models import Bookmark, Like
+
+
+class SocialState:
+    """
+    Which of a set of contents the current user liked and bookmarked
+    """
+    def __init__(self):
+        self.loaded = set()
+        self.liked = set()
+        self.bookmarked = set()
+
+    def load(self, user, content_ids, bookmarked=None):
+        """
+        One `IN (...)` query per relation for every id not loaded yet.
+        Pass `bookmarked` when the caller already knows the user's bookmarks.
+        """
+        content_ids = set(content_ids) - self.loaded
+        if not content_ids:
+            return
+        self.loaded.update(content_ids)
+        if user is None or not user.is_authenticated:
+            return
+        self.liked.update(
+            Like.objects.filter(user=user, content_id__in=content_ids).values_list('content_id', flat=True)
+        )
+        if bookmarked is None:
+            bookmarked = Bookmark.objects.filter(
+                user=user, content_id__in=content_ids
+            ).values_list('content_id', flat=True)
+        self.bookmarked.update(bookmarked)
+
+
+def get_social_state(context):
+    """
+    State shared by every serializer rendering the same response
+    """
+    state = context.get('social_state')
+    if state is None:
+        state = context['social_state'] = SocialState()
+    return state
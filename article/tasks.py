@@ -0,0 +1,21 @@
+from core.images import process_image_field
+from core.models import Follow, Topic
+from core.tasks import task
+from . import feed
+
+
+@task(max_attempts=5)
+def fan_out_content(content_id):
+    feed.fan_out(content_id)
+
+
+@task
+def backfill_follow(follow_id):
+    follow = Follow.objects.select_related('author').filter(pk=follow_id).first()
+    if follow is not None:
+        feed.backfill(follow)
+
+
+@task
+def process_topic_image(topic_id, name):
+    process_image_field(Topic, topic_id, 'image', 'image_renditions', name)
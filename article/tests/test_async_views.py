@@ -0,0 +1,71 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TransactionTestCase
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from article.cache import get_response_cache
+from core.models import Comment, Content, Tag, Topic
+
+
+class AsyncReadEndpointTests(TransactionTestCase):
+    """
+    Async read endpoints answer like their sync counterparts
+    """
+    def setUp(self):
+        get_response_cache().clear()
+        self.user = get_user_model().objects.create_user(email='user@email.com', password='test132456', username='user')
+        self.topic = Topic.objects.create(title='python')
+        self.tag = Tag.objects.create(title='django')
+        self.content = Content.objects.create(author=self.user, topic=self.topic, title='title', body='body', publish=True)
+        self.content.tags.add(self.tag)
+        Content.objects.create(author=self.user, topic=self.topic, title='draft', body='body', publish=False)
+        Comment.objects.create(author=self.user, content=self.content, body='comment')
+        self.auth = {'authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+
+    async def assert_same(self, sync_url, async_url, **headers):
+        expected = await self.async_client.get(sync_url, **headers)
+        res = await self.async_client.get(async_url, **headers)
+
+        self.assertEqual(res.status_code, expected.status_code)
+        self.assertEqual(json.loads(res.content), json.loads(expected.content))
+        return res
+
+    async def test_content_list_and_detail(self):
+        """
+        Test the async content list and detail match the sync ones
+        """
+        res = await self.assert_same(reverse('all-content-list'), reverse('async-content-list'))
+        self.assertEqual([item['id'] for item in json.loads(res.content)], [self.content.id])
+
+        await self.assert_same(
+            reverse('all-content-detail', args=[self.content.id]),
+            reverse('async-content-detail', args=[self.content.id]),
+        )
+
+    async def test_tag_and_topic_lists(self):
+        """
+        Test the async tag and topic filters match the sync ones
+        """
+        await self.assert_same(reverse('content-tag', args=['django']), reverse('async-content-tag', args=['django']))
+        await self.assert_same(reverse('content-topic', args=['python']), reverse('async-content-topic', args=['python']))
+
+    async def test_comment_list_authenticated(self):
+        """
+        Test the async comment list authenticates like the sync one
+        """
+        url = reverse('async-comment-list', args=[self.content.id])
+        self.assertEqual((await self.async_client.get(url)).status_code, 401)
+
+        res = await self.assert_same(reverse('comment-list', args=[self.content.id]), url, **self.auth)
+        self.assertEqual(res.status_code, 200)
+
+    async def test_missing_content(self):
+        """
+        Test errors are rendered by the async views too
+        """
+        res = await self.async_client.get(reverse('async-content-detail', args=[self.content.id + 100]))
+
+        self.assertEqual(res.status_code, 404)
+        self.assertIn('detail', json.loads(res.content))
@@ -0,0 +1,96 @@
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from core.models import Bookmark, Content, Like, Tag, Topic
+
+TAG_BULK_URL = reverse('tag-bulk')
+BOOKMARK_BULK_URL = reverse('bookmark-bulk')
+LIKE_BULK_URL = reverse('like-bulk')
+
+
+class BulkApiTests(TestCase):
+    """
+    Batch endpoints for tags, bookmarks and likes
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='bulk@email.com', password='test132456', username='bulk')
+        self.client.force_authenticate(self.user)
+        topic = Topic.objects.create(title='python')
+        self.contents = [
+            Content.objects.create(author=self.user, topic=topic, title=f'title {i}', body='body', publish=True)
+            for i in range(3)
+        ]
+        self.draft = Content.objects.create(author=self.user, topic=topic, title='draft', body='body')
+
+    def test_bulk_tags(self):
+        """
+        Test creating tags in bulk reports existing titles
+        """
+        Tag.objects.create(title='django')
+
+        # savepoint, lookup, insert, release
+        with self.assertNumQueries(4):
+            res = self.client.post(TAG_BULK_URL, {'titles': ['django', 'drf', 'orm', 'drf']}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['results'], [
+            {'title': 'django', 'status': 'exists'},
+            {'title': 'drf', 'status': 'created'},
+            {'title': 'orm', 'status': 'created'},
+        ])
+        self.assertEqual(Tag.objects.count(), 3)
+
+    def test_bulk_tags_invalid_item(self):
+        """
+        Test an invalid title rejects the whole batch
+        """
+        res = self.client.post(TAG_BULK_URL, {'titles': ['ok', 'x' * 101]}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(1, res.data['titles'])
+        self.assertFalse(Tag.objects.exists())
+
+    def test_bulk_bookmarks(self):
+        """
+        Test bookmarking many contents with a constant number of queries
+        """
+        Bookmark.objects.create(user=self.user, content=self.contents[0])
+        ids = [content.id for content in self.contents] + [self.draft.id, 9999]
+
+        # savepoint, two lookups, insert, release
+        with self.assertNumQueries(5):
+            res = self.client.post(BOOKMARK_BULK_URL, {'contents': ids}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([item['status'] for item in res.data['results']], [
+            'exists', 'created', 'created', 'not_found', 'not_found'
+        ])
+        self.assertEqual(Bookmark.objects.filter(user=self.user).count(), 3)
+
+    def test_bulk_likes_update_counters(self):
+        """
+        Test liking many contents keeps their like counters right
+        """
+        self.client.post(reverse('like', args=[self.contents[0].id]))
+        ids = [content.id for content in self.contents]
+
+        res = self.client.post(LIKE_BULK_URL, {'contents': ids}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([item['status'] for item in res.data['results']], ['exists', 'created', 'created'])
+        self.assertEqual(Like.objects.filter(user=self.user).count(), 3)
+        counts = Content.objects.filter(id__in=ids).values_list('like_count', flat=True)
+        self.assertEqual(list(counts), [1, 1, 1])
+
+    def test_bulk_requires_authentication(self):
+        """
+        Test bulk endpoints reject anonymous users
+        """
+        self.client.force_authenticate(None)
+        for url in (TAG_BULK_URL, BOOKMARK_BULK_URL, LIKE_BULK_URL):
+            res = self.client.post(url, {}, format='json')
+            self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
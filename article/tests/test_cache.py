@@ -0,0 +1,196 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from article.cache import CachedResponseMixin, DjangoCacheBackend, LocMemLRUCache, get_response_cache
+from core.models import Content, Like, Tag, Topic
+
+CONTENT_LIST_URL = reverse('all-content-list')
+
+
+def content_detail_url(content_id):
+    return reverse('all-content-detail', args=[content_id])
+
+
+class ResponseCacheApiTests(TestCase):
+    """
+    Anonymous content reads are cached and invalidated by writes
+    """
+    def setUp(self):
+        get_response_cache().clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='cache@email.com', password='test132456', username='cache')
+        self.topic = Topic.objects.create(title='python')
+        self.tag = Tag.objects.create(title='django')
+        self.content = self.create_content('first')
+
+    def create_content(self, title, topic=None):
+        content = Content.objects.create(author=self.user, topic=topic or self.topic, title=title, body='body', publish=True)
+        content.tags.add(self.tag)
+        return content
+
+    def assert_cached(self, url, expected):
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['X-Cache'], expected)
+        return res
+
+    def test_second_read_is_a_hit_without_queries(self):
+        """
+        Test a repeated anonymous read is served without touching the database
+        """
+        self.assert_cached(CONTENT_LIST_URL, 'MISS')
+        with self.assertNumQueries(0):
+            res = self.assert_cached(CONTENT_LIST_URL, 'HIT')
+        self.assertEqual(len(res.data), 1)
+
+    def test_authenticated_reads_bypass_cache(self):
+        """
+        Test authenticated requests never read or fill the cache
+        """
+        self.client.force_authenticate(self.user)
+        res = self.client.get(CONTENT_LIST_URL)
+        self.assertNotIn('X-Cache', res)
+
+    def test_like_invalidates_detail_and_lists(self):
+        """
+        Test liking a content invalidates every entry showing it
+        """
+        other = self.create_content('other', topic=Topic.objects.create(title='go'))
+        tag_url = reverse('content-tag', args=['django'])
+        for url in (CONTENT_LIST_URL, content_detail_url(self.content.id), content_detail_url(other.id), tag_url):
+            self.assert_cached(url, 'MISS')
+
+        Like.objects.create(user=self.user, content=self.content, liked=True)
+
+        self.assert_cached(CONTENT_LIST_URL, 'MISS')
+        self.assert_cached(content_detail_url(self.content.id), 'MISS')
+        self.assert_cached(tag_url, 'MISS')
+        self.assert_cached(content_detail_url(other.id), 'HIT')
+
+    def test_new_content_invalidates_its_topic_list_only(self):
+        """
+        Test a new content only invalidates lists it joins
+        """
+        go = Topic.objects.create(title='go')
+        python_url = reverse('content-topic', args=['python'])
+        go_url = reverse('content-topic', args=['go'])
+        self.assert_cached(python_url, 'MISS')
+        self.assert_cached(go_url, 'MISS')
+
+        self.create_content('second')
+
+        res = self.assert_cached(python_url, 'MISS')
+        self.assertEqual(len(res.data), 2)
+        self.assert_cached(go_url, 'HIT')
+        self.assertEqual(go.content_set.count(), 0)
+
+    def test_tag_rename_invalidates_details(self):
+        """
+        Test renaming a tag invalidates contents rendering it
+        """
+        self.assert_cached(content_detail_url(self.content.id), 'MISS')
+
+        self.tag.title = 'flask'
+        self.tag.save()
+
+        res = self.assert_cached(content_detail_url(self.content.id), 'MISS')
+        self.assertEqual(res.data['tags'], [{'title': 'flask'}])
+
+    def test_tag_removed_invalidates_tag_list(self):
+        """
+        Test removing a tag from a content drops it from the tag list
+        """
+        url = reverse('content-tag', args=['django'])
+        self.assert_cached(url, 'MISS')
+
+        self.content.tags.remove(self.tag)
+
+        res = self.assert_cached(url, 'MISS')
+        self.assertEqual(res.data, [])
+
+    def test_write_during_read_not_cached(self):
+        """
+        Test a response built before a concurrent write is not stored under the new versions
+        """
+        url = content_detail_url(self.content.id)
+        get_cache_groups = CachedResponseMixin.get_cache_groups
+
+        def edit_after_query(view, instance, many):
+            self.content.title = 'edited'
+            self.content.save()
+            return get_cache_groups(view, instance, many)
+
+        with mock.patch.object(CachedResponseMixin, 'get_cache_groups', edit_after_query):
+            res = self.assert_cached(url, 'MISS')
+        self.assertEqual(res.data['title'], 'first')
+
+        res = self.assert_cached(url, 'MISS')
+        self.assertEqual(res.data['title'], 'edited')
+        self.assert_cached(url, 'HIT')
+
+    def test_cache_stats_admin_only(self):
+        """
+        Test counters are exposed to staff users only
+        """
+        url = reverse('cache-stats')
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('hits', res.data)
+
+
+class ResponseCacheBackendTests(TestCase):
+    """
+    Storage backends of the response cache
+    """
+    def test_lru_evicts_least_recently_used(self):
+        """
+        Test the local backend keeps at most max_entries responses
+        """
+        cache = LocMemLRUCache(max_entries=2)
+        cache.set('a', 1, ['g'])
+        cache.set('b', 2, ['g'])
+        cache.get('a')
+        cache.set('c', 3, ['g'])
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.evictions, 1)
+
+    def test_set_skipped_after_write_since_snapshot(self):
+        """
+        Test an entry is not stored when a write happened since the snapshot
+        """
+        cache = LocMemLRUCache()
+        snapshot = cache.snapshot()
+        cache.invalidate(['content:2'])
+
+        self.assertFalse(cache.set('key', 1, ['content:1'], snapshot))
+        self.assertIsNone(cache.get('key'))
+        self.assertTrue(cache.set('key', 1, ['content:1'], cache.snapshot()))
+        self.assertEqual(cache.get('key'), 1)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_django_cache_backend_invalidation(self):
+        """
+        Test the shared backend drops entries whose groups were bumped
+        """
+        cache = DjangoCacheBackend(alias='default')
+        cache.set('key', {'id': 1}, ['content:1', 'list:contents'])
+        self.assertEqual(cache.get('key'), {'id': 1})
+
+        cache.invalidate(['content:2'])
+        self.assertEqual(cache.get('key'), {'id': 1})
+
+        cache.invalidate(['content:1'])
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
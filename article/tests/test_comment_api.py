@@ -0,0 +1,55 @@
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from core.models import Comment, Content, Topic
+
+
+def comment_list_url(content_id):
+    return reverse('comment-list', kwargs={'content_id': content_id})
+
+
+class CommentPostApiTests(TestCase):
+    """
+    Posting comments and replies
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='post@email.com', password='test132456', username='post')
+        self.client.force_authenticate(self.user)
+        topic = Topic.objects.create(title='python')
+        self.content = Content.objects.create(author=self.user, topic=topic, title='title', body='body', publish=True)
+        self.other = Content.objects.create(author=self.user, topic=topic, title='other', body='body', publish=True)
+
+    def test_reply_queries_do_not_grow_with_comments(self):
+        """
+        Test posting a reply costs the same with many existing comments
+        """
+        root = Comment.objects.create(author=self.user, content=self.content, body='root')
+        Comment.objects.bulk_create(Comment(author=self.user, content=self.content, body='c') for _ in range(500))
+
+        # content, reply, insert
+        with self.assertNumQueries(3):
+            res = self.client.post(comment_list_url(self.content.id), {'body': 'reply', 'reply': root.id})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Comment.objects.get(id=res.data['id']).reply, root)
+
+    def test_reply_to_comment_of_other_content(self):
+        """
+        Test replying to a comment of another content is rejected
+        """
+        foreign = Comment.objects.create(author=self.user, content=self.other, body='foreign')
+
+        res = self.client.post(comment_list_url(self.content.id), {'body': 'reply', 'reply': foreign.id})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_comment_on_missing_content(self):
+        """
+        Test commenting on a content that does not exist returns 404
+        """
+        res = self.client.post(comment_list_url(9999), {'body': 'hello'})
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
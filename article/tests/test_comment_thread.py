@@ -0,0 +1,116 @@
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from article.threads import load_comment_threads
+from core.models import Comment, Content, Topic
+
+
+class CommentThreadApiTests(TestCase):
+    """
+    Threaded comment retrieval
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='thread@email.com', password='test132456', username='thread')
+        self.client.force_authenticate(self.user)
+        topic = Topic.objects.create(title='python')
+        self.content = Content.objects.create(author=self.user, topic=topic, title='title', body='body', publish=True)
+        self.url = reverse('comment-thread', kwargs={'content_id': self.content.id})
+
+    def comment(self, body, reply=None):
+        return Comment.objects.create(author=self.user, content=self.content, body=body, reply=reply)
+
+    def test_thread_nests_replies(self):
+        """
+        Test replies are nested under the comment they answer
+        """
+        root = self.comment('root')
+        child = self.comment('child', reply=root)
+        self.comment('grandchild', reply=child)
+        self.comment('second root')
+
+        res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        first, second = res.data['results']
+        self.assertEqual(first['body'], 'root')
+        self.assertEqual(first['replies'][0]['body'], 'child')
+        self.assertEqual(first['replies'][0]['replies'][0]['body'], 'grandchild')
+        self.assertEqual(first['replies'][0]['author']['email'], 'thread@email.com')
+        self.assertEqual(second['replies'], [])
+
+    def test_thread_constant_queries(self):
+        """
+        Test a deep and wide tree loads in two queries
+        """
+        for _ in range(3):
+            parent = self.comment('root')
+            for level in range(4):
+                for _ in range(3):
+                    reply = self.comment(f'level {level}', reply=parent)
+                parent = reply
+
+        with self.assertNumQueries(2):
+            res = self.client.get(self.url)
+        self.assertEqual(len(res.data['results']), 3)
+
+    def test_thread_depth_and_width_limits(self):
+        """
+        Test replies beyond depth are cut and extra siblings are counted
+        """
+        root = self.comment('root')
+        for i in range(4):
+            child = self.comment(f'child {i}', reply=root)
+        self.comment('grandchild', reply=child)
+
+        res = self.client.get(self.url, {'depth': 1, 'width': 2})
+
+        thread = res.data['results'][0]
+        self.assertEqual(len(thread['replies']), 2)
+        self.assertEqual(thread['more_replies'], 2)
+        self.assertEqual(thread['replies'][0]['replies'], [])
+
+    def test_thread_width_applied_in_query(self):
+        """
+        Test replies past the width are neither loaded nor serialized, only counted
+        """
+        root = self.comment('root')
+        children = [self.comment(f'child {i}', reply=root) for i in range(30)]
+        grandchildren = [self.comment(f'grandchild {i}', reply=children[0]) for i in range(10)]
+        self.comment('hidden grandchild', reply=children[-1])
+
+        _, replies, _, _ = load_comment_threads(self.content.id, depth=5, width=3)
+        self.assertEqual(
+            [reply.id for reply in replies],
+            [comment.id for comment in children[:3] + grandchildren[:3]]
+        )
+
+        res = self.client.get(self.url, {'width': 3})
+        thread = res.data['results'][0]
+        self.assertEqual(len(thread['replies']), 3)
+        self.assertEqual(thread['more_replies'], 27)
+        self.assertEqual(len(thread['replies'][0]['replies']), 3)
+        self.assertEqual(thread['replies'][0]['more_replies'], 7)
+
+    def test_thread_pages_top_level(self):
+        """
+        Test `next` pages through top level comments
+        """
+        roots = [self.comment(f'root {i}') for i in range(3)]
+
+        res = self.client.get(self.url, {'limit': 2})
+        self.assertEqual([t['id'] for t in res.data['results']], [roots[0].id, roots[1].id])
+
+        res = self.client.get(self.url, {'limit': 2, 'after': res.data['next']})
+        self.assertEqual([t['id'] for t in res.data['results']], [roots[2].id])
+        self.assertIsNone(res.data['next'])
+
+    def test_thread_invalid_params(self):
+        """
+        Test non integer parameters are rejected
+        """
+        res = self.client.get(self.url, {'depth': 'deep'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,179 @@
+from django.test import TestCase
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from article.cache import get_response_cache
+from core.models import Comment, Content, Tag, Topic
+
+CONTENT_LIST_URL = reverse('all-content-list')
+
+
+def content_detail_url(content_id):
+    return reverse('all-content-detail', args=[content_id])
+
+
+class ContentConditionalGetTests(TestCase):
+    """
+    ETag and Last-Modified on content reads
+    """
+    def setUp(self):
+        get_response_cache().clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='etag@email.com', password='test132456', username='etag')
+        self.topic = Topic.objects.create(title='python')
+        self.content = Content.objects.create(author=self.user, topic=self.topic, title='title', body='body', publish=True)
+
+    def test_list_sends_etag_only(self):
+        """
+        Test the content list carries an ETag but no Last-Modified header
+        """
+        res = self.client.get(CONTENT_LIST_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res['ETag'].startswith('"'))
+        self.assertNotIn('Last-Modified', res)
+
+    def test_list_if_modified_since_ignored(self):
+        """
+        Test If-Modified-Since on a list is answered in full, it can not see deletions
+        """
+        since = http_date(self.content.updated_at.timestamp() + 1)
+        res = self.client.get(CONTENT_LIST_URL, HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_cursor_page_validated_by_its_rows(self):
+        """
+        Test a cursor page answers 304 with one query and changes when a row leaves it
+        """
+        other = Content.objects.create(author=self.user, topic=self.topic, title='other', body='body', publish=True)
+        etag = self.client.get(CONTENT_LIST_URL, {'cursor': ''})['ETag']
+        get_response_cache().clear()
+
+        with self.assertNumQueries(1):
+            res = self.client.get(CONTENT_LIST_URL, {'cursor': ''}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        other.delete()
+        res = self.client.get(CONTENT_LIST_URL, {'cursor': ''}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in res.data['results']], [self.content.id])
+
+    def test_list_if_none_match_skips_serialization(self):
+        """
+        Test a matching ETag is answered with 304 after a single query
+        """
+        etag = self.client.get(CONTENT_LIST_URL)['ETag']
+        get_response_cache().clear()
+
+        with self.assertNumQueries(1):
+            res = self.client.get(CONTENT_LIST_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+        self.assertFalse(res.content)
+
+    def test_cached_list_if_none_match_without_queries(self):
+        """
+        Test a cached response answers 304 without touching the database
+        """
+        etag = self.client.get(CONTENT_LIST_URL)['ETag']
+
+        with self.assertNumQueries(0):
+            res = self.client.get(CONTENT_LIST_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_like_changes_etag(self):
+        """
+        Test liking a content changes both the list and the detail ETag
+        """
+        list_etag = self.client.get(CONTENT_LIST_URL)['ETag']
+        detail_etag = self.client.get(content_detail_url(self.content.id))['ETag']
+
+        self.client.force_authenticate(self.user)
+        self.client.post(reverse('like', args=[self.content.id]))
+        self.client.force_authenticate(None)
+
+        res = self.client.get(CONTENT_LIST_URL, HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.get(content_detail_url(self.content.id), HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['likes'], 1)
+
+    def test_tag_change_changes_etag(self):
+        """
+        Test adding a tag to a content changes its detail ETag
+        """
+        etag = self.client.get(content_detail_url(self.content.id))['ETag']
+
+        self.content.tags.add(Tag.objects.create(title='django'))
+
+        res = self.client.get(content_detail_url(self.content.id), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_detail_if_modified_since(self):
+        """
+        Test If-Modified-Since is honoured on retrieve
+        """
+        url = content_detail_url(self.content.id)
+        since = http_date(self.content.updated_at.timestamp() + 1)
+
+        res = self.client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        since = http_date(self.content.updated_at.timestamp() - 60)
+        res = self.client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_search_list_validators(self):
+        """
+        Test searched lists get their own ETag
+        """
+        plain = self.client.get(CONTENT_LIST_URL)['ETag']
+        res = self.client.get(CONTENT_LIST_URL, {'search': 'title'})
+
+        self.assertEqual(len(res.data), 1)
+        self.assertNotEqual(res['ETag'], plain)
+
+
+class CommentConditionalGetTests(TestCase):
+    """
+    ETag and Last-Modified on comment reads
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='comment@email.com', password='test132456', username='comment')
+        self.client.force_authenticate(self.user)
+        topic = Topic.objects.create(title='python')
+        self.content = Content.objects.create(author=self.user, topic=topic, title='title', body='body', publish=True)
+        self.comment = Comment.objects.create(author=self.user, content=self.content, body='comment')
+        self.url = reverse('comment-list', kwargs={'content_id': self.content.id})
+
+    def test_comment_list_not_modified(self):
+        """
+        Test the comment list answers 304 until a new comment is posted
+        """
+        etag = self.client.get(self.url)['ETag']
+
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Comment.objects.create(author=self.user, content=self.content, body='another')
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_comment_detail_not_modified(self):
+        """
+        Test a comment answers 304 until it is edited
+        """
+        url = reverse('comment-detail', kwargs={'content_id': self.content.id, 'pk': self.comment.id})
+        etag = self.client.get(url)['ETag']
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.patch(url, {'body': 'edited'})
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -0,0 +1,134 @@
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from core.models import Bookmark, Comment, Content, Tag, Topic
+
+CONTENT_LIST_URL = reverse('all-content-list')
+BOOKMARK_LIST_URL = reverse('bookmark-list')
+PAGE_SIZES = (10, 100, 1000)
+
+
+def content_detail_url(content_id):
+    return reverse('all-content-detail', args=[content_id])
+
+
+def profile_content_url(user_id):
+    return reverse('content-profile-list', kwargs={'user_id': user_id})
+
+
+def comment_list_url(content_id):
+    return reverse('comment-list', kwargs={'content_id': content_id})
+
+
+def create_contents(author, topic, tags, count):
+    """
+    Bulk create published contents each tagged with every tag
+    """
+    Content.objects.bulk_create(
+        Content(author=author, topic=topic, title=f'title {i}', body='body', publish=True)
+        for i in range(count)
+    )
+    contents = list(Content.objects.order_by('-id')[:count])
+    Through = Content.tags.through
+    Through.objects.bulk_create(
+        Through(content_id=content.id, tag_id=tag.id)
+        for content in contents for tag in tags
+    )
+    return contents
+
+
+class ContentQueryCountTests(TestCase):
+    """
+    List and retrieve endpoints run a constant number of queries
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='author@email.com', password='test132456', username='author')
+        self.client.force_authenticate(self.user)
+        self.topic = Topic.objects.create(title='python')
+        self.tags = [Tag.objects.create(title='django'), Tag.objects.create(title='drf')]
+
+    def assert_constant_queries(self, url, num, build=None):
+        created = 0
+        for size in PAGE_SIZES:
+            contents = create_contents(self.user, self.topic, self.tags, size - created)
+            created = size
+            if build is not None:
+                build(contents)
+            with self.assertNumQueries(num):
+                res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(res.data), size)
+
+    def test_content_list_queries(self):
+        """
+        Test listing contents costs the same for 10, 100 and 1000 rows
+        """
+        self.assert_constant_queries(CONTENT_LIST_URL, 3 + 2)  # + likes and bookmarks of the page
+
+    def test_content_profile_list_queries(self):
+        """
+        Test listing a user's contents costs the same for any row count
+        """
+        self.assert_constant_queries(profile_content_url(self.user.id), 2 + 2)
+
+    def test_content_tag_filter_queries(self):
+        """
+        Test filtering contents by tag costs the same for any row count
+        """
+        self.assert_constant_queries(reverse('content-tag', args=['django']), 2 + 2)
+
+    def test_content_topic_filter_queries(self):
+        """
+        Test filtering contents by topic costs the same for any row count
+        """
+        self.assert_constant_queries(reverse('content-topic', args=['python']), 2 + 2)
+
+    def test_bookmark_list_queries(self):
+        """
+        Test listing bookmarks costs the same for any row count
+        """
+        def bookmark(contents):
+            Bookmark.objects.bulk_create(Bookmark(user=self.user, content=content) for content in contents)
+
+        self.assert_constant_queries(BOOKMARK_LIST_URL, 2 + 1, build=bookmark)  # + likes only
+
+    def test_comment_list_queries(self):
+        """
+        Test listing comments costs the same for any row count
+        """
+        content = create_contents(self.user, self.topic, self.tags, 1)[0]
+        created = 0
+        for size in PAGE_SIZES:
+            Comment.objects.bulk_create(
+                Comment(author=self.user, content=content, body='comment')
+                for _ in range(size - created)
+            )
+            created = size
+            with self.assertNumQueries(3):
+                res = self.client.get(comment_list_url(content.id))
+            self.assertEqual(len(res.data), size)
+
+    def test_content_retrieve_queries(self):
+        """
+        Test retrieving a content loads author, topic and tags up front
+        """
+        content = create_contents(self.user, self.topic, self.tags, 1)[0]
+        with self.assertNumQueries(2 + 2):
+            res = self.client.get(content_detail_url(content.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['topic']['title'], 'python')
+        self.assertEqual(len(res.data['tags']), 2)
+
+    def test_content_topic_filter_unknown_topic(self):
+        """
+        Test filtering by a topic that does not exist returns an empty list
+        """
+        res = self.client.get(reverse('content-topic', args=['missing']))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [])
@@ -0,0 +1,82 @@
+import json
+from io import StringIO
+from django.test import TestCase
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from article.export import iter_published_content
+from core.models import Content, Tag, Topic
+
+CONTENT_EXPORT_URL = reverse('content-export')
+
+
+class ContentExportTests(TestCase):
+    """
+    NDJSON export of published contents
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='export@email.com', password='test132456', username='export', is_staff=True)
+        self.client.force_authenticate(self.user)
+        topic = Topic.objects.create(title='python')
+        tags = [Tag.objects.create(title='orm'), Tag.objects.create(title='django')]
+        self.contents = []
+        for i in range(5):
+            content = Content.objects.create(author=self.user, topic=topic, title=f'title {i}', body='body', publish=True)
+            content.tags.set(tags)
+            self.contents.append(content)
+        Content.objects.create(author=self.user, topic=topic, title='draft', body='body')
+
+    def read(self, res):
+        body = b''.join(res.streaming_content).decode()
+        return [json.loads(line) for line in body.splitlines()]
+
+    def test_export_streams_published_contents(self):
+        """
+        Test the export streams every published content with its relations
+        """
+        res = self.client.get(CONTENT_EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        rows = self.read(res)
+        self.assertEqual([row['id'] for row in rows], [content.id for content in self.contents])
+        self.assertEqual(rows[0]['tags'], ['django', 'orm'])
+        self.assertEqual(rows[0]['topic']['title'], 'python')
+        self.assertEqual(rows[0]['likes'], 0)
+
+    def test_export_resumes_after_id(self):
+        """
+        Test `after` skips contents that were already exported
+        """
+        res = self.client.get(CONTENT_EXPORT_URL, {'after': self.contents[2].id})
+        self.assertEqual([row['id'] for row in self.read(res)], [c.id for c in self.contents[3:]])
+
+    def test_export_queries_per_chunk(self):
+        """
+        Test each chunk costs two queries whatever its size
+        """
+        with self.assertNumQueries(2 * 3 + 1):
+            rows = list(iter_published_content(chunk_size=2))
+        self.assertEqual(len(rows), 5)
+
+    def test_export_admin_only(self):
+        """
+        Test non staff users can not export
+        """
+        self.user.is_staff = False
+        self.user.save()
+        res = self.client.get(CONTENT_EXPORT_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_export_content_command(self):
+        """
+        Test the management command writes the same lines
+        """
+        out = StringIO()
+        call_command('export_content', stdout=out, stderr=StringIO())
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(rows), 5)
@@ -0,0 +1,269 @@
+from unittest import mock
+
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from article.feed import fan_out
+from article.serializer import FollowSerializer
+from core.models import Content, Follow, Tag, TimelineEntry, Topic
+
+FEED_URL = reverse('feed')
+FOLLOW_URL = reverse('follow-list')
+FEED = {
+    'TIMELINE_LENGTH': 5,
+    'CELEBRITY_FOLLOWERS': 3,
+    'BACKFILL': 2,
+    'BATCH_SIZE': 2,
+}
+TASK_QUEUE = {'BROKER': 'core.tasks.ImmediateBroker'}
+
+
+def create_user(name):
+    return get_user_model().objects.create_user(email=f'{name}@email.com', password='test132456', username=name)
+
+
+@override_settings(FEED=FEED, TASK_QUEUE=TASK_QUEUE)
+class FeedTests(TestCase):
+    """
+    Follows and the fan-out home feed
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user('reader')
+        self.author = create_user('author')
+        self.client.force_authenticate(self.user)
+        self.topic = Topic.objects.create(title='python')
+        self.other_topic = Topic.objects.create(title='go')
+        self.tag = Tag.objects.create(title='django')
+
+    def follow(self, **target):
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(FOLLOW_URL, {name: value.id for name, value in target.items()})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return res
+
+    def publish(self, author=None, topic=None, tags=(), publish=True):
+        with self.captureOnCommitCallbacks(execute=True):
+            content = Content.objects.create(
+                author=author or self.author, topic=topic or self.other_topic,
+                title='title', body='body', publish=publish
+            )
+            content.tags.set(tags)
+        return content
+
+    def feed_ids(self, **params):
+        res = self.client.get(FEED_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [item['id'] for item in res.data['results']], res.data['next']
+
+    def test_fan_out_to_followers(self):
+        """
+        Test publishing pushes the content to author, topic and tag followers
+        """
+        self.follow(author=self.author)
+        by_author = self.publish()
+        self.follow(topic=self.topic)
+        by_topic = self.publish(author=create_user('other'), topic=self.topic)
+        self.follow(tag=self.tag)
+        by_tag = self.publish(author=create_user('third'), tags=[self.tag])
+        self.publish(author=create_user('stranger'))
+
+        self.assertEqual(self.feed_ids()[0], [by_tag.id, by_topic.id, by_author.id])
+
+    def test_fan_out_on_publish_only(self):
+        """
+        Test drafts wait for publishing and edits do not push again
+        """
+        self.follow(author=self.author)
+        content = self.publish(publish=False)
+        self.assertFalse(TimelineEntry.objects.exists())
+
+        content.publish = True
+        with self.captureOnCommitCallbacks(execute=True):
+            content.save()
+        self.assertEqual(TimelineEntry.objects.count(), 1)
+
+        TimelineEntry.objects.all().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            content.save()
+        self.assertFalse(TimelineEntry.objects.exists())
+
+    def test_celebrity_pulled_at_read(self):
+        """
+        Test popular authors are not fanned out but still show in the feed
+        """
+        for name in ('fan1', 'fan2'):
+            Follow.objects.create(user=create_user(name), author=self.author)
+        self.author.follower_count = 2
+        self.author.save()
+        self.follow(author=self.author)
+        self.follow(topic=self.topic)
+
+        pulled = self.publish()
+        pushed = self.publish(author=create_user('other'), topic=self.topic)
+        both = self.publish(topic=self.topic)
+
+        self.assertEqual(fan_out(pulled.id), 0)
+        self.assertFalse(TimelineEntry.objects.filter(content=pulled).exists())
+        self.assertEqual(self.feed_ids()[0], [both.id, pushed.id, pulled.id])
+
+    def test_timeline_trimmed(self):
+        """
+        Test timelines keep only the newest TIMELINE_LENGTH entries
+        """
+        self.follow(author=self.author)
+        contents = [self.publish() for _ in range(8)]
+
+        kept = TimelineEntry.objects.filter(user=self.user).order_by('-content').values_list('content', flat=True)
+        self.assertEqual(list(kept), [content.id for content in reversed(contents)][:5])
+
+    def test_feed_pages_merge_sources(self):
+        """
+        Test paging with `before` visits pushed and pulled contents once each
+        """
+        self.author.follower_count = 3
+        self.author.save()
+        self.follow(author=self.author)
+        self.follow(topic=self.topic)
+        other = create_user('other')
+        contents = [
+            self.publish(author=self.author if i % 3 == 0 else other, topic=self.topic if i % 3 else self.other_topic)
+            for i in range(5)
+        ]
+        self.publish(author=other, topic=self.topic, publish=False)
+
+        seen, before = [], None
+        while True:
+            ids, before = self.feed_ids(limit=2, **({'before': before} if before else {}))
+            seen += ids
+            if before is None:
+                break
+        self.assertEqual(seen, [content.id for content in reversed(contents)])
+
+    def test_feed_hides_unpublished(self):
+        """
+        Test contents unpublished after the fan-out leave the feed
+        """
+        self.follow(author=self.author)
+        content = self.publish()
+        Content.objects.filter(id=content.id).update(publish=False)
+
+        self.assertEqual(self.feed_ids()[0], [])
+
+    def test_follow_backfills(self):
+        """
+        Test following seeds the timeline with the latest contents
+        """
+        contents = [self.publish(topic=self.topic) for _ in range(3)]
+        self.follow(topic=self.topic)
+
+        self.assertEqual(self.feed_ids()[0], [contents[2].id, contents[1].id])
+
+    def test_follow_validation(self):
+        """
+        Test a follow needs exactly one new target that is not yourself
+        """
+        self.follow(tag=self.tag)
+        for data in ({}, {'tag': self.tag.id}, {'topic': self.topic.id, 'tag': self.tag.id}, {'author': self.user.id}):
+            res = self.client.post(FOLLOW_URL, data)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST, data)
+
+    def test_unfollow_updates_follower_count(self):
+        """
+        Test following and unfollowing an author moves its follower count
+        """
+        res = self.follow(author=self.author)
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.follower_count, 1)
+
+        res = self.client.delete(reverse('follow-detail', args=[res.data['id']]))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.follower_count, 0)
+
+    def test_concurrent_follow_rejected(self):
+        """
+        Test a follow that passed validation alongside an existing one gets a 400
+        """
+        self.follow(author=self.author)
+        # As if the other request inserted between our check and our insert.
+        with mock.patch.object(FollowSerializer, 'validate', lambda serializer, attrs: attrs):
+            res = self.client.post(FOLLOW_URL, {'author': self.author.id})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Follow.objects.filter(user=self.user).count(), 1)
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.follower_count, 1)
+
+    def test_unfollow_drifted_counter_stays_at_zero(self):
+        """
+        Test unfollowing an author whose follower count drifted to zero
+        """
+        res = self.follow(author=self.author)
+        get_user_model().objects.filter(pk=self.author.pk).update(follower_count=0)
+
+        res = self.client.delete(reverse('follow-detail', args=[res.data['id']]))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.follower_count, 0)
+
+    def test_feed_queries(self):
+        """
+        Test a feed page costs the same whatever its size
+        """
+        self.follow(author=self.author)
+        for _ in range(5):
+            self.publish(tags=[self.tag])
+
+        # timeline range scan, celebrity lookup, tags, likes, bookmarks
+        with self.assertNumQueries(5):
+            res = self.client.get(FEED_URL)
+        self.assertEqual(len(res.data['results']), 5)
+
+    def test_feed_queries_with_celebrities(self):
+        """
+        Test following more celebrity authors adds no queries to a feed page
+        """
+        celebrities = [create_user(f'celebrity{i}') for i in range(3)]
+        for celebrity in celebrities:
+            celebrity.follower_count = 3
+            celebrity.save()
+            self.follow(author=celebrity)
+        contents = [self.publish(author=celebrity) for celebrity in celebrities for _ in range(2)]
+
+        # + one query pulling the contents of every celebrity
+        with self.assertNumQueries(5 + 1):
+            res = self.client.get(FEED_URL, {'limit': 4})
+        self.assertEqual([item['id'] for item in res.data['results']], [content.id for content in reversed(contents)][:4])
+
+
+@override_settings(FEED=FEED, TASK_QUEUE=TASK_QUEUE)
+class FanOutApiTests(TransactionTestCase):
+    """
+    Fan-out of contents published through the api, outside a test transaction
+    """
+    def test_fan_out_sees_tags(self):
+        """
+        Test a content published with tags reaches the tag followers
+        """
+        author = create_user('author')
+        reader = create_user('reader')
+        topic = Topic.objects.create(title='python')
+        tag = Tag.objects.create(title='django')
+        Follow.objects.create(user=reader, tag=tag)
+        client = APIClient()
+        client.force_authenticate(author)
+
+        res = client.post(reverse('content-profile-list', args=[author.id]), {
+            'title': 'title', 'body': 'body', 'topic': topic.id, 'tags': [tag.id], 'publish': True,
+        }, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            list(TimelineEntry.objects.filter(user=reader).values_list('content_id', flat=True)), [res.data['id']]
+        )
@@ -0,0 +1,124 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from django.test import TestCase, TransactionTestCase
+from django.core.management import call_command
+from django.core.serializers.json import DjangoJSONEncoder
+from django.contrib.auth import get_user_model
+
+from article.export import iter_published_content
+from article.importer import ContentImporter
+from core.models import Content, Tag, Topic
+
+
+class ContentImportTests(TestCase):
+    """
+    Bulk import of contents from NDJSON and CSV
+    """
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email='import@email.com', password='test132456', username='import')
+        Topic.objects.create(title='python')
+        Tag.objects.create(title='django')
+
+    def ndjson(self, records):
+        return StringIO(''.join(json.dumps(record, cls=DjangoJSONEncoder) + '\n' for record in records))
+
+    def test_import_ndjson(self):
+        """
+        Test records are inserted with their tags and bad lines are reported
+        """
+        records = [
+            {'title': f'title {i}', 'body': 'body', 'author': 'import@email.com', 'topic': 'python', 'tags': ['django']}
+            for i in range(5)
+        ]
+        stream = StringIO(self.ndjson(records).getvalue() + 'not json\n' + json.dumps({'title': 'x'}) + '\n')
+
+        importer = ContentImporter(batch_size=2)
+        importer.run(stream)
+
+        self.assertEqual(importer.imported, 5)
+        self.assertEqual([number for number, _ in importer.errors], [6, 7])
+        self.assertEqual(Content.objects.filter(tags__title='django').count(), 5)
+
+    def test_import_batches_are_constant_queries(self):
+        """
+        Test a batch costs the same number of queries whatever its size
+        """
+        def run(size):
+            records = [
+                {'title': 't', 'body': 'b', 'author': self.user.id, 'topic': 'python', 'tags': ['django']}
+                for _ in range(size)
+            ]
+            importer = ContentImporter(batch_size=size)
+            with self.assertNumQueries(8):
+                importer.run(self.ndjson(records))
+
+        run(10)
+        run(100)
+
+    def test_import_unknown_references(self):
+        """
+        Test unknown topics are rejected unless create_missing is set
+        """
+        record = {'title': 't', 'author': self.user.id, 'topic': 'go', 'tags': ['new']}
+
+        importer = ContentImporter()
+        importer.run(self.ndjson([record]))
+        self.assertEqual(importer.imported, 0)
+        self.assertIn('unknown topic', importer.errors[0][1])
+
+        importer = ContentImporter(create_missing=True)
+        importer.run(self.ndjson([record]))
+        self.assertEqual(importer.imported, 1)
+        self.assertTrue(Tag.objects.filter(title='new').exists())
+
+    def test_import_round_trips_export(self):
+        """
+        Test the export output can be imported back
+        """
+        content = Content.objects.create(author=self.user, topic=Topic.objects.get(), title='t', body='b', publish=True)
+        content.tags.add(Tag.objects.get())
+        exported = list(iter_published_content())
+
+        ContentImporter().run(self.ndjson(exported))
+
+        self.assertEqual(Content.objects.filter(tags__title='django').count(), 2)
+
+    def test_import_content_command_csv(self):
+        """
+        Test the command reads CSV files and reports throughput
+        """
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as handle:
+            handle.write('title,body,author,topic,tags,publish\n')
+            handle.write('first,"multi\nline",import@email.com,python,django,true\n')
+            handle.write('second,body,import@email.com,python,,false\n')
+        self.addCleanup(os.remove, handle.name)
+
+        out = StringIO()
+        call_command('import_content', handle.name, stdout=out, stderr=StringIO())
+
+        self.assertIn('Imported 2 content(s)', out.getvalue())
+        self.assertIn('rows/s', out.getvalue())
+        self.assertEqual(Content.objects.get(title='first').body, 'multi\nline')
+        self.assertFalse(Content.objects.get(title='second').publish)
+
+
+class ContentImportWorkersTests(TransactionTestCase):
+    """
+    Parsing in a process pool
+    """
+    def test_import_with_workers(self):
+        """
+        Test records parsed by worker processes are all imported
+        """
+        user = get_user_model().objects.create_user(email='pool@email.com', username='pool')
+        Topic.objects.create(title='python')
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson', delete=False) as handle:
+            for i in range(50):
+                handle.write(json.dumps({'title': f't{i}', 'author': user.id, 'topic': 'python'}) + '\n')
+        self.addCleanup(os.remove, handle.name)
+
+        call_command('import_content', handle.name, '--workers', '2', '--batch-size', '7', stdout=StringIO())
+
+        self.assertEqual(Content.objects.count(), 50)
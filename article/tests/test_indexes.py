@@ -0,0 +1,143 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from article.trending import recompute_scores
+from core.models import Bookmark, Comment, Content, Follow, Tag, TimelineEntry, Topic
+
+
+class QueryPlanMixin:
+    """
+    Run every SELECT, UPDATE and DELETE issued by a request through EXPLAIN QUERY PLAN and fail
+    on full table scans or sorts that no index covers
+    """
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assert_indexed(self, method, url, data=None):
+        if connection.vendor != 'sqlite':
+            self.skipTest('query plan checks are written for sqlite')
+        with CaptureQueriesContext(connection) as ctx:
+            getattr(self.client, method)(url, data)
+
+        reads = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith(('SELECT', 'UPDATE', 'DELETE'))]
+        self.assertTrue(reads, f'{url} ran no lookup')
+        tables = set(connection.introspection.table_names())
+        for sql in reads:
+            for step in self.explain(sql):
+                # Reading back a subquery's own (already limited) rows is not a table scan.
+                unindexed_scan = step.startswith('SCAN') and 'USING' not in step and step.split()[1] in tables
+                self.assertFalse(unindexed_scan, f'{url}: {step}\n{sql}')
+                self.assertNotIn('TEMP B-TREE', step, f'{url}: {step}\n{sql}')
+
+
+class ViewQueryPlanTests(QueryPlanMixin, TestCase):
+    """
+    Hot article endpoints are backed by indexes
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='plan@email.com', password='test132456', username='plan')
+        self.client.force_authenticate(self.user)
+        self.topic = Topic.objects.create(title='python')
+        self.tag = Tag.objects.create(title='django')
+        self.content = Content.objects.create(author=self.user, topic=self.topic, title='title', body='body', publish=True)
+        self.content.tags.add(self.tag)
+        Comment.objects.create(author=self.user, content=self.content, body='comment')
+        Bookmark.objects.create(user=self.user, content=self.content)
+
+    def test_content_list(self):
+        """
+        Test listing published contents uses the partial publish index
+        """
+        self.assert_indexed('get', reverse('all-content-list'))
+        self.assert_indexed('get', reverse('all-content-list'), {'cursor': ''})
+
+    def test_content_retrieve(self):
+        """
+        Test retrieving a content looks rows up by primary key
+        """
+        self.assert_indexed('get', reverse('all-content-detail', args=[self.content.id]))
+
+    def test_content_profile_list(self):
+        """
+        Test listing a user's contents uses the author index
+        """
+        url = reverse('content-profile-list', kwargs={'user_id': self.user.id})
+        self.assert_indexed('get', url)
+        self.assert_indexed('get', url, {'cursor': ''})
+
+    def test_content_tag_filter(self):
+        """
+        Test filtering by tag uses the unique tag title
+        """
+        self.assert_indexed('get', reverse('content-tag', args=['django']))
+
+    def test_content_topic_filter(self):
+        """
+        Test filtering by topic uses the unique topic title
+        """
+        self.assert_indexed('get', reverse('content-topic', args=['python']), {'cursor': ''})
+
+    def test_comment_list(self):
+        """
+        Test listing comments uses the content index
+        """
+        url = reverse('comment-list', kwargs={'content_id': self.content.id})
+        self.assert_indexed('get', url, {'cursor': ''})
+
+    def test_bookmark_list(self):
+        """
+        Test listing bookmarks uses the user/content constraint
+        """
+        self.assert_indexed('get', reverse('bookmark-list'))
+
+    def test_like(self):
+        """
+        Test like and unlike use the user/content constraint
+        """
+        self.assert_indexed('post', reverse('like', args=[self.content.id]))
+        self.assert_indexed('post', reverse('unlike', args=[self.content.id]))
+
+    def test_trending(self):
+        """
+        Test the trending feed walks the score index instead of sorting
+        """
+        for _ in range(10):
+            Content.objects.create(author=self.user, topic=self.topic, title='title', body='body', publish=True)
+        recompute_scores()
+        self.assert_indexed('get', reverse('content-trending'))
+        next_page = self.client.get(reverse('content-trending')).data['next']
+        self.assert_indexed('get', next_page)
+        self.assert_indexed('get', self.client.get(next_page).data['previous'])
+
+    def test_feed(self):
+        """
+        Test the home feed is a range scan of the timeline and author indexes
+        """
+        follower = get_user_model().objects.create_user(email='follower@email.com', username='follower')
+        Follow.objects.create(user=follower, author=self.user)
+        TimelineEntry.objects.create(user=follower, content=self.content)
+        self.client.force_authenticate(follower)
+        self.assert_indexed('get', reverse('feed'))
+        self.assert_indexed('get', reverse('feed'), {'before': self.content.id})
+
+    def test_feed_celebrities(self):
+        """
+        Test celebrity contents are pulled by range scans of the author index
+        """
+        follower = get_user_model().objects.create_user(email='follower@email.com', username='follower')
+        other = get_user_model().objects.create_user(email='other@email.com', username='other')
+        Content.objects.create(author=other, topic=self.topic, title='title', body='body', publish=True)
+        for author in (self.user, other):
+            Follow.objects.create(user=follower, author=author)
+            author.follower_count = 10000
+            author.save()
+        self.client.force_authenticate(follower)
+        self.assert_indexed('get', reverse('feed'))
+        self.assert_indexed('get', reverse('feed'), {'before': self.content.id + 1})
@@ -0,0 +1,172 @@
+from io import StringIO
+from threading import Thread
+from unittest import mock
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from article.likes import set_like
+from core.models import Content, Like, Topic
+
+
+def like_url(content_id):
+    return reverse('like', args=[content_id])
+
+
+def unlike_url(content_id):
+    return reverse('unlike', args=[content_id])
+
+
+class LikeCounterApiTests(TestCase):
+    """
+    Like and unlike keep Content.like_count in sync
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='like@email.com', password='test132456', username='liker')
+        self.client.force_authenticate(self.user)
+        self.topic = Topic.objects.create(title='python')
+        self.content = Content.objects.create(author=self.user, topic=self.topic, title='title', body='body', publish=True)
+
+    def test_like_increments_counter(self):
+        """
+        Test liking a content increments its like counter
+        """
+        res = self.client.post(like_url(self.content.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['likes'], 1)
+        self.content.refresh_from_db()
+        self.assertEqual(self.content.like_count, 1)
+
+    def test_like_twice_is_idempotent(self):
+        """
+        Test liking the same content twice does not change the counter
+        """
+        self.client.post(like_url(self.content.id))
+        res = self.client.post(like_url(self.content.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(res.data['changed'])
+        self.assertEqual(res.data['likes'], 1)
+        self.assertEqual(Like.objects.count(), 1)
+
+    def test_like_two_queries(self):
+        """
+        Test a like is one insert and one counter update
+        """
+        with self.assertNumQueries(4):  # savepoint, insert, update, release
+            res = self.client.post(like_url(self.content.id))
+        self.assertEqual(res.data['likes'], 1)
+
+    def test_like_missing_content(self):
+        """
+        Test liking a content that does not exist returns 404
+        """
+        res = self.client.post(like_url(9999))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(Like.objects.exists())
+
+    def test_unlike_decrements_counter(self):
+        """
+        Test unliking a content decrements its like counter
+        """
+        self.client.post(like_url(self.content.id))
+        res = self.client.post(unlike_url(self.content.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['likes'], 0)
+        self.assertFalse(Like.objects.filter(user=self.user).exists())
+
+    def test_unlike_without_like_is_noop(self):
+        """
+        Test unliking a content that was never liked
+        """
+        res = self.client.post(unlike_url(self.content.id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(res.data['changed'])
+        self.assertEqual(res.data['likes'], 0)
+
+    def test_unlike_drifted_counter_stays_at_zero(self):
+        """
+        Test unliking when the counter has drifted to zero does not fail the CHECK
+        """
+        self.client.post(like_url(self.content.id))
+        Content.objects.filter(id=self.content.id).update(like_count=0)
+
+        res = self.client.post(unlike_url(self.content.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.data['changed'])
+        self.assertEqual(res.data['likes'], 0)
+
+    def test_counter_without_returning(self):
+        """
+        Test databases without UPDATE ... RETURNING read the counter back separately
+        """
+        with mock.patch('article.likes.supports_returning', return_value=False):
+            self.assertEqual(set_like(self.user.id, self.content.id, True), (True, 1))
+            self.assertEqual(set_like(self.user.id, self.content.id, False), (True, 0))
+            with self.assertRaises(Content.DoesNotExist):
+                set_like(self.user.id, 9999, True)
+
+    def test_sync_like_counts_command(self):
+        """
+        Test the management command repairs a drifted counter
+        """
+        Like.objects.create(user=self.user, content=self.content, liked=True)
+        Content.objects.filter(id=self.content.id).update(like_count=7)
+
+        out = StringIO()
+        call_command('sync_like_counts', '--check', stdout=out)
+        self.assertIn('1 content(s) out of sync', out.getvalue())
+
+        call_command('sync_like_counts', stdout=StringIO())
+        self.content.refresh_from_db()
+        self.assertEqual(self.content.like_count, 1)
+
+
+class LikeConcurrencyTests(TransactionTestCase):
+    """
+    Concurrent double taps against a file backed sqlite database
+    """
+    def test_concurrent_likes_count_once(self):
+        """
+        Test threads liking and unliking at once leave consistent counters
+        """
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('needs a file backed database')
+        topic = Topic.objects.create(title='python')
+        author = get_user_model().objects.create_user(email='author@email.com', username='author')
+        users = [
+            get_user_model().objects.create_user(email=f'user{i}@email.com', username=f'user{i}')
+            for i in range(8)
+        ]
+        content = Content.objects.create(author=author, topic=topic, title='title', body='body', publish=True)
+        errors = []
+
+        def tap(user, liked):
+            try:
+                for _ in range(10):
+                    set_like(user.id, content.id, liked)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [Thread(target=tap, args=(user, True)) for user in users for _ in range(3)]
+        threads += [Thread(target=tap, args=(user, False)) for user in users[:4]]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        content.refresh_from_db()
+        likes = Like.objects.filter(content=content).count()
+        self.assertEqual(content.like_count, likes)
+        self.assertEqual(Like.objects.filter(content=content).values('user').distinct().count(), likes)
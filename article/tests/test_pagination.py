@@ -0,0 +1,68 @@
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from core.models import Comment, Content, Topic
+
+CONTENT_LIST_URL = reverse('all-content-list')
+
+
+class CursorPaginationTests(TestCase):
+    """
+    Opt-in keyset pagination for content and comment lists
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='cursor@email.com', password='test132456', username='cursor')
+        self.client.force_authenticate(self.user)
+        self.topic = Topic.objects.create(title='python')
+        Content.objects.bulk_create(
+            Content(author=self.user, topic=self.topic, title=f'title {i}', body='body', publish=True)
+            for i in range(25)
+        )
+
+    def test_content_list_without_cursor_is_unpaginated(self):
+        """
+        Test the plain list response is unchanged when no cursor is given
+        """
+        res = self.client.get(CONTENT_LIST_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 25)
+
+    def test_content_cursor_walks_every_row(self):
+        """
+        Test following next links visits each content once, newest first
+        """
+        url = CONTENT_LIST_URL + '?cursor='
+        seen = []
+        while url:
+            with self.assertNumQueries(3 + 2):  # + likes and bookmarks of the page
+                res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', res.data)
+            seen.extend(item['id'] for item in res.data['results'])
+            url = res.data['next']
+
+        ids = list(Content.objects.order_by('-id').values_list('id', flat=True))
+        self.assertEqual(seen, ids)
+
+    def test_comment_cursor_oldest_first(self):
+        """
+        Test comment pages are ordered oldest first
+        """
+        content = Content.objects.first()
+        Comment.objects.bulk_create(
+            Comment(author=self.user, content=content, body=f'comment {i}')
+            for i in range(12)
+        )
+        url = reverse('comment-list', kwargs={'content_id': content.id})
+
+        res = self.client.get(url, {'cursor': ''})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 10)
+        self.assertEqual(res.data['results'][0]['body'], 'comment 0')
+        self.assertIsNotNone(res.data['next'])
@@ -0,0 +1,125 @@
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from article.search import get_search_backend
+from core.models import Content, Topic
+
+CONTENT_LIST_URL = reverse('all-content-list')
+
+
+class ContentSearchApiTests(TestCase):
+    """
+    Full text search on the content list api
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='search@email.com', password='test132456', username='search')
+        self.topic = Topic.objects.create(title='python')
+
+    def create_content(self, title, body):
+        return Content.objects.create(author=self.user, topic=self.topic, title=title, body=body, publish=True)
+
+    def search(self, term):
+        res = self.client.get(CONTENT_LIST_URL, {'search': term})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [item['id'] for item in res.data]
+
+    def test_search_title_and_body(self):
+        """
+        Test every term must match in title or body
+        """
+        both = self.create_content('Django caching', 'Using redis as a backend')
+        title_only = self.create_content('Django forms', 'Validation rules')
+
+        self.assertEqual(set(self.search('django')), {both.id, title_only.id})
+        self.assertEqual(self.search('django redis'), [both.id])
+
+    def test_search_ranks_by_relevance(self):
+        """
+        Test contents mentioning the term more often come first
+        """
+        weak = self.create_content('Databases', 'postgres appears once here')
+        strong = self.create_content('Postgres tuning', 'postgres postgres postgres vacuum')
+
+        self.assertEqual(self.search('postgres'), [strong.id, weak.id])
+
+    def test_search_index_follows_updates_and_deletes(self):
+        """
+        Test the index is updated when a content is saved or deleted
+        """
+        content = self.create_content('Old title', 'body')
+        content.title = 'Fresh title'
+        content.save()
+
+        self.assertEqual(self.search('old'), [])
+        self.assertEqual(self.search('fresh'), [content.id])
+
+        content.delete()
+        self.assertEqual(self.search('fresh'), [])
+
+    def test_search_syntax_is_escaped(self):
+        """
+        Test query operators in user input are treated as plain words
+        """
+        content = self.create_content('Quotes "and" stars', 'NEAR OR NOT')
+
+        self.assertEqual(self.search('"stars* OR'), [content.id])
+        self.assertEqual(self.search('***'), [])
+
+    def test_search_skips_unpublished(self):
+        """
+        Test unpublished contents never show up in results
+        """
+        Content.objects.create(author=self.user, topic=self.topic, title='draft', body='hidden', publish=False)
+
+        self.assertEqual(self.search('draft'), [])
+
+    def test_search_pages_keep_ranking(self):
+        """
+        Test every cursor page of a search follows the relevance order
+        """
+        for n in range(15):
+            self.create_content(f'Content {n}', ' '.join(['postgres'] * ((n * 7) % 15 + 1)) + ' filler' * 20)
+        ranked = self.search('postgres')
+
+        pages = []
+        res = self.client.get(CONTENT_LIST_URL, {'search': 'postgres', 'cursor': ''})
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            pages.append([item['id'] for item in res.data['results']])
+            if not res.data['next']:
+                break
+            res = self.client.get(res.data['next'])
+
+        self.assertEqual([len(page) for page in pages], [10, 5])
+        self.assertEqual(pages[0] + pages[1], ranked)
+        self.assertNotEqual(ranked, sorted(ranked, reverse=True))
+
+        res = self.client.get(res.data['previous'])
+        self.assertEqual([item['id'] for item in res.data['results']], pages[0])
+
+    def test_search_pages_stop_at_offset_cutoff(self):
+        """
+        Test walking a large search ends instead of repeating the last page
+        """
+        Content.objects.bulk_create(
+            Content(author=self.user, topic=self.topic, title=f'Postgres {n}', body='body', publish=True)
+            for n in range(1030)
+        )
+        get_search_backend().rebuild()
+
+        seen = []
+        res = self.client.get(CONTENT_LIST_URL, {'search': 'postgres', 'cursor': ''})
+        for _ in range(110):
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            seen += [item['id'] for item in res.data['results']]
+            if not res.data['next']:
+                break
+            res = self.client.get(res.data['next'])
+
+        self.assertIsNone(res.data['next'])
+        self.assertEqual(len(seen), 1010)
+        self.assertEqual(len(set(seen)), len(seen))
@@ -0,0 +1,123 @@
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from core.models import Bookmark, Content, Like, Topic
+
+CONTENT_LIST_URL = reverse('all-content-list')
+BOOKMARK_LIST_URL = reverse('bookmark-list')
+
+
+class SocialStateTests(TestCase):
+    """
+    liked_by_me and bookmarked_by_me on content lists
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='user@email.com', password='test132456', username='user')
+        self.other = get_user_model().objects.create_user(email='other@email.com', password='test132456', username='other')
+        self.client.force_authenticate(self.user)
+        topic = Topic.objects.create(title='python')
+        self.contents = [
+            Content.objects.create(author=self.other, topic=topic, title=f'title {i}', body='body', publish=True)
+            for i in range(4)
+        ]
+        Like.objects.create(user=self.user, content=self.contents[0], liked=True)
+        Like.objects.create(user=self.other, content=self.contents[1], liked=True)
+        Bookmark.objects.create(user=self.user, content=self.contents[2])
+        Bookmark.objects.create(user=self.other, content=self.contents[3])
+
+    def flags(self, items):
+        return {item['id']: (item['liked_by_me'], item['bookmarked_by_me']) for item in items}
+
+    def test_list_flags(self):
+        """
+        Test the flags only reflect the current user's likes and bookmarks
+        """
+        res = self.client.get(CONTENT_LIST_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.flags(res.data), {
+            self.contents[0].id: (True, False),
+            self.contents[1].id: (False, False),
+            self.contents[2].id: (False, True),
+            self.contents[3].id: (False, False),
+        })
+
+    def test_retrieve_flags(self):
+        """
+        Test a single content carries the flags too
+        """
+        res = self.client.get(reverse('all-content-detail', args=[self.contents[0].id]))
+
+        self.assertTrue(res.data['liked_by_me'])
+        self.assertFalse(res.data['bookmarked_by_me'])
+
+    def test_bookmark_list_flags(self):
+        """
+        Test bookmarked contents are flagged without a bookmark lookup
+        """
+        Like.objects.create(user=self.user, content=self.contents[2], liked=True)
+        with self.assertNumQueries(3):
+            res = self.client.get(BOOKMARK_LIST_URL)
+
+        self.assertEqual(self.flags(item['content'] for item in res.data), {self.contents[2].id: (True, True)})
+
+    def test_anonymous_flags(self):
+        """
+        Test anonymous users see every flag off
+        """
+        self.client.force_authenticate(None)
+        res = self.client.get(CONTENT_LIST_URL)
+
+        self.assertEqual(set(self.flags(res.data).values()), {(False, False)})
+
+    def test_bookmark_changes_etag(self):
+        """
+        Test bookmarking a content moves the list ETag of the user
+        """
+        etag = self.client.get(CONTENT_LIST_URL)['ETag']
+        Bookmark.objects.create(user=self.user, content=self.contents[0])
+
+        res = self.client.get(CONTENT_LIST_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(self.flags(res.data)[self.contents[0].id][1])
+
+    def test_bookmark_keeps_other_users_validators(self):
+        """
+        Test bookmarking a content leaves other users' ETag and Last-Modified alone
+        """
+        self.client.force_authenticate(self.other)
+        url = reverse('all-content-detail', args=[self.contents[0].id])
+        before = self.client.get(url)
+        list_etag = self.client.get(CONTENT_LIST_URL)['ETag']
+        self.client.force_authenticate(self.user)
+        self.client.post(BOOKMARK_LIST_URL, {'content': self.contents[0].id})
+        self.assertTrue(Bookmark.objects.filter(user=self.user, content=self.contents[0]).exists())
+
+        self.client.force_authenticate(self.other)
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=before['ETag'])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['Last-Modified'], before['Last-Modified'])
+        self.assertEqual(
+            self.client.get(CONTENT_LIST_URL, HTTP_IF_NONE_MATCH=list_etag).status_code,
+            status.HTTP_304_NOT_MODIFIED
+        )
+
+    def test_bookmark_changes_detail_etag(self):
+        """
+        Test bookmarking a content moves its ETag for the user, not its Last-Modified
+        """
+        url = reverse('all-content-detail', args=[self.contents[0].id])
+        before = self.client.get(url)
+        Bookmark.objects.create(user=self.user, content=self.contents[0])
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=before['ETag'])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.data['bookmarked_by_me'])
+        self.assertEqual(res['Last-Modified'], before['Last-Modified'])
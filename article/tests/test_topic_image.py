@@ -0,0 +1,48 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from PIL import Image
+
+from article.cache import get_response_cache
+from core.models import Content, Topic
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, TASK_QUEUE={'BROKER': 'core.tasks.ImmediateBroker'})
+class TopicImageTests(TestCase):
+    """
+    Topic images are thumbnailed in the background
+    """
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_cached_content_picks_up_thumbnails(self):
+        """
+        Test a cached content shows the topic thumbnails once they are processed
+        """
+        get_response_cache().clear()
+        user = get_user_model().objects.create_user(email='user@email.com', password='test132456', username='user')
+        topic = Topic.objects.create(title='python')
+        content = Content.objects.create(author=user, topic=topic, title='title', body='body', publish=True)
+        url = reverse('all-content-detail', args=[content.id])
+        client = APIClient()
+        self.assertEqual(client.get(url).data['topic']['image_sizes'], {})
+
+        buffer = BytesIO()
+        Image.new('RGBA', (300, 200), (0, 0, 255, 128)).save(buffer, 'PNG')
+        topic.image = SimpleUploadedFile('topic.png', buffer.getvalue(), content_type='image/png')
+        with self.captureOnCommitCallbacks(execute=True):
+            topic.save()
+
+        res = client.get(url)
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(set(res.data['topic']['image_sizes']), {'small', 'medium', 'large'})
@@ -0,0 +1,155 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from article.trending import decayed_score, recompute_scores
+from core.models import Bookmark, Comment, Content, ContentScore, Topic
+
+TRENDING_URL = reverse('content-trending')
+
+
+class TrendingTests(TestCase):
+    """
+    Trending scores and the trending feed
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='user@email.com', password='test132456', username='user')
+        self.readers = [
+            get_user_model().objects.create_user(email=f'reader{i}@email.com', username=f'reader{i}')
+            for i in range(3)
+        ]
+        self.topic = Topic.objects.create(title='python')
+
+    def create_content(self, likes=0, comments=0, bookmarks=0, publish=True):
+        content = Content.objects.create(
+            author=self.user, topic=self.topic, title='title', body='body', publish=publish
+        )
+        Content.objects.filter(id=content.id).update(like_count=likes)
+        Comment.objects.bulk_create(Comment(author=self.user, content=content, body='body') for _ in range(comments))
+        Bookmark.objects.bulk_create(Bookmark(user=reader, content=content) for reader in self.readers[:bookmarks])
+        return content
+
+    def test_decayed_score_halves(self):
+        """
+        Test a score halves after one half life
+        """
+        fresh = decayed_score(4, 0, 0, 0)
+        self.assertEqual(fresh, 4)
+        self.assertAlmostEqual(decayed_score(4, 0, 0, 24), fresh / 2)
+
+    def test_recompute_ranks_by_engagement(self):
+        """
+        Test contents are ranked by weighted likes, comments and bookmarks
+        """
+        quiet = self.create_content(likes=1)
+        liked = self.create_content(likes=5)
+        discussed = self.create_content(likes=1, comments=2, bookmarks=2)
+        self.create_content(likes=50, publish=False)
+
+        self.assertEqual(recompute_scores(), 3)
+
+        ranked = list(ContentScore.objects.order_by('-score').values_list('content', flat=True))
+        self.assertEqual(ranked, [discussed.id, liked.id, quiet.id])
+        score = ContentScore.objects.get(content=discussed)
+        self.assertEqual((score.likes, score.comments, score.bookmarks), (1, 2, 2))
+
+    def test_recompute_decays_old_content(self):
+        """
+        Test older content needs more engagement to rank as high
+        """
+        old = self.create_content(likes=3)
+        new = self.create_content(likes=2)
+        Content.objects.filter(id=old.id).update(created_at=timezone.now() - timedelta(days=2))
+
+        recompute_scores()
+
+        self.assertEqual(ContentScore.objects.order_by('-score').first().content_id, new.id)
+
+    def test_trending_feed(self):
+        """
+        Test the feed walks contents by score and skips unscored ones
+        """
+        contents = [self.create_content(likes=likes) for likes in range(15)]
+        recompute_scores()
+        self.create_content(likes=100)
+
+        res = self.client.get(TRENDING_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        seen = [item['id'] for item in res.data['results']]
+        res = self.client.get(res.data['next'])
+        seen += [item['id'] for item in res.data['results']]
+
+        self.assertEqual(seen, [content.id for content in reversed(contents)])
+        self.assertIsNone(res.data['next'])
+
+    def test_trending_feed_walks_tied_scores(self):
+        """
+        Test contents with the same score are paged once each, past the cursor offset cutoff
+        """
+        Content.objects.bulk_create(
+            Content(author=self.user, topic=self.topic, title='title', body='body', publish=True) for _ in range(1030)
+        )
+        recompute_scores()
+        self.assertEqual(set(ContentScore.objects.values_list('score', flat=True)), {0.0})
+
+        pages = []
+        res = self.client.get(TRENDING_URL)
+        for _ in range(110):
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            pages.append([item['id'] for item in res.data['results']])
+            if not res.data['next']:
+                break
+            res = self.client.get(res.data['next'])
+
+        seen = [content_id for page in pages for content_id in page]
+        self.assertIsNone(res.data['next'])
+        self.assertEqual(seen, sorted(Content.objects.values_list('id', flat=True), reverse=True))
+
+        res = self.client.get(res.data['previous'])
+        self.assertEqual([item['id'] for item in res.data['results']], pages[-2])
+
+    def test_unpublish_drops_score(self):
+        """
+        Test unpublishing a content takes it off the feed before the next recompute
+        """
+        content = self.create_content(likes=1)
+        recompute_scores()
+        content.publish = False
+        content.save()
+
+        res = self.client.get(TRENDING_URL)
+
+        self.assertEqual(res.data['results'], [])
+
+    def test_recompute_refreshes_cached_feed(self):
+        """
+        Test a recompute is visible through the response cache
+        """
+        first = self.create_content(likes=1)
+        recompute_scores()
+        self.client.get(TRENDING_URL)
+        second = self.create_content(likes=10)
+        recompute_scores()
+
+        res = self.client.get(TRENDING_URL)
+
+        self.assertEqual([item['id'] for item in res.data['results']], [second.id, first.id])
+
+    def test_recompute_command(self):
+        """
+        Test the command scores every published content
+        """
+        self.create_content(likes=1)
+        out = StringIO()
+        call_command('recompute_trending', stdout=out)
+
+        self.assertIn('Scored 1 content(s)', out.getvalue())
+        self.assertEqual(ContentScore.objects.count(), 1)
@@ -0,0 +1,72 @@
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+
+from core.models import Comment
+
+
+# Siblings are ranked before recursing, window functions are not allowed in
+# the recursive part. Only the first `width` replies of a comment are walked.
+DESCENDANTS_SQL = """
+WITH RECURSIVE ranked(id, reply_id, position) AS (
+    SELECT id, reply_id, ROW_NUMBER() OVER (PARTITION BY reply_id ORDER BY id)
+    FROM core_comment WHERE content_id = %s AND reply_id IS NOT NULL
+),
+thread(id, depth) AS (
+    SELECT id, 1 FROM ranked WHERE reply_id IN ({roots}) AND position <= %s
+    UNION ALL
+    SELECT ranked.id, thread.depth + 1
+    FROM ranked JOIN thread ON ranked.reply_id = thread.id
+    WHERE thread.depth < %s AND ranked.position <= %s
+)
+SELECT id FROM thread
+"""
+
+
+def with_reply_count(queryset):
+    replies = (
+        Comment.objects.filter(reply=OuterRef('pk')).order_by()
+        .values('reply').annotate(total=Count('id')).values('total')
+    )
+    return queryset.annotate(reply_count=Coalesce(Subquery(replies, output_field=IntegerField()), 0))
+
+
+def load_comment_threads(content_id, after=0, limit=10, depth=5, width=50):
+    """
+    Page of top level comments of a content with their replies nested.
+    Costs two queries whatever the size of the threads: one for the roots
+    and a recursive CTE for the first `width` replies of every comment down
+    to `depth` levels, nothing past those limits is loaded. Every comment
+    carries its `reply_count`, loaded or not.
+    Returns (roots, replies, children by parent id, next cursor).
+    """
+    roots = list(
+        with_reply_count(Comment.objects.filter(content_id=content_id, reply__isnull=True, id__gt=after))
+        .select_related('author')
+        .order_by('id')[:limit + 1]
+    )
+    next_after = roots[limit - 1].id if len(roots) > limit else None
+    roots = roots[:limit]
+
+    replies = []
+    if roots and depth > 0 and width > 0:
+        root_ids = [root.id for root in roots]
+        sql = DESCENDANTS_SQL.format(roots=', '.join(['%s'] * len(root_ids)))
+        replies = list(
+            with_reply_count(Comment.objects.filter(id__in=RawSQL(sql, (content_id, *root_ids, width, depth, width))))
+            .select_related('author')
+            .order_by('id')
+        )
+
+    children = {}
+    for reply in replies:
+        children.setdefault(reply.reply_id, []).append(reply)
+    return roots, replies, children, next_after
+
+
+def build_tree(node, data_by_id, children):
+    tree = dict(data_by_id[node.id])
+    kids = children.get(node.id, [])
+    tree['replies'] = [build_tree(kid, data_by_id, children) for kid in kids]
+    tree['more_replies'] = node.reply_count - len(kids)
+    return tree
@@ -0,0 +1,72 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from core.models import Bookmark, Comment, Content, ContentScore
+from .utils import chunked
+from .signals import invalidate
+
+
+DEFAULTS = {
+    'LIKE_WEIGHT': 1.0,
+    'COMMENT_WEIGHT': 2.0,
+    'BOOKMARK_WEIGHT': 3.0,
+    'HALF_LIFE_HOURS': 24.0,
+}
+
+
+def trending_setting(name):
+    return getattr(settings, 'TRENDING', {}).get(name, DEFAULTS[name])
+
+
+def decayed_score(likes, comments, bookmarks, age_hours):
+    """
+    Weighted engagement halved every HALF_LIFE_HOURS of content age
+    """
+    raw = (
+        likes * trending_setting('LIKE_WEIGHT')
+        + comments * trending_setting('COMMENT_WEIGHT')
+        + bookmarks * trending_setting('BOOKMARK_WEIGHT')
+    )
+    return raw * 0.5 ** (max(age_hours, 0) / trending_setting('HALF_LIFE_HOURS'))
+
+
+def grouped_counts(model):
+    return dict(
+        model.objects.order_by().values('content').annotate(total=Count('id')).values_list('content', 'total')
+    )
+
+
+def recompute_scores(now=None, batch_size=1000):
+    """
+    Rebuild the score table for every published content in bulk. Reads the
+    denormalized like counter plus one grouped count per relation, then
+    swaps the table content in a single transaction, batch by batch.
+    """
+    now = now or timezone.now()
+    comments = grouped_counts(Comment)
+    bookmarks = grouped_counts(Bookmark)
+
+    total = 0
+    published = Content.objects.filter(publish=True).values_list('id', 'created_at', 'like_count')
+    with transaction.atomic():
+        ContentScore.objects.all().delete()
+        for chunk in chunked(published.iterator(chunk_size=batch_size), batch_size):
+            scores = []
+            for content_id, created_at, likes in chunk:
+                age_hours = (now - created_at).total_seconds() / 3600
+                content_comments = comments.get(content_id, 0)
+                content_bookmarks = bookmarks.get(content_id, 0)
+                scores.append(ContentScore(
+                    content_id=content_id,
+                    score=decayed_score(likes, content_comments, content_bookmarks, age_hours),
+                    likes=likes,
+                    comments=content_comments,
+                    bookmarks=content_bookmarks,
+                    computed_at=now,
+                ))
+            ContentScore.objects.bulk_create(scores)
+            total += len(scores)
+    invalidate('list:trending')
+    return total
@@ -1,42 +1,65 @@
 from django.urls import path, include
 from .views import (
     TagApiView, 
+    BulkTagApiView,
     LikeApiView,
+    BulkLikeApiView,
     UnLikeApiView, 
     CommentApiViewSet, 
     ContentProfileApiViewSet,
     TopicApiView,
     BookmarkApiViewSet,
     ContentApiViewSet,
+    TrendingContentApiViewSet,
     ContentTagFilterApiViewSet,
-    ContentTopicFilterApiViewSet
+    ContentTopicFilterApiViewSet,
+    ResponseCacheStatsApiView,
+    ContentExportApiView,
+    FollowApiViewSet,
+    FeedApiView,
 )
+from . import async_views
 from rest_framework.routers import DefaultRouter
 
 
 comment_router = DefaultRouter()
 bookmark_router = DefaultRouter()
 all_content_router = DefaultRouter()
+follow_router = DefaultRouter()
 
 profile_content_router = DefaultRouter()
 profile_content_router.register('', ContentProfileApiViewSet, basename='content-profile')
 comment_router.register('comment', CommentApiViewSet, basename='comment')
 bookmark_router.register('bookmark', BookmarkApiViewSet, basename='bookmark')
 all_content_router.register('contents', ContentApiViewSet, basename= 'all-content')
+follow_router.register('follow', FollowApiViewSet, basename='follow')
 
 urlpatterns = [
     path('tags/', TagApiView.as_view(), name='tag'),
+    path('tags/bulk/', BulkTagApiView.as_view(), name='tag-bulk'),
     path('topics/', TopicApiView.as_view(), name='topic'),
+    path('feed/', FeedApiView.as_view(), name='feed'),
+    path('export/contents/', ContentExportApiView.as_view(), name='content-export'),
+    path('cache/stats/', ResponseCacheStatsApiView.as_view(), name='cache-stats'),
     
     path('tag/<str:title>/',ContentTagFilterApiViewSet.as_view({'get': 'list'}), name='content-tag'),
     path('topic/<str:title>/', ContentTopicFilterApiViewSet.as_view({'get': 'list'}), name='content-topic'),
     
+    path('async/contents/', async_views.content_list, name='async-content-list'),
+    path('async/contents/<int:pk>/', async_views.content_detail, name='async-content-detail'),
+    path('async/tag/<str:title>/', async_views.content_tag, name='async-content-tag'),
+    path('async/topic/<str:title>/', async_views.content_topic, name='async-content-topic'),
+    path('async/<int:content_id>/comment/', async_views.comment_list, name='async-comment-list'),
+
     path('like/content/<int:pk>/', LikeApiView.as_view(), name='like'),
     path('unlike/content/<int:pk>/', UnLikeApiView.as_view(), name='unlike'),
+    path('like/bulk/', BulkLikeApiView.as_view(), name='like-bulk'),
     
     path('<int:user_id>/content/', include(profile_content_router.urls)),
+    path('contents/trending/', TrendingContentApiViewSet.as_view({'get': 'list'}), name='content-trending'),
     path('', include(all_content_router.urls)),
     path('', include(bookmark_router.urls)),
+    path('', include(follow_router.urls)),
     path('<int:content_id>/', include(comment_router.urls))
     
 
@@ -1,19 +1,39 @@
 from rest_framework import generics, viewsets, status, filters
+from rest_framework.decorators import action
 from rest_framework.mixins import DestroyModelMixin, CreateModelMixin, ListModelMixin, RetrieveModelMixin
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, When
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from .serializer import  (
     TopicSerializer,
     TagSerializer, 
     ContentSerializer, 
     ContentDetailSerializer, 
+    TrendingContentSerializer,
     CommentSerializer,
     BookmarkSerializer,
     BookMarkListSerializer,
+    BulkTagSerializer,
+    BulkBookmarkSerializer,
+    BulkLikeSerializer,
+    FollowSerializer,
 )
-from core.models import Bookmark, Like, Tag, Content, Comment, Topic, User
+from core.models import Bookmark, Follow, Tag, Content, ContentScore, Comment, Topic, User
 from .permissions import IsAuthor
+from .pagination import ContentCursorPagination, CommentCursorPagination, TrendingCursorPagination
+from .search import ContentSearchFilter
+from .cache import CachedResponseMixin, get_response_cache
+from .conditional import ConditionalGetMixin
+from .export import iter_published_content, ndjson_lines
+from .threads import load_comment_threads, build_tree
+from .feed import load_feed
+from .likes import set_like
+from .social import SocialState
 # Create your views here.
 
 class TagApiView(generics.ListCreateAPIView):
@@ -26,6 +46,25 @@ class TagApiView(generics.ListCreateAPIView):
     search_fields = ('title',)
 
 
+class BulkCreateApiView(APIView):
+    """
+    Create a batch of objects in one request, reporting a status per item
+    """
+    permission_classes = (IsAuthenticated, )
+    serializer_class = None
+
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data, context={'request': request, 'view': self})
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            results = serializer.save()
+        return Response({'results': results}, status=status.HTTP_201_CREATED)
+
+
+class BulkTagApiView(BulkCreateApiView):
+    serializer_class = BulkTagSerializer
+
+
 class TopicApiView(generics.ListAPIView):
     serializer_class = TopicSerializer
     queryset = Topic.objects.all()
@@ -38,7 +77,8 @@ class ContentProfileApiViewSet(viewsets.ModelViewSet):
     """
     permission_classes = (IsAuthenticated, IsAuthor,)
     serializer_class = ContentSerializer
-    queryset = Content.objects.all()
+    pagination_class = ContentCursorPagination
+    queryset = Content.objects.select_related('author', 'topic').prefetch_related('tags')
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -48,21 +88,30 @@ class ContentProfileApiViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user_id = self.kwargs['user_id']
-        user = User.objects.get(id=user_id)
-        if user:
-            return self.queryset.filter(author= user, publish=True)
-        return self.queryset.filter(publish=True)
+        return self.queryset.filter(author_id=user_id, publish=True)
+
+    def perform_create(self, serializer):
+        # The serializer saves the row before its tags, publishing queues the
+        # fan-out task that reads them. One transaction keeps the task out of
+        # the workers' reach until both are committed.
+        with transaction.atomic():
+            serializer.save()
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            serializer.save()
 
 
-class ContentApiViewSet(viewsets.GenericViewSet, ListModelMixin, RetrieveModelMixin):
+class ContentApiViewSet(CachedResponseMixin, ConditionalGetMixin, viewsets.GenericViewSet, ListModelMixin, RetrieveModelMixin):
     """
     Api list all contents and filter by serach fields
     """
     
     serializer_class = ContentSerializer
-    queryset = Content.objects.all()
-    filter_backends = [filters.SearchFilter]
-    search_fields = ('title', 'body')
+    pagination_class = ContentCursorPagination
+    queryset = Content.objects.select_related('author', 'topic').prefetch_related('tags')
+    filter_backends = [ContentSearchFilter]
+    cache_list_group = 'list:contents'
 
     def get_queryset(self):
         return self.queryset.filter(publish=True)
@@ -73,66 +122,135 @@ class ContentApiViewSet(viewsets.GenericViewSet, ListModelMixin, RetrieveModelMi
 
         return self.serializer_class
 
+    def get_user_state(self, request, rows):
+        # liked_by_me and bookmarked_by_me, loaded once for the ETag and the serializer.
+        self.social_state = SocialState()
+        self.social_state.load(request.user, [row.pk for row in rows])
+        return sorted(self.social_state.liked), sorted(self.social_state.bookmarked)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if getattr(self, 'social_state', None) is not None:
+            context['social_state'] = self.social_state
+        return context
+
 
-class ContentTagFilterApiViewSet(viewsets.GenericViewSet, ListModelMixin):
+class TrendingContentApiViewSet(CachedResponseMixin, viewsets.GenericViewSet, ListModelMixin):
+    """
+    Api list published contents by precomputed trending score
+    """
+    serializer_class = TrendingContentSerializer
+    pagination_class = TrendingCursorPagination
+    queryset = ContentScore.objects.select_related('content__author', 'content__topic').prefetch_related('content__tags')
+    cache_list_group = 'list:trending'
+
+    def paginate_queryset(self, queryset):
+        # Page through the score index alone, then serialize the contents.
+        scores = super().paginate_queryset(queryset)
+        for score in scores:
+            score.content.trending_score = score.score
+        return [score.content for score in scores]
+
+
+class ContentTagFilterApiViewSet(CachedResponseMixin, viewsets.GenericViewSet, ListModelMixin):
     """
     Api list content by tag
     """
     serializer_class = ContentSerializer
-    queryset = Content.objects.all()
+    pagination_class = ContentCursorPagination
+    queryset = Content.objects.prefetch_related('tags')
 
     def get_queryset(self):
         keyword = self.kwargs['title']
         return self.queryset.filter(tags__title = keyword)
 
+    def get_cache_list_group(self):
+        return f"list:tag:{self.kwargs['title']}"
+
 
-class ContentTopicFilterApiViewSet(viewsets.GenericViewSet, ListModelMixin):
+class ContentTopicFilterApiViewSet(CachedResponseMixin, viewsets.GenericViewSet, ListModelMixin):
     """
     Api list content by topic
     """
     serializer_class = ContentSerializer
-    queryset = Content.objects.all()
+    pagination_class = ContentCursorPagination
+    queryset = Content.objects.prefetch_related('tags')
 
     def get_queryset(self):
         keyword = self.kwargs['title']
-        topic = Topic.objects.get(title=keyword)
-        return self.queryset.filter(topic = topic,publish=True)
+        return self.queryset.filter(topic__title = keyword,publish=True)
+
+    def get_cache_list_group(self):
+        return f"list:topic:{self.kwargs['title']}"
 
 
 class LikeApiView(APIView):
+    """
+    Like a content, liking it again is a no-op
+    """
     permission_classes = (IsAuthenticated, )
+    liked = True
 
     def post(self, request, pk=None):
-        content_id = pk
-        content = Content.objects.get(id=content_id)
-        if Like.objects.get(user=self.request.user, content=content):
-            return Response({"message": "You have been liked this content"}, status= status.HTTP_403_FORBIDDEN)
-        Like.objects.create(content=content, liked=True, user=self.request.user)
-        return Response(ContentDetailSerializer(content).data, status= status.HTTP_200_OK)
+        try:
+            changed, likes = set_like(request.user.id, pk, self.liked)
+        except Content.DoesNotExist:
+            raise NotFound()
+        return Response({'liked': self.liked, 'changed': changed, 'likes': likes}, status= status.HTTP_200_OK)
 
 
-class UnLikeApiView(APIView):
-    permission_classes = (IsAuthenticated, )
+class UnLikeApiView(LikeApiView):
+    """
+    Remove a like, unliking a content that is not liked is a no-op
+    """
+    liked = False
 
-    def post(self, request, pk=None):
-        content_id = pk
-        content = Content.objects.get(id=content_id)
-        liked_content = Like.objects.get(user=self.request.user, content=content)
-        if liked_content:
-            liked_content.delete()
-            return Response(ContentDetailSerializer(content).data, status= status.HTTP_200_OK)
-        return Response({"message": "You have been unliked this content"}, status= status.HTTP_403_FORBIDDEN)
 
+class BulkLikeApiView(BulkCreateApiView):
+    serializer_class = BulkLikeSerializer
 
-class CommentApiViewSet(viewsets.ModelViewSet):
+
+class CommentApiViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     permission_classes = (IsAuthenticated, )
     serializer_class = CommentSerializer
-    queryset = Comment.objects.all()
+    pagination_class = CommentCursorPagination
+    queryset = Comment.objects.select_related('author')
+
+    def get_content(self):
+        """
+        Content of the url, fetched once per request
+        """
+        if getattr(self, '_content', None) is None:
+            self._content = get_object_or_404(Content, id=self.kwargs['content_id'])
+        return self._content
 
     def get_queryset(self):
-        content_id = self.kwargs['content_id']
-        content = Content.objects.get(id=content_id)
-        return self.queryset.filter(content=content)
+        return self.queryset.filter(content=self.get_content())
+
+    def int_param(self, name, default, maximum):
+        value = int(self.request.query_params.get(name, default))
+        return min(max(value, 0), maximum)
+
+    @action(detail=False, methods=['get'])
+    def thread(self, request, content_id=None):
+        """
+        Top level comments with nested replies, `?after=<id>` pages through threads
+        """
+        try:
+            after = self.int_param('after', 0, 2 ** 63 - 1)
+            limit = max(self.int_param('limit', 10, 100), 1)
+            depth = self.int_param('depth', 5, 20)
+            width = self.int_param('width', 50, 200)
+        except ValueError:
+            return Response({"message": "after, limit, depth and width must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+
+        roots, replies, children, next_after = load_comment_threads(content_id, after, limit, depth, width)
+        data = self.get_serializer(roots + replies, many=True).data
+        data_by_id = {item['id']: item for item in data}
+        return Response({
+            'next': next_after,
+            'results': [build_tree(root, data_by_id, children) for root in roots],
+        })
 
 
 class BookmarkApiViewSet(viewsets.GenericViewSet, 
@@ -142,7 +260,7 @@ class BookmarkApiViewSet(viewsets.GenericViewSet,
 
     permission_classes = (IsAuthenticated, )
     serializer_class = BookmarkSerializer
-    queryset = Bookmark.objects.all()
+    queryset = Bookmark.objects.select_related('content').prefetch_related('content__tags')
 
     def get_queryset(self):
         return self.queryset.filter(user=self.request.user)
@@ -150,7 +268,95 @@ class BookmarkApiViewSet(viewsets.GenericViewSet,
     def get_serializer_class(self, *args, **kwargs):
         if self.action == 'list':
             self.serializer_class = BookMarkListSerializer
+        elif self.action == 'bulk':
+            self.serializer_class = BulkBookmarkSerializer
         return self.serializer_class
 
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            results = serializer.save()
+        return Response({'results': results}, status=status.HTTP_201_CREATED)
 
-    
+
+class FollowApiViewSet(viewsets.GenericViewSet,
+                      ListModelMixin,
+                      CreateModelMixin,
+                      DestroyModelMixin):
+    """
+    Follow and unfollow authors, topics and tags
+    """
+    permission_classes = (IsAuthenticated, )
+    serializer_class = FollowSerializer
+    queryset = Follow.objects.all()
+
+    def get_queryset(self):
+        return self.queryset.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        # A concurrent follow of the same target can pass validation too,
+        # the unique constraint decides which one is created.
+        try:
+            with transaction.atomic():
+                serializer.save()
+        except IntegrityError:
+            raise ValidationError({'non_field_errors': ['Already followed']})
+
+    def perform_destroy(self, instance):
+        # Never below zero, a drifted count must not break the positive CHECK.
+        with transaction.atomic():
+            instance.delete()
+            if instance.author_id is not None:
+                User.objects.filter(pk=instance.author_id).update(follower_count=Case(
+                    When(follower_count__gt=0, then=F('follower_count') - 1), default=0
+                ))
+
+
+class FeedApiView(generics.GenericAPIView):
+    """
+    Home feed of the followed authors, topics and tags, `?before=<id>` pages back
+    """
+    permission_classes = (IsAuthenticated, )
+    serializer_class = ContentSerializer
+
+    def get(self, request):
+        try:
+            before = request.query_params.get('before')
+            before = int(before) if before is not None else None
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 100)
+        except ValueError:
+            return Response({"message": "before and limit must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+
+        contents, next_before = load_feed(request.user, before, limit)
+        return Response({
+            'next': next_before,
+            'results': self.get_serializer(contents, many=True).data,
+        })
+
+
+class ContentExportApiView(APIView):
+    """
+    Stream every published content as NDJSON, `?after=<id>` resumes an export
+    """
+    permission_classes = (IsAdminUser, )
+
+    def get(self, request):
+        try:
+            after = int(request.query_params.get('after', 0))
+            chunk_size = min(int(request.query_params.get('chunk_size', 1000)), 5000)
+        except ValueError:
+            return Response({"message": "after and chunk_size must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+        rows = iter_published_content(after=after, chunk_size=max(chunk_size, 1))
+        return StreamingHttpResponse(ndjson_lines(rows), content_type='application/x-ndjson')
+
+
+class ResponseCacheStatsApiView(APIView):
+    """
+    Hit and miss counters of this worker's response cache
+    """
+    permission_classes = (IsAdminUser, )
+
+    def get(self, request):
+        return Response(get_response_cache().stats())
@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -40,7 +43,8 @@ INSTALLED_APPS = [
     'rest_framework',
     'rest_framework_simplejwt',
     'core',
-    'user'
+    'user',
+    'article',
 ]
 
 MIDDLEWARE = [
@@ -77,19 +81,133 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# DB_ENGINE is 'sqlite3' or 'postgresql'. Connections come from the pool
+# in core/db/pool.py unless DB_POOL=0, which makes them persistent for
+# DB_CONN_MAX_AGE seconds per thread instead. PRAGMAS tune every SQLite
+# connection as it is opened, see core/signals.py.
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite3')
+DB_POOL = os.environ.get('DB_POOL', '1') != '0'
+DB_NAME = os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3' if DB_ENGINE == 'sqlite3' else None)
+
+if DB_NAME is None:
+    raise ImproperlyConfigured(f'DB_NAME must be set when DB_ENGINE is {DB_ENGINE!r}')
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'ENGINE': f'core.db.{DB_ENGINE}' if DB_POOL else f'django.db.backends.{DB_ENGINE}',
+        'NAME': DB_NAME,
+        'USER': os.environ.get('DB_USER', ''),
+        'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+        'HOST': os.environ.get('DB_HOST', ''),
+        'PORT': os.environ.get('DB_PORT', ''),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0 if DB_POOL else 60)),
+        'POOL': {
+            'MAX_SIZE': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'MAX_OVERFLOW': int(os.environ.get('DB_POOL_MAX_OVERFLOW', 10)),
+            'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 30)),
+            'RECYCLE': int(os.environ.get('DB_POOL_RECYCLE', 60 * 60)),
+            'CHECK_INTERVAL': int(os.environ.get('DB_POOL_CHECK_INTERVAL', 30)),
+        },
+        'PRAGMAS': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'mmap_size': 256 * 1024 * 1024,
+            'busy_timeout': 5000,
+        },
     }
 }
 
+if DB_ENGINE == 'sqlite3':
+    # A file rather than shared memory: the threaded like test needs SQLite's
+    # busy timeout instead of shared cache table locks, the pool tests fork
+    # and WAL does not apply to memory databases.
+    DATABASES['default']['TEST'] = {'NAME': BASE_DIR / 'test_db.sqlite3'}
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'user.authentication.CachedJWTAuthentication',
     )
 }
 
+# Users resolved from JWTs, see user/authentication.py. A local LRU only
+# hears about changes made in its own process, other workers catch up
+# within TIMEOUT. DjangoUserCache shares one cache alias between them.
+AUTH_USER_CACHE = {
+    'BACKEND': 'user.authentication.LocMemUserCache',
+    'OPTIONS': {
+        'max_entries': 10000,
+        'timeout': 60,
+    },
+}
+
+RESPONSE_CACHE = {
+    'ENABLED': True,
+    'BACKEND': 'article.cache.LocMemLRUCache',
+    'OPTIONS': {
+        'max_entries': 1000,
+        'timeout': 300,
+    },
+}
+
+# Weights of the trending score, see article/trending.py
+TRENDING = {
+    'LIKE_WEIGHT': 1.0,
+    'COMMENT_WEIGHT': 2.0,
+    'BOOKMARK_WEIGHT': 3.0,
+    'HALF_LIFE_HOURS': 24.0,
+}
+
+# Home feed fan-out, see article/feed.py
+FEED = {
+    'TIMELINE_LENGTH': 500,
+    'CELEBRITY_FOLLOWERS': 10000,
+    'BACKFILL': 20,
+    'BATCH_SIZE': 500,
+}
+
+# Uploaded avatars and topic images, see core/images.py. Formats the
+# installed Pillow can not encode are skipped.
+IMAGE_PIPELINE = {
+    'MAX_BYTES': 5 * 1024 * 1024,
+    'MAX_DIMENSION': 4096,
+    'SIZES': {'small': 64, 'medium': 256, 'large': 1024},
+    'FORMATS': ('webp', 'jpeg'),
+    'QUALITY': 82,
+}
+
+# Uploads are stored once per content hash and served as immutable, see
+# core/storage.py. Unreferenced files are removed by `manage.py
+# collect_media_garbage` after the grace period.
+DEFAULT_FILE_STORAGE = 'core.storage.ContentAddressedStorage'
+MEDIA_STORAGE = {
+    'PREFIX': 'blobs',
+    'CACHE_MAX_AGE': 365 * 24 * 60 * 60,
+    'GC_GRACE_SECONDS': 24 * 60 * 60,
+}
+
+# How /media/ is answered, see core/views.py. 'django' streams the file
+# (sendfile under gunicorn/uWSGI) with Range and conditional requests,
+# 'x-accel' hands the transfer to nginx through an internal location at
+# X_ACCEL_PREFIX and 'x-sendfile' to Apache mod_xsendfile.
+MEDIA_SERVING = {
+    'MODE': 'django',
+    'X_ACCEL_PREFIX': '/protected-media/',
+    'BLOCK_SIZE': 64 * 1024,
+}
+
+# Async variants of the read endpoints under api/article/async/, see
+# article/async_views.py. THREADS bounds the pool their queries run on.
+ASYNC_VIEWS = {
+    'THREADS': 16,
+}
+
+# Deferred work, run by `manage.py run_worker`. LocMemBroker and
+# ImmediateBroker from core/tasks.py keep tasks in process.
+TASK_QUEUE = {
+    'BROKER': 'core.tasks.DatabaseBroker',
+    'OPTIONS': {},
+}
+
 from datetime import timedelta
 
 SIMPLE_JWT = {
@@ -127,6 +245,8 @@ SIMPLE_JWT = {
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
+# Checked by the signup and reset password serializers after the
+# composition rule, see user/password_policy.py.
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -136,13 +256,32 @@ AUTH_PASSWORD_VALIDATORS = [
         'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
     },
     {
-        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+        'NAME': 'user.password_policy.CommonPasswordValidator',
     },
     {
         'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
     },
 ]
 
+# The first hasher hashes new passwords, the others only check existing
+# hashes, which are rehashed with the first one at the next login. Argon2
+# and bcrypt need argon2-cffi / bcrypt installed. Tune the costs with
+# `manage.py bench_hashers`, see user/hashers.py.
+PASSWORD_HASHERS = [
+    'user.hashers.ScryptPasswordHasher',
+    'user.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
+PASSWORD_HASHING = {
+    'SCRYPT_WORK_FACTOR': 2 ** 14,
+    'SCRYPT_BLOCK_SIZE': 8,
+    'SCRYPT_PARALLELISM': 1,
+    'PBKDF2_ITERATIONS': 260000,
+}
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/3.2/topics/i18n/
@@ -0,0 +1,249 @@
+import os
+from collections import deque
+from threading import Condition, Lock
+from time import monotonic
+
+
+DEFAULTS = {
+    'MAX_SIZE': 10,
+    'MAX_OVERFLOW': 10,
+    'TIMEOUT': 30,
+    'RECYCLE': 60 * 60,
+    'CHECK_INTERVAL': 30,
+}
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """
+    Keeps up to `max_size` released connections open for the next checkout.
+    Under load up to `max_overflow` more are opened, they are closed when
+    released. A checkout waits at most `timeout` seconds for a connection.
+
+    Connections older than `recycle` seconds are closed instead of reused,
+    one idle for more than `check_interval` seconds is pinged before it is
+    handed out and replaced if the ping fails.
+    """
+    def __init__(self, check=None, reset=None, max_size=10, max_overflow=10, timeout=30, recycle=3600,
+                 check_interval=30):
+        self.check = check
+        self.reset = reset
+        self.max_size = max_size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.check_interval = check_interval
+        self._idle = deque()
+        self._checked_out = {}
+        self._size = 0
+        self._closed = False
+        self._condition = Condition()
+        self._pid = os.getpid()
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def idle(self):
+        return len(self._idle)
+
+    def acquire(self, connect):
+        """
+        An open connection, `connect()` is called when a new one is needed
+        """
+        deadline = monotonic() + self.timeout
+        while True:
+            with self._condition:
+                while not self._idle and self._size >= self.max_size + self.max_overflow:
+                    remaining = deadline - monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeout(
+                            f'No connection released within {self.timeout}s, '
+                            f'all {self._size} are checked out'
+                        )
+                    self._condition.wait(remaining)
+                if self._idle:
+                    # Most recently released first, the others can age out.
+                    connection, opened_at, released_at = self._idle.pop()
+                else:
+                    connection = None
+                    self._size += 1
+
+            if connection is None:
+                try:
+                    connection = connect()
+                except BaseException:
+                    self._forget()
+                    raise
+                opened_at = monotonic()
+            elif not self._usable(connection, opened_at, released_at):
+                self._discard(connection)
+                continue
+
+            self._checked_out[id(connection)] = opened_at
+            return connection
+
+    def release(self, connection, reusable=True):
+        """
+        Give a checked out connection back, it is closed rather than kept
+        when not `reusable`, over the idle limit or too old
+        """
+        if os.getpid() != self._pid:
+            # Inherited through fork(), closing would also end the parent's
+            # session on the shared socket. Drop it, the parent closes it.
+            return
+        opened_at = self._checked_out.pop(id(connection), None)
+        if opened_at is None:
+            # Not from this pool, or checked out before the pool was closed.
+            self._close(connection)
+            return
+        if reusable and not self._closed and monotonic() - opened_at < self.recycle and self._reset(connection):
+            with self._condition:
+                if len(self._idle) < self.max_size:
+                    self._idle.append((connection, opened_at, monotonic()))
+                    self._condition.notify()
+                    return
+        self._discard(connection)
+
+    def close(self):
+        """
+        Close the idle connections, checked out ones are closed on release
+        """
+        if os.getpid() != self._pid:
+            return
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, deque()
+            self._size -= len(idle)
+            self._checked_out.clear()
+            self._condition.notify_all()
+        for connection, _, _ in idle:
+            self._close(connection)
+
+    def _usable(self, connection, opened_at, released_at):
+        now = monotonic()
+        if now - opened_at >= self.recycle:
+            return False
+        if self.check is None or now - released_at < self.check_interval:
+            return True
+        try:
+            return self.check(connection)
+        except Exception:
+            return False
+
+    def _reset(self, connection):
+        if self.reset is None:
+            return True
+        try:
+            self.reset(connection)
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, connection):
+        self._close(connection)
+        self._forget()
+
+    def _forget(self):
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+    def _close(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+_pools = {}
+_pools_lock = Lock()
+
+
+def _forget_pools():
+    # A forked child opens its own connections, the inherited ones stay the
+    # parent's. Its wrappers still hand them back to the old pools on close,
+    # which drop them without closing.
+    global _pools, _pools_lock
+    _pools = {}
+    _pools_lock = Lock()
+
+
+os.register_at_fork(after_in_child=_forget_pools)
+
+
+def pool_options(settings_dict):
+    options = {**DEFAULTS, **settings_dict.get('POOL', {})}
+    return {name.lower(): value for name, value in options.items()}
+
+
+def get_pool(alias, conn_params, **options):
+    """
+    Pool shared by every thread's connection to `alias` with these parameters,
+    so a test database or a changed NAME gets its own
+    """
+    key = (os.getpid(), alias, repr(sorted(conn_params.items())))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(**options)
+    return pool
+
+
+def close_pools(alias=None):
+    with _pools_lock:
+        keys = [key for key in _pools if alias is None or key[1] == alias]
+        pools = [_pools.pop(key) for key in keys]
+    for pool in pools:
+        pool.close()
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    Django database wrapper whose connect and close check connections out
+    of and back into the pool for its alias, pool limits come from the
+    POOL entry of the database settings. Combine with CONN_MAX_AGE = 0 to
+    hand the connection back at the end of every request.
+    """
+    def get_new_connection(self, conn_params):
+        self.pool = get_pool(
+            self.alias, conn_params, check=self.check_connection, reset=self.reset_connection,
+            **pool_options(self.settings_dict)
+        )
+        opened = []
+
+        def connect():
+            opened.append(True)
+            return super(PooledDatabaseWrapperMixin, self).get_new_connection(conn_params)
+
+        try:
+            connection = self.pool.acquire(connect)
+        except PoolTimeout as error:
+            raise self.Database.OperationalError(str(error)) from error
+        # Lets connection_created receivers skip per connection setup.
+        self.connection_reused = not opened
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        # Closed inside atomic(), the wrapper keeps pointing at the connection
+        # until the block exits, so it cannot go to another thread.
+        reusable = not self.in_atomic_block
+        with self.wrap_database_errors:
+            self.pool.release(self.connection, reusable=reusable)
+
+    def check_connection(self, connection):
+        cursor = connection.cursor()
+        try:
+            cursor.execute('SELECT 1')
+        finally:
+            cursor.close()
+        return True
+
+    def reset_connection(self, connection):
+        connection.rollback()
@@ -0,0 +1,23 @@
+from django.db.backends.postgresql import base, creation
+
+from core.db.pool import PooledDatabaseWrapperMixin, close_pools
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # DROP DATABASE fails while pooled sessions are still connected.
+        close_pools(self.connection.alias)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        # Only set by the backend on connections it opens, not reused ones.
+        self.isolation_level = connection.isolation_level
+        return connection
+
+    def check_connection(self, connection):
+        return not connection.closed and super().check_connection(connection)
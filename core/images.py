@@ -0,0 +1,190 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, features
+
+
+DEFAULTS = {
+    'MAX_BYTES': 5 * 1024 * 1024,
+    'MAX_DIMENSION': 4096,
+    'SIZES': {'small': 64, 'medium': 256, 'large': 1024},
+    'FORMATS': ('webp', 'jpeg'),
+    'QUALITY': 82,
+}
+
+ALLOWED_FORMATS = ('JPEG', 'PNG', 'WEBP', 'GIF')
+
+# Decoder info an encoder may copy into the output that is not metadata.
+KEPT_INFO = ('transparency',)
+
+ENCODERS = {
+    'webp': ('WEBP', {'method': 4}),
+    'jpeg': ('JPEG', {'optimize': True, 'progressive': True}),
+}
+
+
+def image_setting(name):
+    return getattr(settings, 'IMAGE_PIPELINE', {}).get(name, DEFAULTS[name])
+
+
+def rendition_formats():
+    """
+    Configured thumbnail formats this Pillow build can encode
+    """
+    return [fmt for fmt in image_setting('FORMATS') if fmt != 'webp' or features.check('webp')]
+
+
+def validate_image_upload(value):
+    """
+    Reject uploads over the byte or dimension limits before anything decodes
+    the pixels, Pillow only reads the header here
+    """
+    max_bytes = image_setting('MAX_BYTES')
+    if value.size > max_bytes:
+        raise ValidationError(f'Image must be at most {max_bytes // 1024} KB.')
+    position = value.tell() if hasattr(value, 'tell') else None
+    try:
+        with Image.open(value) as image:
+            width, height = image.size
+            image_format = image.format
+            # Only the first frame would be processed, refuse rather than flatten.
+            animated = getattr(image, 'is_animated', False)
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError('Upload a valid image.')
+    finally:
+        if position is not None:
+            value.seek(position)
+    if image_format not in ALLOWED_FORMATS:
+        raise ValidationError(f'Image format must be one of {", ".join(ALLOWED_FORMATS)}.')
+    if animated:
+        raise ValidationError('Animated images are not supported.')
+    max_dimension = image_setting('MAX_DIMENSION')
+    if width > max_dimension or height > max_dimension:
+        raise ValidationError(f'Image must be at most {max_dimension}x{max_dimension} pixels.')
+
+
+def encode(image, image_format, **options):
+    buffer = BytesIO()
+    # An empty exif keeps encoders from writing the one they were given.
+    image.save(buffer, image_format, exif=b'', **options)
+    return ContentFile(buffer.getvalue())
+
+
+def without_metadata(image):
+    """
+    Drop what the decoder read besides the pixels (EXIF, XMP, comments, text
+    chunks), PNG and GIF encoders write `info` back out otherwise
+    """
+    image.info = {key: value for key, value in image.info.items() if key in KEPT_INFO}
+    return image
+
+
+def has_alpha(image):
+    return image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+
+
+def for_encoder(image, encoder):
+    """
+    Convert to a mode the encoder takes, JPEG turns transparent pixels white
+    """
+    if not has_alpha(image):
+        return image.convert('RGB')
+    image = image.convert('RGBA')
+    if encoder != 'JPEG':
+        return image
+    background = Image.new('RGB', image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel('A'))
+    return background
+
+
+def replace(storage, name, content):
+    # Content addressed storage names the new bytes itself, the old file is
+    # released when the row stops referencing it.
+    if not getattr(storage, 'content_addressed', False) and storage.exists(name):
+        storage.delete(name)
+    return storage.save(name, content)
+
+
+def rendition_name(name, label, fmt):
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(directory, 'thumbs', stem, f'{label}.{fmt}')
+
+
+def process_image(field_file):
+    """
+    Re-encode an uploaded image without its metadata (EXIF, GPS, comments),
+    keeping only its ICC profile so colours survive, and write every
+    configured thumbnail size and format next to it. Returns the renditions
+    map stored on the model, its source is the cleaned image which keeps its
+    name unless the storage is content addressed.
+    """
+    storage, name = field_file.storage, field_file.name
+    with storage.open(name) as source:
+        with Image.open(source) as image:
+            image_format = image.format
+            icc_profile = image.info.get('icc_profile')
+            image = ImageOps.exif_transpose(image)
+            image.load()
+    image = without_metadata(image)
+
+    options = {'quality': 90} if image_format in ('JPEG', 'WEBP') else {}
+    if icc_profile:
+        options['icc_profile'] = icc_profile
+    if image_format == 'JPEG':
+        image = for_encoder(image, image_format)
+    name = replace(storage, name, encode(image, image_format, **options))
+
+    sizes = {}
+    for label, edge in image_setting('SIZES').items():
+        thumbnail = image.copy()
+        thumbnail.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+        for fmt in rendition_formats():
+            encoder, encoder_options = ENCODERS[fmt]
+            content = encode(for_encoder(thumbnail, encoder), encoder, quality=image_setting('QUALITY'), **encoder_options)
+            sizes.setdefault(label, {})[fmt] = replace(storage, rendition_name(name, label, fmt), content)
+    return {'source': name, 'sizes': sizes}
+
+
+def process_image_field(model, pk, field_name, renditions_field, name):
+    """
+    Process the image `name` of one row, unless it has been replaced since.
+    Saving only the image and renditions columns sends post_save so caches
+    drop the row.
+    """
+    instance = model.objects.filter(pk=pk, **{field_name: name}).first()
+    if instance is None:
+        return False
+    renditions = process_image(getattr(instance, field_name))
+    getattr(instance, field_name).name = renditions['source']
+    setattr(instance, renditions_field, renditions)
+    instance.save(update_fields=[field_name, renditions_field])
+    return True
+
+
+def current_renditions(instance, field_name, renditions_field):
+    """
+    Thumbnail names by size and format, empty until the current image is processed
+    """
+    renditions = getattr(instance, renditions_field) or {}
+    if not getattr(instance, field_name) or renditions.get('source') != getattr(instance, field_name).name:
+        return {}
+    return renditions.get('sizes', {})
+
+
+def needs_processing(instance, field_name, renditions_field):
+    name = getattr(instance, field_name).name
+    return bool(name) and (getattr(instance, renditions_field) or {}).get('source') != name
+
+
+def stored_names(name, renditions):
+    """
+    Every file a row references through one image field, a name once per reference
+    """
+    names = [name] if name else []
+    for formats in (renditions or {}).get('sizes', {}).values():
+        names.extend(formats.values())
+    return names
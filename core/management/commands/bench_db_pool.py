@@ -0,0 +1,114 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.test import override_settings
+
+from core.models import Content, Topic
+
+SEED_TITLE = 'bench-db-pool'
+
+# Environment of each run, settings.DATABASES is built from it.
+CASES = (
+    ('connect per request', {'DB_POOL': '0', 'DB_CONN_MAX_AGE': '0'}),
+    ('persistent', {'DB_POOL': '0', 'DB_CONN_MAX_AGE': '60'}),
+    ('pool', {'DB_POOL': '1', 'DB_CONN_MAX_AGE': '0'}),
+)
+
+
+class Command(BaseCommand):
+    """
+    Requests per second of the content detail endpoint, served by the WSGI
+    application on a pool of threads, when every request connects, with
+    persistent connections and with the connection pool. Each configuration
+    runs in its own process with the DB_* environment it is selected by,
+    against the database of the current environment.
+    """
+    help = 'Benchmark requests/sec with and without database connection pooling'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--cycles', type=int, default=2000, help='Connect/close cycles timed per run')
+        parser.add_argument('--worker', help='Run one case against this path and print the result')
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            return self.work(options)
+
+        topic = Topic.objects.create(title=SEED_TITLE)
+        try:
+            user = get_user_model().objects.create_user(email='pool@bench.local', username=SEED_TITLE)
+            content = Content.objects.create(author=user, topic=topic, title='pooled', body='body ' * 50, publish=True)
+            self.stdout.write(
+                f"{settings.DATABASES['default']['NAME']}: {options['requests']} requests, {options['threads']} threads"
+            )
+            for label, environment in CASES:
+                result = self.run_case(f'/api/article/contents/{content.id}/', environment, options)
+                self.stdout.write(
+                    f"  {label:<20} {result['rate']:>8.1f} req/s  "
+                    f"{result['cycle'] * 1_000_000:>8.1f} us per connect/close"
+                    + (f"  {result['failed']} failed" if result['failed'] else '')
+                )
+        finally:
+            Content.objects.filter(topic__title=SEED_TITLE).delete()
+            Topic.objects.filter(title=SEED_TITLE).delete()
+            get_user_model().objects.filter(username=SEED_TITLE).delete()
+
+    def run_case(self, path, environment, options):
+        command = [
+            sys.executable, str(settings.BASE_DIR / 'manage.py'), 'bench_db_pool', '--worker', path,
+            '--requests', str(options['requests']), '--threads', str(options['threads']),
+            '--cycles', str(options['cycles']),
+        ]
+        output = subprocess.run(
+            command, env={**os.environ, **environment}, check=True, capture_output=True, text=True
+        ).stdout
+        return json.loads(output.splitlines()[-1])
+
+    def work(self, options):
+        connection.close()
+        started = time.perf_counter()
+        for _ in range(options['cycles']):
+            connection.ensure_connection()
+            connection.close()
+        cycle = (time.perf_counter() - started) / options['cycles']
+
+        application = get_wsgi_application()
+
+        def request(_):
+            environ = {
+                'REQUEST_METHOD': 'GET', 'PATH_INFO': options['worker'], 'QUERY_STRING': '', 'SCRIPT_NAME': '',
+                'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'HTTP_HOST': 'testserver',
+                'wsgi.input': BytesIO(), 'wsgi.url_scheme': 'http', 'wsgi.errors': BytesIO(),
+            }
+            status = []
+            body = application(environ, lambda code, headers, exc_info=None: status.append(int(code[:3])))
+            try:
+                for _ in body:
+                    pass
+            finally:
+                body.close()
+            return status[0]
+
+        cache = {**getattr(settings, 'RESPONSE_CACHE', {}), 'ENABLED': False}
+        with override_settings(RESPONSE_CACHE=cache, ALLOWED_HOSTS=['testserver']):
+            started = time.perf_counter()
+            with ThreadPoolExecutor(options['threads']) as pool:
+                statuses = list(pool.map(request, range(options['requests'])))
+            elapsed = time.perf_counter() - started
+
+        self.stdout.write(json.dumps({
+            'rate': len(statuses) / elapsed,
+            'cycle': cycle,
+            'failed': sum(1 for status in statuses if status != 200),
+        }))
@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+from django.views.static import serve
+
+from core.views import serve_media
+
+
+class Command(BaseCommand):
+    """
+    Compare django.views.static.serve, the previous /media/ view, with
+    serve_media in each mode. Requests are made in process, so the numbers
+    are the Python side of a worker: building the response and pushing the
+    body through the iterator. Under gunicorn the 'django' mode body goes
+    through sendfile() instead and the x-accel/x-sendfile modes leave it to
+    the web server entirely.
+    """
+    help = 'Benchmark media serving views on generated files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='16384,1048576,16777216', help='Comma separated file sizes in bytes')
+        parser.add_argument('--seconds', type=float, default=2.0, help='Time spent on each case')
+        parser.add_argument('--range-bytes', type=int, default=64 * 1024,
+                            help='Length of the ranged request, taken from the middle of the file')
+
+    def handle(self, *args, **options):
+        root = tempfile.mkdtemp()
+        try:
+            with override_settings(MEDIA_ROOT=root):
+                self.run(root, options)
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+
+    def run(self, root, options):
+        factory = RequestFactory()
+        for size in (int(size) for size in options['sizes'].split(',')):
+            name = f'bench-{size}.bin'
+            with open(os.path.join(root, name), 'wb') as file:
+                file.write(os.urandom(size))
+            start = max(size // 2 - options['range_bytes'] // 2, 0)
+            ranged = {'HTTP_RANGE': f'bytes={start}-{start + options["range_bytes"] - 1}'}
+
+            static = lambda request: serve(request, name, document_root=root)
+            media = lambda request: serve_media(request, name)
+            cases = [
+                ('static.serve', static, None, {}),
+                ('static.serve range', static, None, ranged),
+                ('django', media, 'django', {}),
+                ('django range', media, 'django', ranged),
+                ('x-accel', media, 'x-accel', {}),
+                ('x-sendfile', media, 'x-sendfile', {}),
+            ]
+
+            self.stdout.write(f'{size} bytes')
+            for label, view, mode, headers in cases:
+                request = factory.get(f'/media/{name}', **headers)
+                with override_settings(MEDIA_SERVING={'MODE': mode or 'django'}):
+                    requests, sent, elapsed = self.measure(view, request, options['seconds'])
+                self.stdout.write(
+                    f'  {label:<20} {requests / elapsed:>10.0f} req/s {sent / elapsed / 2 ** 20:>10.1f} MiB/s'
+                )
+
+    def measure(self, view, request, seconds):
+        requests = sent = 0
+        started = time.perf_counter()
+        while time.perf_counter() - started < seconds:
+            response = view(request)
+            body = response.streaming_content if response.streaming else [response.content]
+            for chunk in body:
+                sent += len(chunk)
+            response.close()
+            requests += 1
+        return requests, sent, time.perf_counter() - started
@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+
+from core.storage import is_content_addressed, storage_setting
+
+
+class Command(BaseCommand):
+    """
+    Remove uploaded files no row has referenced for a while
+    """
+    help = 'Delete unreferenced files of the content addressed media storage'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-seconds', type=int, default=None,
+                            help="Keep files released more recently, MEDIA_STORAGE['GC_GRACE_SECONDS'] by default")
+        parser.add_argument('--orphans', action='store_true',
+                            help='Also walk the storage for files without a blob row')
+
+    def handle(self, *args, **options):
+        if not is_content_addressed(default_storage):
+            raise CommandError('DEFAULT_FILE_STORAGE is not content addressed')
+        seconds = options['grace_seconds']
+        grace = timedelta(seconds=storage_setting('GC_GRACE_SECONDS') if seconds is None else seconds)
+
+        collected = default_storage.collect_garbage(grace)
+        if options['orphans']:
+            collected += default_storage.collect_orphans(grace)
+        if options['verbosity'] > 1:
+            for name in collected:
+                self.stdout.write(name)
+        self.stdout.write(self.style.SUCCESS(f'Deleted {len(collected)} file(s)'))
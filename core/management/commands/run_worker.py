@@ -0,0 +1,59 @@
+from multiprocessing import Process
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.db.pool import close_pools
+from core.tasks import Worker
+
+
+def work(options):
+    worker = Worker(
+        batch_size=options['batch_size'],
+        poll_interval=options['poll_interval'],
+        stale_after=options['stale_after'],
+    )
+    return worker.run(burst=options['burst'])
+
+
+def work_in_child(options):
+    # Connections inherited from the parent must not be shared.
+    connections.close_all()
+    work(options)
+
+
+class Command(BaseCommand):
+    """
+    Run queued tasks, one worker per process
+    """
+    help = 'Run a pool of task queue workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1)
+        parser.add_argument('--batch-size', type=int, default=10)
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument('--stale-after', type=int, default=600,
+                            help='Seconds after which a running task is assumed lost and queued again')
+        parser.add_argument('--burst', action='store_true',
+                            help='Exit once the queue is empty instead of polling')
+
+    def handle(self, *args, **options):
+        if options['processes'] <= 1:
+            processed = work(options)
+            self.stdout.write(self.style.SUCCESS(f'Processed {processed} task(s)'))
+            return
+
+        # close_all() only returns pooled connections to the pool, close them
+        # so no child starts out holding the parent's.
+        connections.close_all()
+        close_pools()
+        processes = [Process(target=work_in_child, args=(options,)) for _ in range(options['processes'])]
+        for process in processes:
+            process.start()
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+        self.stdout.write(self.style.SUCCESS(f"Stopped {len(processes)} worker(s)"))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, IntegerField, OuterRef, Subquery, F
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core.models import Content, Like
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the denormalized Content.like_count from the Like table
+    """
+    help = 'Rebuild or reconcile Content.like_count against the Like table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report contents whose counter has drifted, do not write',
+        )
+
+    def handle(self, *args, **options):
+        actual = Subquery(
+            Like.objects.filter(content=OuterRef('pk'))
+            .order_by()
+            .values('content')
+            .annotate(total=Count('id'))
+            .values('total'),
+            output_field=IntegerField(),
+        )
+        counted = Content.objects.annotate(actual_likes=Coalesce(actual, 0))
+        drifted = counted.exclude(like_count=F('actual_likes'))
+
+        if options['check']:
+            total = 0
+            for content_id, stored, real in drifted.values_list('id', 'like_count', 'actual_likes').iterator():
+                total += 1
+                self.stdout.write(f'content {content_id}: stored {stored}, actual {real}')
+            self.stdout.write(f'{total} content(s) out of sync')
+            return
+
+        updated = Content.objects.filter(
+            id__in=drifted.values('id')
+        ).update(like_count=Coalesce(actual, 0), updated_at=timezone.now())
+        self.stdout.write(self.style.SUCCESS(f'Updated like count of {updated} content(s)'))
@@ -3,6 +3,8 @@ from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 from django.contrib.auth.models import BaseUserManager
 from uuid import uuid4
 import os
+
+from .images import validate_image_upload
 # Create your models here.
 
 
@@ -40,8 +42,10 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_superuser = models.BooleanField(default=False)
     is_staff = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
-    avatar = models.ImageField(upload_to=image_file_path, null=True, blank=True)
+    avatar = models.ImageField(upload_to=image_file_path, null=True, blank=True, validators=[validate_image_upload])
+    avatar_renditions = models.JSONField(default=dict, editable=False)
     password = models.CharField(max_length=255)
+    follower_count = models.PositiveIntegerField(default=0, editable=False)
 
     objects = UserManager()
 
@@ -49,15 +53,16 @@ class User(AbstractBaseUser, PermissionsMixin):
 
 
 class Tag(models.Model):
-    title = models.CharField(max_length=100)
+    title = models.CharField(max_length=100, unique=True)
 
     def __str__(self):
         return self.title
 
 
 class Topic(models.Model):
-    title = models.CharField(max_length=150)
-    image = models.ImageField(upload_to=image_file_path, null=True)
+    title = models.CharField(max_length=150, unique=True)
+    image = models.ImageField(upload_to=image_file_path, null=True, validators=[validate_image_upload])
+    image_renditions = models.JSONField(default=dict, editable=False)
 
     def __str__(self):
         return self.title
@@ -70,16 +75,51 @@ class Content(models.Model):
     body = models.TextField()
     publish = models.BooleanField(default=False)
     tags = models.ManyToManyField('Tag')
+    like_count = models.PositiveIntegerField(default=0, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['id'], condition=models.Q(publish=True), name='content_published_idx'),
+            models.Index(fields=['author', 'id'], condition=models.Q(publish=True), name='content_author_published_idx'),
+            models.Index(fields=['topic', 'id'], condition=models.Q(publish=True), name='content_topic_published_idx'),
+        ]
 
     def __str__(self) -> str:
         return self.title
 
 
+class ContentScore(models.Model):
+    """
+    Trending score of a published content, rebuilt by `recompute_trending`.
+    Only published contents have a row so the feed never joins on `publish`.
+    """
+    content = models.OneToOneField(Content, on_delete=models.CASCADE, primary_key=True, related_name='score')
+    score = models.FloatField(default=0)
+    likes = models.PositiveIntegerField(default=0)
+    comments = models.PositiveIntegerField(default=0)
+    bookmarks = models.PositiveIntegerField(default=0)
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-score', '-content'], name='content_score_rank_idx'),
+        ]
+
+
 class Comment(models.Model):
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     content = models.ForeignKey(Content, on_delete=models.CASCADE)
     reply = models.ForeignKey('self', on_delete=models.DO_NOTHING, null=True)
     body = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['content', 'id'], name='comment_content_id_idx'),
+        ]
 
     def __str__(self) -> str:
         return str(self.id)
@@ -90,6 +130,11 @@ class Like(models.Model):
     content = models.ForeignKey(Content, on_delete=models.CASCADE)
     liked = models.BooleanField(default=False)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'content'], name='unique_like_user_content'),
+        ]
+
     def __str__(self):
         return self.content.title
 
@@ -98,3 +143,106 @@ class Bookmark(models.Model):
     content = models.ForeignKey(Content, on_delete=models.CASCADE)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'content'], name='unique_bookmark_user_content'),
+        ]
+
+
+
+class Follow(models.Model):
+    """
+    A user following exactly one of an author, a topic or a tag
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='follows')
+    author = models.ForeignKey(User, on_delete=models.CASCADE, null=True, related_name='followers')
+    topic = models.ForeignKey(Topic, on_delete=models.CASCADE, null=True)
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, null=True)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                check=(
+                    models.Q(author__isnull=False, topic__isnull=True, tag__isnull=True)
+                    | models.Q(author__isnull=True, topic__isnull=False, tag__isnull=True)
+                    | models.Q(author__isnull=True, topic__isnull=True, tag__isnull=False)
+                ),
+                name='follow_one_target',
+            ),
+            models.UniqueConstraint(fields=['user', 'author'], condition=models.Q(author__isnull=False), name='unique_follow_author'),
+            models.UniqueConstraint(fields=['user', 'topic'], condition=models.Q(topic__isnull=False), name='unique_follow_topic'),
+            models.UniqueConstraint(fields=['user', 'tag'], condition=models.Q(tag__isnull=False), name='unique_follow_tag'),
+        ]
+
+
+class TimelineEntry(models.Model):
+    """
+    A content pushed into a user's home feed, see article/feed.py.
+    The (user, content) constraint doubles as the index feed pages scan.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    content = models.ForeignKey(Content, on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'content'], name='unique_timeline_user_content'),
+        ]
+
+
+class Task(models.Model):
+    """
+    A deferred call waiting for `run_worker`, see core/tasks.py
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    )
+
+    name = models.CharField(max_length=255)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_at = models.DateTimeField()
+    idempotency_key = models.CharField(max_length=255, null=True, unique=True)
+    locked_by = models.CharField(max_length=64, blank=True)
+    locked_at = models.DateTimeField(null=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['run_at', 'id'], condition=models.Q(status='pending'), name='task_pending_idx'),
+            models.Index(fields=['locked_at'], condition=models.Q(status='running'), name='task_running_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.name}#{self.id}'
+
+
+class MediaBlob(models.Model):
+    """
+    A file of ContentAddressedStorage and the number of rows referencing it,
+    see core/storage.py
+    """
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField()
+    references = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at'], condition=models.Q(references=0), name='media_blob_garbage_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,71 @@
+from collections import Counter
+
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.images import stored_names
+from core.models import Topic, User
+from core.storage import is_content_addressed
+
+
+IMAGE_FIELDS = {
+    User: ('avatar', 'avatar_renditions'),
+    Topic: ('image', 'image_renditions'),
+}
+
+
+def image_storage(sender):
+    return sender._meta.get_field(IMAGE_FIELDS[sender][0]).storage
+
+
+def current_names(instance):
+    field_name, renditions_field = IMAGE_FIELDS[type(instance)]
+    return stored_names(getattr(instance, field_name).name, getattr(instance, renditions_field))
+
+
+@receiver(pre_save, sender=User)
+@receiver(pre_save, sender=Topic)
+def remember_stored_files(sender, instance, update_fields=None, **kwargs):
+    # Read from the database rather than the instance, a concurrent save may
+    # have replaced the files this instance was loaded with.
+    instance._stored_names = None
+    field_name, renditions_field = IMAGE_FIELDS[sender]
+    if not is_content_addressed(image_storage(sender)):
+        return
+    if update_fields is not None and not {field_name, renditions_field} & set(update_fields):
+        return
+    stored = None
+    if instance.pk is not None:
+        stored = sender.objects.filter(pk=instance.pk).values_list(field_name, renditions_field).first()
+    instance._stored_names = stored_names(*stored) if stored else []
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Topic)
+def count_stored_file_references(sender, instance, **kwargs):
+    before = getattr(instance, '_stored_names', None)
+    if before is None:
+        return
+    before, after = Counter(before), Counter(current_names(instance))
+    storage = image_storage(sender)
+    storage.acquire(after - before)
+    storage.release(before - after)
+    instance._stored_names = None
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Topic)
+def release_stored_files(sender, instance, **kwargs):
+    storage = image_storage(sender)
+    if is_content_addressed(storage):
+        storage.release(current_names(instance))
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    # Pooled connections keep their pragmas, only new ones need them.
+    if connection.vendor != 'sqlite' or getattr(connection, 'connection_reused', False):
+        return
+    for name, value in connection.settings_dict.get('PRAGMAS', {}).items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
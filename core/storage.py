@@ -0,0 +1,168 @@
+import hashlib
+import os
+from collections import Counter
+from datetime import timedelta
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.models import MediaBlob
+
+
+DEFAULTS = {
+    'PREFIX': 'blobs',
+    'CACHE_MAX_AGE': 365 * 24 * 60 * 60,
+    'GC_GRACE_SECONDS': 24 * 60 * 60,
+}
+
+
+def storage_setting(name):
+    return getattr(settings, 'MEDIA_STORAGE', {}).get(name, DEFAULTS[name])
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Store every file once under the SHA-256 of its bytes, sharded as
+    `<prefix>/ab/cd/abcd....<ext>`. The requested name only contributes its
+    extension, so identical uploads share one file and a name never changes
+    content, which is what lets it be cached forever.
+
+    Each file has a MediaBlob row counting the model rows that reference it
+    (see core/signals.py). `delete` keeps referenced files, unreferenced ones
+    are removed by `manage.py collect_media_garbage`.
+    """
+    content_addressed = True
+    chunk_size = 64 * 1024
+
+    def get_available_name(self, name, max_length=None):
+        # Names are derived from the content, an existing file is the same file.
+        return name
+
+    def blob_name(self, digest, name):
+        extension = os.path.splitext(name)[1].lower()
+        return f"{storage_setting('PREFIX')}/{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+    def _save(self, name, content):
+        directory = self.path(storage_setting('PREFIX'))
+        os.makedirs(directory, exist_ok=True)
+        temporary = os.path.join(directory, f'.{uuid4().hex}.tmp')
+        digest, size = hashlib.sha256(), 0
+        fd = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o666)
+        try:
+            with os.fdopen(fd, 'wb') as destination:
+                for chunk in content.chunks(self.chunk_size):
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    digest.update(chunk)
+                    size += len(chunk)
+                    destination.write(chunk)
+            name = self.blob_name(digest.hexdigest(), name)
+            self.register(name, size)
+            full_path = self.path(name)
+            if os.path.exists(full_path):
+                os.remove(temporary)
+            else:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                os.replace(temporary, full_path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(full_path, self.file_permissions_mode)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+        return name
+
+    def register(self, name, size):
+        """
+        Create or touch the blob row before the file is written, so garbage
+        collection running concurrently either waits for it or sees a fresh
+        blob inside the grace period
+        """
+        now = timezone.now()
+        if MediaBlob.objects.filter(name=name).update(updated_at=now):
+            return
+        try:
+            with transaction.atomic():
+                MediaBlob.objects.create(name=name, size=size)
+        except IntegrityError:
+            MediaBlob.objects.filter(name=name).update(updated_at=now)
+
+    def acquire(self, names):
+        self._count(Counter(names), 1)
+
+    def release(self, names):
+        self._count(Counter(names), -1)
+
+    def _count(self, counts, sign):
+        now = timezone.now()
+        for name, count in counts.items():
+            blobs = MediaBlob.objects.filter(name=name)
+            if sign < 0:
+                blobs = blobs.filter(references__gte=count)
+            blobs.update(references=F('references') + sign * count, updated_at=now)
+
+    def delete(self, name):
+        """
+        Remove the file unless a row still references it
+        """
+        with transaction.atomic():
+            blobs = MediaBlob.objects.filter(name=name)
+            if blobs.filter(references__gt=0).exists():
+                return False
+            blobs.delete()
+            super().delete(name)
+        return True
+
+    def collect_garbage(self, grace=None):
+        """
+        Delete files nothing has referenced for the grace period, returns
+        their names
+        """
+        if grace is None:
+            grace = timedelta(seconds=storage_setting('GC_GRACE_SECONDS'))
+        cutoff = timezone.now() - grace
+        collected = []
+        candidates = MediaBlob.objects.filter(references=0, updated_at__lt=cutoff).values_list('name', flat=True)
+        for name in list(candidates):
+            with transaction.atomic():
+                # The conditions are checked again so a blob uploaded or
+                # referenced since the listing survives.
+                deleted, _ = MediaBlob.objects.filter(name=name, references=0, updated_at__lt=cutoff).delete()
+                if deleted:
+                    super().delete(name)
+                    collected.append(name)
+        return collected
+
+    def collect_orphans(self, grace=None):
+        """
+        Delete files without a blob row, left behind by uploads whose
+        transaction rolled back. Walks the whole prefix directory.
+        """
+        if grace is None:
+            grace = timedelta(seconds=storage_setting('GC_GRACE_SECONDS'))
+        cutoff = (timezone.now() - grace).timestamp()
+        root = self.path(storage_setting('PREFIX'))
+        collected = []
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                full_path = os.path.join(directory, filename)
+                if os.path.getmtime(full_path) >= cutoff:
+                    continue
+                name = os.path.relpath(full_path, self.location).replace(os.sep, '/')
+                if filename.endswith('.tmp') or not MediaBlob.objects.filter(name=name).exists():
+                    os.remove(full_path)
+                    collected.append(name)
+        return collected
+
+    def cache_control(self, name):
+        if name.startswith(f"{storage_setting('PREFIX')}/"):
+            return f"public, max-age={storage_setting('CACHE_MAX_AGE')}, immutable"
+        return None
+
+
+def is_content_addressed(storage):
+    return getattr(storage, 'content_addressed', False)
@@ -0,0 +1,306 @@
+import logging
+import traceback
+from collections import OrderedDict
+from datetime import timedelta
+from itertools import count
+from threading import Lock
+from time import sleep
+from uuid import uuid4
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules, import_string
+
+from core.models import Task
+
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+STALE_ERROR = 'Worker stopped before the task finished'
+
+
+class QueuedTask:
+    """
+    A function that can run now or be deferred to a worker with `delay`
+    """
+    def __init__(self, func, name, max_attempts, retry_delay):
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, idempotency_key=None, countdown=0, **kwargs):
+        """
+        Queue a call, arguments must be JSON serializable. A second call with
+        the same idempotency key returns the first task instead of queueing.
+        """
+        return get_broker().enqueue(
+            self.name, list(args), kwargs,
+            idempotency_key=idempotency_key,
+            max_attempts=self.max_attempts,
+            run_at=timezone.now() + timedelta(seconds=countdown),
+        )
+
+    def backoff(self, attempts):
+        return timedelta(seconds=self.retry_delay * 2 ** (attempts - 1))
+
+
+def task(func=None, *, name=None, max_attempts=3, retry_delay=10):
+    """
+    Register a function in the task queue, `<app>.tasks` modules are imported by the worker
+    """
+    def register(func):
+        queued = QueuedTask(func, name or f'{func.__module__}.{func.__qualname__}', max_attempts, retry_delay)
+        _registry[queued.name] = queued
+        return queued
+    return register(func) if func is not None else register
+
+
+def get_task(name):
+    return _registry[name]
+
+
+class BaseBroker:
+    """
+    Stores queued tasks and hands them to workers. Jobs are `core.models.Task`
+    instances whether or not the broker keeps them in the database.
+    """
+    def enqueue(self, name, args, kwargs, idempotency_key=None, max_attempts=3, run_at=None):
+        raise NotImplementedError
+
+    def claim(self, worker_id, limit):
+        raise NotImplementedError
+
+    def complete(self, job):
+        raise NotImplementedError
+
+    def retry(self, job, error, run_at):
+        raise NotImplementedError
+
+    def fail(self, job, error):
+        raise NotImplementedError
+
+    def requeue_stale(self, older_than):
+        return 0
+
+
+class DatabaseBroker(BaseBroker):
+    """
+    Tasks are rows of core_task written in the caller's transaction, so a
+    task is only visible to workers once the data it refers to is committed.
+    Outside a transaction the row commits at once, queue from inside
+    `atomic()` when the task reads rows written after the enqueue.
+    """
+    def enqueue(self, name, args, kwargs, idempotency_key=None, max_attempts=3, run_at=None):
+        job = Task(
+            name=name, args=args, kwargs=kwargs, idempotency_key=idempotency_key,
+            max_attempts=max_attempts, run_at=run_at or timezone.now(),
+        )
+        if idempotency_key is None:
+            job.save()
+            return job
+        try:
+            with transaction.atomic():
+                job.save()
+        except IntegrityError:
+            return Task.objects.get(idempotency_key=idempotency_key)
+        return job
+
+    def claim(self, worker_id, limit):
+        # The status check in the outer UPDATE makes concurrent claims of the
+        # same row lose instead of running it twice.
+        now = timezone.now()
+        due = Task.objects.filter(status=Task.PENDING, run_at__lte=now).order_by('run_at', 'id')
+        claimed = Task.objects.filter(
+            id__in=list(due.values_list('id', flat=True)[:limit]), status=Task.PENDING
+        ).update(status=Task.RUNNING, locked_by=worker_id, locked_at=now, updated_at=now)
+        if not claimed:
+            return []
+        return list(Task.objects.filter(status=Task.RUNNING, locked_by=worker_id, locked_at=now).order_by('id'))
+
+    def complete(self, job):
+        Task.objects.filter(id=job.id).update(
+            status=Task.DONE, attempts=job.attempts, last_error='', updated_at=timezone.now()
+        )
+
+    def retry(self, job, error, run_at):
+        Task.objects.filter(id=job.id).update(
+            status=Task.PENDING, attempts=job.attempts, run_at=run_at,
+            last_error=error, locked_by='', updated_at=timezone.now(),
+        )
+
+    def fail(self, job, error):
+        Task.objects.filter(id=job.id).update(
+            status=Task.FAILED, attempts=job.attempts, last_error=error, updated_at=timezone.now()
+        )
+
+    def requeue_stale(self, older_than):
+        """
+        Hand tasks of workers that died mid run back to the queue. The run
+        that died counts as an attempt, a task that keeps killing its worker
+        fails once it has used them all.
+        """
+        now = timezone.now()
+        stale = Task.objects.filter(status=Task.RUNNING, locked_at__lt=older_than)
+        stale.filter(attempts__gte=F('max_attempts') - 1).update(
+            status=Task.FAILED, attempts=F('attempts') + 1, last_error=STALE_ERROR,
+            locked_by='', updated_at=now,
+        )
+        return stale.update(
+            status=Task.PENDING, attempts=F('attempts') + 1, last_error=STALE_ERROR,
+            locked_by='', updated_at=now,
+        )
+
+
+class LocMemBroker(BaseBroker):
+    """
+    In process stand-in for tests and development, tasks vanish with the
+    process. Tasks are queued when the surrounding transaction commits.
+    """
+    def __init__(self):
+        self._jobs = OrderedDict()
+        self._keys = {}
+        self._ids = count(1)
+        self._lock = Lock()
+
+    def enqueue(self, name, args, kwargs, idempotency_key=None, max_attempts=3, run_at=None):
+        with self._lock:
+            if idempotency_key is not None and idempotency_key in self._keys:
+                return self._jobs[self._keys[idempotency_key]]
+        job = Task(
+            name=name, args=args, kwargs=kwargs, idempotency_key=idempotency_key,
+            max_attempts=max_attempts, run_at=run_at or timezone.now(),
+        )
+        transaction.on_commit(lambda: self._add(job))
+        return job
+
+    def _add(self, job):
+        with self._lock:
+            if job.idempotency_key is not None and job.idempotency_key in self._keys:
+                return
+            job.id = next(self._ids)
+            self._jobs[job.id] = job
+            if job.idempotency_key is not None:
+                self._keys[job.idempotency_key] = job.id
+
+    def claim(self, worker_id, limit):
+        now = timezone.now()
+        with self._lock:
+            due = [
+                job for job in self._jobs.values()
+                if job.status == Task.PENDING and job.run_at <= now
+            ][:limit]
+            for job in due:
+                job.status, job.locked_by, job.locked_at = Task.RUNNING, worker_id, now
+        return due
+
+    def complete(self, job):
+        job.status = Task.DONE
+
+    def retry(self, job, error, run_at):
+        job.status, job.run_at, job.last_error = Task.PENDING, run_at, error
+
+    def fail(self, job, error):
+        job.status, job.last_error = Task.FAILED, error
+
+    def pending(self):
+        return [job for job in self._jobs.values() if job.status == Task.PENDING]
+
+
+class ImmediateBroker(LocMemBroker):
+    """
+    Run every task in process as soon as the surrounding transaction commits
+    """
+    def enqueue(self, *args, **kwargs):
+        job = super().enqueue(*args, **kwargs)
+        transaction.on_commit(self.drain)
+        return job
+
+    def drain(self):
+        worker = Worker(self)
+        while worker.run_once():
+            pass
+
+
+_broker = None
+_broker_config = None
+
+
+def get_broker():
+    """
+    Broker configured by settings.TASK_QUEUE, the database by default
+    """
+    global _broker, _broker_config
+    config = getattr(settings, 'TASK_QUEUE', {})
+    if _broker is None or _broker_config is not config:
+        backend = import_string(config.get('BROKER', 'core.tasks.DatabaseBroker'))
+        _broker = backend(**config.get('OPTIONS', {}))
+        _broker_config = config
+    return _broker
+
+
+def run_job(broker, job):
+    """
+    Run one claimed job, scheduling a retry with exponential backoff on failure
+    """
+    try:
+        queued = get_task(job.name)
+    except KeyError:
+        job.attempts += 1
+        broker.fail(job, f'Unknown task {job.name}')
+        return False
+    try:
+        queued.func(*job.args, **job.kwargs)
+    except Exception:
+        job.attempts += 1
+        error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            logger.warning('Task %s failed, retry %s of %s', job, job.attempts, job.max_attempts - 1)
+            broker.retry(job, error, timezone.now() + queued.backoff(job.attempts))
+        else:
+            logger.error('Task %s failed for good\n%s', job, error)
+            broker.fail(job, error)
+        return False
+    job.attempts += 1
+    broker.complete(job)
+    return True
+
+
+class Worker:
+    """
+    Claim due tasks in batches and run them until stopped
+    """
+    def __init__(self, broker=None, batch_size=10, poll_interval=1.0, stale_after=600):
+        self.broker = broker or get_broker()
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.id = uuid4().hex
+
+    def run_once(self):
+        self.broker.requeue_stale(timezone.now() - timedelta(seconds=self.stale_after))
+        jobs = self.broker.claim(self.id, self.batch_size)
+        for job in jobs:
+            run_job(self.broker, job)
+        return len(jobs)
+
+    def run(self, burst=False):
+        """
+        Work forever, or until the queue is empty when `burst` is set
+        """
+        autodiscover_modules('tasks')
+        processed = 0
+        while True:
+            done = self.run_once()
+            processed += done
+            if not done:
+                if burst:
+                    return processed
+                sleep(self.poll_interval)
@@ -1,3 +1,540 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import skipUnless
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from core.db.pool import ConnectionPool, PoolTimeout
+from core.models import MediaBlob, Task, Topic, User
+from core.tasks import DatabaseBroker, LocMemBroker, Worker, task
+from core.views import serve_media
+
+
+calls = []
+
+
+@task(max_attempts=3, retry_delay=0)
+def record(value):
+    calls.append(value)
+
+
+@task(max_attempts=2, retry_delay=60)
+def explode():
+    raise RuntimeError('boom')
+
+
+@override_settings(TASK_QUEUE={'BROKER': 'core.tasks.DatabaseBroker'})
+class DatabaseBrokerTests(TestCase):
+    """
+    Task queue backed by the core_task table
+    """
+    def setUp(self):
+        calls.clear()
+
+    def test_delay_and_run(self):
+        """
+        Test a queued task runs once on the worker
+        """
+        job = record.delay(1)
+        self.assertEqual(Task.objects.get(id=job.id).status, Task.PENDING)
+
+        self.assertEqual(Worker(batch_size=5).run(burst=True), 1)
+
+        self.assertEqual(calls, [1])
+        self.assertEqual(Task.objects.get(id=job.id).status, Task.DONE)
+
+    def test_idempotency_key(self):
+        """
+        Test queueing twice with one key keeps a single task
+        """
+        first = record.delay(1, idempotency_key='record:1')
+        second = record.delay(1, idempotency_key='record:1')
+
+        self.assertEqual(first.id, second.id)
+        Worker().run(burst=True)
+        self.assertEqual(calls, [1])
+
+    def test_retry_then_fail(self):
+        """
+        Test a failing task is retried with backoff then marked failed
+        """
+        job = explode.delay()
+        with self.assertLogs('core.tasks', 'WARNING'):
+            Worker().run_once()
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Task.PENDING, 1))
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=50))
+        self.assertIn('boom', job.last_error)
+
+        Task.objects.filter(id=job.id).update(run_at=timezone.now())
+        with self.assertLogs('core.tasks', 'ERROR'):
+            Worker().run_once()
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Task.FAILED, 2))
+
+    def test_claim_is_exclusive(self):
+        """
+        Test two workers never claim the same task
+        """
+        for value in range(4):
+            record.delay(value)
+        broker = DatabaseBroker()
+
+        first = broker.claim('first', 3)
+        second = broker.claim('second', 3)
+
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 1)
+        self.assertFalse({job.id for job in first} & {job.id for job in second})
+
+    def test_stale_tasks_requeued(self):
+        """
+        Test tasks of a worker that died are run again
+        """
+        record.delay(1)
+        DatabaseBroker().claim('dead', 1)
+        Task.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+
+        Worker(stale_after=60).run(burst=True)
+
+        self.assertEqual(calls, [1])
+
+    def test_stale_task_fails_after_max_attempts(self):
+        """
+        Test a task whose worker keeps dying counts those runs and fails for good
+        """
+        job = record.delay(1)
+        for attempt in range(1, 4):
+            DatabaseBroker().claim('dead', 1)
+            Task.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+            DatabaseBroker().requeue_stale(timezone.now() - timedelta(seconds=60))
+
+            job.refresh_from_db()
+            self.assertEqual(job.attempts, attempt)
+        self.assertEqual(job.status, Task.FAILED)
+        self.assertIn('Worker stopped', job.last_error)
+        self.assertEqual(DatabaseBroker().claim('next', 1), [])
+
+    def test_run_worker_command(self):
+        """
+        Test the command drains the queue in burst mode
+        """
+        record.delay(1)
+        out = StringIO()
+        call_command('run_worker', '--burst', stdout=out)
+
+        self.assertIn('Processed 1 task(s)', out.getvalue())
+        self.assertEqual(calls, [1])
+
+
+class LocMemBrokerTests(TestCase):
+    """
+    In process stand-in broker
+    """
+    def setUp(self):
+        calls.clear()
+        self.broker = LocMemBroker()
+
+    def test_queued_on_commit(self):
+        """
+        Test tasks only become due once the transaction commits
+        """
+        with override_settings(TASK_QUEUE={'BROKER': 'core.tasks.LocMemBroker'}):
+            with self.captureOnCommitCallbacks(execute=True):
+                record.delay(1, idempotency_key='once')
+                record.delay(1, idempotency_key='once')
+                self.assertEqual(Worker().run_once(), 0)
+            self.assertEqual(Worker().run_once(), 1)
+
+        self.assertEqual(calls, [1])
+        self.assertFalse(Task.objects.exists())
+
+    def test_rolled_back_task_dropped(self):
+        """
+        Test a task queued in a rolled back transaction never runs
+        """
+        with self.captureOnCommitCallbacks(execute=False):
+            self.broker.enqueue(record.name, [1], {})
+
+        self.assertEqual(Worker(self.broker).run_once(), 0)
+        self.assertEqual(self.broker.pending(), [])
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    DEFAULT_FILE_STORAGE='core.storage.ContentAddressedStorage',
+    TASK_QUEUE={'BROKER': 'core.tasks.LocMemBroker'},
+)
+class ContentAddressedStorageTests(TestCase):
+    """
+    Uploads stored once per content hash and reference counted
+    """
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def create_user(self, email, avatar=None):
+        username = email.split('@')[0]
+        return User.objects.create_user(email=email, password='test132456', username=username, avatar=avatar)
+
+    def blob(self, name):
+        return MediaBlob.objects.get(name=name)
+
+    def test_identical_uploads_share_a_file(self):
+        """
+        Test saving the same bytes twice stores one sharded file
+        """
+        first = default_storage.save('upload/images/one.PNG', ContentFile(b'same bytes'))
+        second = default_storage.save('upload/images/two.png', ContentFile(b'same bytes'))
+
+        self.assertEqual(first, second)
+        digest = os.path.splitext(os.path.basename(first))[0]
+        self.assertEqual(first, f'blobs/{digest[:2]}/{digest[2:4]}/{digest}.png')
+        self.assertEqual(os.listdir(os.path.dirname(default_storage.path(first))), [f'{digest}.png'])
+        self.assertEqual(self.blob(first).size, len(b'same bytes'))
+        self.assertNotEqual(default_storage.save('three.png', ContentFile(b'other bytes')), first)
+
+    def test_references_follow_rows(self):
+        """
+        Test rows acquire and release the files they point to
+        """
+        first = self.create_user('first@email.com', SimpleUploadedFile('a.png', b'avatar'))
+        second = self.create_user('second@email.com', SimpleUploadedFile('b.png', b'avatar'))
+        name = first.avatar.name
+        self.assertEqual(second.avatar.name, name)
+        self.assertEqual(self.blob(name).references, 2)
+
+        second.avatar = SimpleUploadedFile('c.png', b'other avatar')
+        second.save()
+        self.assertEqual(self.blob(name).references, 1)
+        self.assertEqual(self.blob(second.avatar.name).references, 1)
+
+        first.delete()
+        self.assertEqual(self.blob(name).references, 0)
+
+    def test_renditions_are_references(self):
+        """
+        Test thumbnails listed in the renditions count like the image
+        """
+        topic = Topic.objects.create(title='python', image=SimpleUploadedFile('t.png', b'topic'))
+        thumbnail = default_storage.save('small.jpeg', ContentFile(b'thumbnail'))
+        topic.image_renditions = {'source': topic.image.name, 'sizes': {'small': {'jpeg': thumbnail}, 'medium': {'jpeg': thumbnail}}}
+        topic.save(update_fields=['image_renditions'])
+        self.assertEqual(self.blob(thumbnail).references, 2)
+
+        topic.image_renditions = {}
+        topic.save()
+        self.assertEqual(self.blob(thumbnail).references, 0)
+        self.assertEqual(self.blob(topic.image.name).references, 1)
+
+    def test_delete_keeps_referenced_files(self):
+        """
+        Test deleting a name still referenced by a row leaves the file
+        """
+        user = self.create_user('user@email.com', SimpleUploadedFile('a.png', b'avatar'))
+
+        self.assertFalse(default_storage.delete(user.avatar.name))
+        self.assertTrue(default_storage.exists(user.avatar.name))
+
+    def test_collect_garbage(self):
+        """
+        Test only files unreferenced for the grace period are removed
+        """
+        user = self.create_user('user@email.com', SimpleUploadedFile('a.png', b'avatar'))
+        released = default_storage.save('released.png', ContentFile(b'released'))
+        fresh = default_storage.save('fresh.png', ContentFile(b'fresh'))
+        MediaBlob.objects.exclude(name=fresh).update(updated_at=timezone.now() - timedelta(days=2))
+
+        out = StringIO()
+        call_command('collect_media_garbage', '--grace-seconds', '3600', stdout=out)
+
+        self.assertIn('Deleted 1 file(s)', out.getvalue())
+        self.assertFalse(default_storage.exists(released))
+        self.assertFalse(MediaBlob.objects.filter(name=released).exists())
+        self.assertTrue(default_storage.exists(fresh))
+        self.assertTrue(default_storage.exists(user.avatar.name))
+
+    def test_collect_orphans(self):
+        """
+        Test files without a blob row are removed once old enough
+        """
+        name = default_storage.save('orphan.png', ContentFile(b'orphan'))
+        MediaBlob.objects.filter(name=name).delete()
+        old = (timezone.now() - timedelta(days=2)).timestamp()
+        os.utime(default_storage.path(name), (old, old))
+
+        self.assertEqual(default_storage.collect_orphans(timedelta(hours=1)), [name])
+        self.assertFalse(default_storage.exists(name))
+
+    def test_served_immutable(self):
+        """
+        Test content addressed files get far future cache headers
+        """
+        name = default_storage.save('a.png', ContentFile(b'avatar'))
+        with open(os.path.join(MEDIA_ROOT, 'plain.txt'), 'w') as plain:
+            plain.write('plain')
+
+        response = serve_media(RequestFactory().get(f'/media/{name}'), name)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        response = serve_media(RequestFactory().get('/media/plain.txt'), 'plain.txt')
+        self.assertNotIn('Cache-Control', response)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class MediaServingTests(TestCase):
+    """
+    Media files served with Range and conditional requests or by the web server
+    """
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(MEDIA_ROOT, exist_ok=True)
+        with open(os.path.join(MEDIA_ROOT, 'file.txt'), 'wb') as file:
+            file.write(bytes(range(100)))
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def get(self, path='/media/file.txt', **headers):
+        return self.client.get(path, **headers)
+
+    def body(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_whole_file(self):
+        """
+        Test a plain request gets the file with its validators
+        """
+        res = self.get()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self.body(res), bytes(range(100)))
+        self.assertEqual(res['Content-Length'], '100')
+        self.assertEqual(res['Content-Type'], 'text/plain')
+        self.assertEqual(res['Accept-Ranges'], 'bytes')
+        self.assertIn('ETag', res)
+        self.assertIn('Last-Modified', res)
+
+    def test_ranges(self):
+        """
+        Test bounded, open and suffix ranges are answered with 206
+        """
+        for header, start, end in (('bytes=10-19', 10, 19), ('bytes=90-', 90, 99), ('bytes=-5', 95, 99), ('bytes=95-500', 95, 99)):
+            res = self.get(HTTP_RANGE=header)
+            self.assertEqual(res.status_code, 206)
+            self.assertEqual(res['Content-Range'], f'bytes {start}-{end}/100')
+            self.assertEqual(res['Content-Length'], str(end - start + 1))
+            self.assertEqual(self.body(res), bytes(range(start, end + 1)))
+
+    def test_unsatisfiable_range(self):
+        """
+        Test a range past the end gets 416 and unusable ranges the whole file
+        """
+        res = self.get(HTTP_RANGE='bytes=100-')
+        self.assertEqual(res.status_code, 416)
+        self.assertEqual(res['Content-Range'], 'bytes */100')
+
+        for header in ('bytes=20-10', 'bytes=0-1,5-6', 'lines=1-2'):
+            self.assertEqual(self.get(HTTP_RANGE=header).status_code, 200)
+
+    def test_conditional(self):
+        """
+        Test a matching validator gets 304 and a stale If-Range the whole file
+        """
+        etag = self.get()['ETag']
+
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag).status_code, 206)
+        self.assertEqual(self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"').status_code, 200)
+
+    def test_missing_and_outside(self):
+        """
+        Test missing files and paths leaving MEDIA_ROOT are not found
+        """
+        self.assertEqual(self.get('/media/missing.txt').status_code, 404)
+        self.assertEqual(self.get('/media/../config/settings.py').status_code, 404)
+        self.assertEqual(self.client.post('/media/file.txt').status_code, 405)
+
+    @override_settings(MEDIA_SERVING={'MODE': 'x-accel', 'X_ACCEL_PREFIX': '/internal/'})
+    def test_x_accel_redirect(self):
+        """
+        Test nginx mode hands the path to the internal location
+        """
+        res = self.get()
+
+        self.assertEqual(res.content, b'')
+        self.assertEqual(res['X-Accel-Redirect'], '/internal/file.txt')
+        self.assertEqual(res['Content-Type'], 'text/plain')
+
+    @override_settings(MEDIA_SERVING={'MODE': 'x-sendfile'})
+    def test_x_sendfile(self):
+        """
+        Test Apache mode hands the absolute path
+        """
+        res = self.get()
+
+        self.assertEqual(res['X-Sendfile'], os.path.join(os.path.realpath(MEDIA_ROOT), 'file.txt'))
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+    def rollback(self):
+        pass
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """
+    Connections kept open between checkouts within the size limits
+    """
+    def test_released_connection_reused(self):
+        """
+        Test a released connection is handed out again without connecting
+        """
+        pool = ConnectionPool(max_size=1, max_overflow=0)
+        first = pool.acquire(FakeConnection)
+        pool.release(first)
+
+        self.assertIs(pool.acquire(FakeConnection), first)
+        self.assertEqual(pool.size, 1)
+
+    def test_overflow_closed_on_release(self):
+        """
+        Test connections over max_size are closed when released
+        """
+        pool = ConnectionPool(max_size=1, max_overflow=1)
+        first, second = pool.acquire(FakeConnection), pool.acquire(FakeConnection)
+        pool.release(first)
+        pool.release(second)
+
+        self.assertFalse(first.closed)
+        self.assertTrue(second.closed)
+        self.assertEqual((pool.size, pool.idle), (1, 1))
+
+    def test_timeout_when_exhausted(self):
+        """
+        Test a checkout fails once max_size + max_overflow are checked out
+        """
+        pool = ConnectionPool(max_size=1, max_overflow=1, timeout=0.01)
+        pool.acquire(FakeConnection)
+        pool.acquire(FakeConnection)
+
+        with self.assertRaises(PoolTimeout):
+            pool.acquire(FakeConnection)
+
+    def test_failed_health_check_replaced(self):
+        """
+        Test an idle connection failing its check is closed and replaced
+        """
+        pool = ConnectionPool(check=lambda connection: False, check_interval=0)
+        first = pool.acquire(FakeConnection)
+        pool.release(first)
+
+        second = pool.acquire(FakeConnection)
+        self.assertIsNot(second, first)
+        self.assertTrue(first.closed)
+        self.assertEqual(pool.size, 1)
+
+    def test_old_connection_recycled(self):
+        """
+        Test connections older than recycle are closed instead of kept
+        """
+        pool = ConnectionPool(recycle=0)
+        first = pool.acquire(FakeConnection)
+        pool.release(first)
+
+        self.assertTrue(first.closed)
+        self.assertEqual(pool.size, 0)
+
+    def test_failed_reset_discarded(self):
+        """
+        Test a connection that can not be rolled back is not kept
+        """
+        def reset(connection):
+            raise RuntimeError('connection lost')
+
+        pool = ConnectionPool(reset=reset)
+        first = pool.acquire(FakeConnection)
+        pool.release(first)
+
+        self.assertTrue(first.closed)
+        self.assertEqual(pool.idle, 0)
+
+
+class PooledDatabaseTests(TestCase):
+    """
+    The pooled SQLite backend and its pragmas
+    """
+    @skipUnless(connection.settings_dict['ENGINE'].startswith('core.db.'), 'Pool disabled by DB_POOL=0')
+    def test_reconnect_reuses_connection(self):
+        """
+        Test closing and reopening a wrapper gets the same SQLite connection
+        """
+        wrapper = connections.create_connection('default')
+        wrapper.ensure_connection()
+        raw = wrapper.connection
+        wrapper.close()
+        wrapper.ensure_connection()
+
+        self.assertIs(wrapper.connection, raw)
+        self.assertTrue(wrapper.connection_reused)
+        wrapper.close()
+
+    @skipUnless(connection.settings_dict['ENGINE'].startswith('core.db.'), 'Pool disabled by DB_POOL=0')
+    def test_forked_child_opens_own_connection(self):
+        """
+        Test a forked process does not reuse connections pooled by its parent
+        """
+        wrapper = connections.create_connection('default')
+        wrapper.ensure_connection()
+        wrapper.close()
+        read, write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                child = connections.create_connection('default')
+                child.ensure_connection()
+                os.write(write, b'reused' if child.connection_reused else b'opened')
+                child.close()
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+        os.close(write)
+
+        self.assertEqual(os.read(read, 16), b'opened')
+        os.close(read)
+        wrapper.ensure_connection()
+        self.assertTrue(wrapper.connection_reused)
+        wrapper.close()
+
+    @skipUnless(connection.vendor == 'sqlite', 'SQLite only')
+    def test_pragmas_applied(self):
+        """
+        Test connections are opened in WAL mode with synchronous=NORMAL
+        """
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
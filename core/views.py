@@ -0,0 +1,158 @@
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+
+DEFAULTS = {
+    'MODE': 'django',
+    'X_ACCEL_PREFIX': '/protected-media/',
+    'BLOCK_SIZE': 64 * 1024,
+}
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def serving_setting(name):
+    return getattr(settings, 'MEDIA_SERVING', {}).get(name, DEFAULTS[name])
+
+
+def media_path(path):
+    path = posixpath.normpath(path).lstrip('/')
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('Not found')
+    return path, full_path
+
+
+def byte_range(header, size):
+    """
+    The (start, end) of a single `bytes=` range, inclusive. None when the
+    header is missing or can not be honoured that way, so the whole file is
+    sent, and False when it lies outside the file.
+    """
+    match = RANGE_RE.match(header or '')
+    if match is None or match.groups() == ('', '') or size == 0:
+        return None
+    start, end = match.groups()
+    if start == '':
+        if int(end) == 0:
+            return False
+        return max(size - int(end), 0), size - 1
+    start = int(start)
+    if end != '' and int(end) < start:
+        return None
+    if start >= size:
+        return False
+    return start, size - 1 if end == '' else min(int(end), size - 1)
+
+
+def range_applies(request, etag, last_modified):
+    # A Range under If-Range only holds while the file is the one the client has.
+    validator = request.META.get('HTTP_IF_RANGE')
+    if not validator:
+        return True
+    if validator.startswith(('"', 'W/')):
+        return validator == etag
+    return parse_http_date_safe(validator) == last_modified
+
+
+class FileRange:
+    """
+    Part of an open file for FileResponse. It has no fileno() on purpose, a
+    WSGI file wrapper would otherwise sendfile() past the end of the range.
+    """
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        chunk = self.file.read(size)
+        self.remaining -= len(chunk)
+        return chunk
+
+    def close(self):
+        self.file.close()
+
+
+def file_headers(response, path, storage_headers):
+    # Like FileResponse, a compressed file keeps its own type and no
+    # Content-Encoding, so clients store it as it is.
+    response['Content-Type'] = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    for header, value in storage_headers.items():
+        response[header] = value
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Serve MEDIA_ROOT. In 'django' mode the file is streamed by FileResponse,
+    which WSGI servers with a file wrapper (gunicorn, uWSGI) send with
+    sendfile(), and Range and conditional requests are answered here. The
+    'x-accel' (nginx) and 'x-sendfile' (Apache) modes only tell the web
+    server which file to send. Content addressed files are marked immutable.
+    """
+    path, full_path = media_path(path)
+    cache_control = getattr(default_storage, 'cache_control', None)
+    storage_headers = {}
+    if cache_control is not None and cache_control(path):
+        storage_headers['Cache-Control'] = cache_control(path)
+
+    mode = serving_setting('MODE')
+    if mode == 'x-accel':
+        response = HttpResponse()
+        response['X-Accel-Redirect'] = serving_setting('X_ACCEL_PREFIX') + quote(path)
+        return file_headers(response, path, storage_headers)
+    if mode == 'x-sendfile':
+        response = HttpResponse()
+        response['X-Sendfile'] = full_path
+        return file_headers(response, path, storage_headers)
+
+    try:
+        stat = os.stat(full_path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404('Not found')
+    if not os.path.isfile(full_path):
+        raise Http404('Not found')
+    size, last_modified = stat.st_size, int(stat.st_mtime)
+    etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+    storage_headers.update({'ETag': etag, 'Last-Modified': http_date(last_modified), 'Accept-Ranges': 'bytes'})
+
+    conditional = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if conditional is not None:
+        for header in ('ETag', 'Last-Modified', 'Cache-Control'):
+            if header in storage_headers:
+                conditional[header] = storage_headers[header]
+        return conditional
+
+    requested = byte_range(request.META.get('HTTP_RANGE'), size) if range_applies(request, etag, last_modified) else None
+    if requested is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    if requested is None:
+        response = FileResponse(open(full_path, 'rb'))
+        response.block_size = serving_setting('BLOCK_SIZE')
+        return file_headers(response, path, storage_headers)
+
+    start, end = requested
+    response = FileResponse(FileRange(open(full_path, 'rb'), start, end - start + 1), status=206)
+    response.block_size = serving_setting('BLOCK_SIZE')
+    response['Content-Length'] = end - start + 1
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return file_headers(response, path, storage_headers)
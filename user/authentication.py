@@ -0,0 +1,141 @@
+from collections import OrderedDict
+from copy import deepcopy
+from threading import Lock
+from time import monotonic
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.fields.files import FieldFile
+from django.utils.module_loading import import_string
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+
+# Never cached, the hash is loaded on first access as a deferred field.
+UNCACHED_FIELDS = ('password',)
+
+
+class LocMemUserCache:
+    """
+    Per process LRU of at most `max_entries` users, each kept `timeout` seconds
+    """
+    def __init__(self, max_entries=10000, timeout=60):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires, values = entry
+            if expires < monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+        # JSON fields hold dicts, a request must not change another's user.
+        return deepcopy(values)
+
+    def set(self, user_id, values):
+        with self._lock:
+            self._entries[user_id] = (monotonic() + self.timeout, values)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class DjangoUserCache:
+    """
+    Users in a Django cache alias shared by every worker, so an invalidation
+    reaches all of them at once
+    """
+    def __init__(self, alias='default', prefix='auth-user', timeout=60):
+        self.cache = caches[alias]
+        self.prefix = prefix
+        self.timeout = timeout
+
+    def _key(self, user_id):
+        return f'{self.prefix}:{user_id}'
+
+    def get(self, user_id):
+        return self.cache.get(self._key(user_id))
+
+    def set(self, user_id, values):
+        self.cache.set(self._key(user_id), values, self.timeout)
+
+    def delete(self, user_id):
+        self.cache.delete(self._key(user_id))
+
+    def clear(self):
+        self.cache.clear()
+
+
+_cache = None
+_cache_config = None
+
+
+def get_user_cache():
+    """
+    Cache configured by settings.AUTH_USER_CACHE, a local LRU by default
+    """
+    global _cache, _cache_config
+    config = getattr(settings, 'AUTH_USER_CACHE', {})
+    if _cache is None or _cache_config is not config:
+        backend = import_string(config.get('BACKEND', 'user.authentication.LocMemUserCache'))
+        _cache = backend(**config.get('OPTIONS', {}))
+        _cache_config = config
+    return _cache
+
+
+def forget_user(user_id):
+    get_user_cache().delete(user_id)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication without the user query on every request. The token is
+    still verified each time, the user row comes from the user cache.
+    Saving or deleting a user drops its entry (user/signals.py), writes that
+    bypass signals, like queryset updates, show up once the entry expires.
+    """
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        cache = get_user_cache()
+        values = cache.get(user_id)
+        if values is None:
+            user = super().get_user(validated_token)
+            cache.set(user_id, self.cached_values(user))
+            return user
+
+        field_names = list(values)
+        user = self.user_model.from_db(DEFAULT_DB_ALIAS, field_names, [values[name] for name in field_names])
+        if not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        return user
+
+    def cached_values(self, user):
+        values = {}
+        for field in self.user_model._meta.concrete_fields:
+            if field.attname in UNCACHED_FIELDS:
+                continue
+            value = getattr(user, field.attname)
+            values[field.attname] = value.name if isinstance(value, FieldFile) else value
+        return values
@@ -0,0 +1,126 @@
+import base64
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.utils.crypto import constant_time_compare
+from django.utils.translation import gettext_noop as _
+
+
+DEFAULTS = {
+    'SCRYPT_WORK_FACTOR': 2 ** 14,
+    'SCRYPT_BLOCK_SIZE': 8,
+    'SCRYPT_PARALLELISM': 1,
+    'PBKDF2_ITERATIONS': hashers.PBKDF2PasswordHasher.iterations,
+}
+
+
+def hashing_setting(name):
+    return getattr(settings, 'PASSWORD_HASHING', {}).get(name, DEFAULTS[name])
+
+
+class ScryptPasswordHasher(hashers.BasePasswordHasher):
+    """
+    scrypt from hashlib, in the format of Django 4's hasher of the same name.
+    Costs come from settings.PASSWORD_HASHING, hashes made with other costs
+    are upgraded at the next successful login.
+    """
+    algorithm = 'scrypt'
+
+    @property
+    def work_factor(self):
+        return hashing_setting('SCRYPT_WORK_FACTOR')
+
+    @property
+    def block_size(self):
+        return hashing_setting('SCRYPT_BLOCK_SIZE')
+
+    @property
+    def parallelism(self):
+        return hashing_setting('SCRYPT_PARALLELISM')
+
+    def encode(self, password, salt, n=None, r=None, p=None):
+        assert password is not None
+        assert salt and '$' not in salt
+        n = n or self.work_factor
+        r = r or self.block_size
+        p = p or self.parallelism
+        # OpenSSL refuses to use more than 32 MiB unless told otherwise.
+        maxmem = 2 * 128 * r * (n + p + 2)
+        hash_ = hashlib.scrypt(password.encode(), salt=salt.encode(), n=n, r=r, p=p, maxmem=maxmem, dklen=64)
+        hash_ = base64.b64encode(hash_).decode('ascii').strip()
+        return f'{self.algorithm}${n}${salt}${r}${p}${hash_}'
+
+    def decode(self, encoded):
+        algorithm, work_factor, salt, block_size, parallelism, hash_ = encoded.split('$', 6)
+        assert algorithm == self.algorithm
+        return {
+            'algorithm': algorithm,
+            'work_factor': int(work_factor),
+            'salt': salt,
+            'block_size': int(block_size),
+            'parallelism': int(parallelism),
+            'hash': hash_,
+        }
+
+    def verify(self, password, encoded):
+        decoded = self.decode(encoded)
+        encoded_2 = self.encode(
+            password, decoded['salt'], decoded['work_factor'], decoded['block_size'], decoded['parallelism']
+        )
+        return constant_time_compare(encoded, encoded_2)
+
+    def safe_summary(self, encoded):
+        decoded = self.decode(encoded)
+        return {
+            _('algorithm'): decoded['algorithm'],
+            _('work factor'): decoded['work_factor'],
+            _('block size'): decoded['block_size'],
+            _('parallelism'): decoded['parallelism'],
+            _('salt'): hashers.mask_hash(decoded['salt']),
+            _('hash'): hashers.mask_hash(decoded['hash']),
+        }
+
+    def must_update(self, encoded):
+        decoded = self.decode(encoded)
+        return (decoded['work_factor'], decoded['block_size'], decoded['parallelism']) != (
+            self.work_factor, self.block_size, self.parallelism
+        )
+
+    def harden_runtime(self, password, encoded):
+        # Old costs are upgraded on login, padding the runtime buys nothing.
+        pass
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """
+    Django's PBKDF2 hasher with the iteration count from settings.PASSWORD_HASHING
+    """
+    @property
+    def iterations(self):
+        return hashing_setting('PBKDF2_ITERATIONS')
+
+
+async def amake_password(password):
+    """
+    make_password for async views, the hash runs in the thread pool instead
+    of blocking the event loop
+    """
+    return await sync_to_async(hashers.make_password, thread_sensitive=False)(password)
+
+
+async def acheck_password(user, raw_password):
+    """
+    user.check_password for async views. The hash runs in the thread pool and
+    an outdated hash is upgraded like a sync login does.
+    """
+    outdated = []
+    valid = await sync_to_async(hashers.check_password, thread_sensitive=False)(
+        raw_password, user.password, outdated.append
+    )
+    if outdated:
+        user.password = await amake_password(raw_password)
+        user._password = None
+        await sync_to_async(user.save)(update_fields=['password'])
+    return valid
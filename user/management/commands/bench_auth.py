@@ -0,0 +1,57 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from user.authentication import CachedJWTAuthentication, get_user_cache
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    """
+    Compare simplejwt's JWTAuthentication with CachedJWTAuthentication on one
+    token. The user is created inside a transaction that is rolled back.
+    """
+    help = 'Benchmark JWT authentication with and without the user cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, options):
+        user = get_user_model().objects.create_user(email='bench@auth.local', username='bench-auth', password='Bench123@')
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        get_user_cache().clear()
+
+        for authentication in (JWTAuthentication(), CachedJWTAuthentication()):
+            authentication.authenticate(request)
+            with CaptureQueriesContext(connection) as queries:
+                authentication.authenticate(request)
+
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                for _ in range(options['requests']):
+                    authentication.authenticate(request)
+                timings.append(time.perf_counter() - started)
+            per_request = min(timings) / options['requests'] * 1_000_000
+            self.stdout.write(
+                f'{type(authentication).__name__:<24} {len(queries)} query(ies) per request, '
+                f'best of {options["repeat"]}: {per_request:.1f} us per request'
+            )
@@ -0,0 +1,74 @@
+import os
+import time
+from multiprocessing import Pool
+
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from user.hashers import hashing_setting
+
+
+def hash_for(hasher, seconds, hashing):
+    """
+    Count hashes of one hasher for `seconds`, in the calling process
+    """
+    with override_settings(PASSWORD_HASHING=hashing):
+        hashes = 0
+        salt = hasher.salt()
+        started = time.perf_counter()
+        while time.perf_counter() - started < seconds:
+            hasher.encode('correct horse battery staple', salt)
+            hashes += 1
+        return hashes, time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    """
+    Measure hashes per second of every available PASSWORD_HASHERS entry, at
+    the configured costs or the ones given. One process gives the cost of a
+    login on a core, all cores the login burst a machine absorbs.
+    """
+    help = 'Benchmark password hashers per core and across cores'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=3.0)
+        parser.add_argument('--processes', type=int, default=os.cpu_count())
+        parser.add_argument('--scrypt-n', default=None,
+                            help='Comma separated scrypt work factors, powers of two')
+        parser.add_argument('--pbkdf2-iterations', default=None, help='Comma separated iteration counts')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{options["processes"]} process(es), {options["seconds"]}s per case')
+        for hasher, hashing, label in self.cases(options):
+            hashes, elapsed = hash_for(hasher, options['seconds'], hashing)
+            per_core = hashes / elapsed
+            line = f'{label:<36} {1000 / per_core:>8.1f} ms/hash {per_core:>8.1f} hashes/s/core'
+            if options['processes'] > 1:
+                with Pool(options['processes']) as pool:
+                    results = pool.starmap(hash_for, [(hasher, options['seconds'], hashing)] * options['processes'])
+                total = sum(hashes / elapsed for hashes, elapsed in results)
+                line += f' {total:>9.1f} hashes/s on {options["processes"]} cores'
+            self.stdout.write(line)
+
+    def cases(self, options):
+        configured = {
+            name: hashing_setting(name)
+            for name in ('SCRYPT_WORK_FACTOR', 'SCRYPT_BLOCK_SIZE', 'SCRYPT_PARALLELISM', 'PBKDF2_ITERATIONS')
+        }
+        for hasher in get_hashers():
+            if hasher.library:
+                try:
+                    hasher._load_library()
+                except ValueError:
+                    library = hasher.library[0] if isinstance(hasher.library, tuple) else hasher.library
+                    self.stdout.write(f'{hasher.algorithm:<36} skipped, {library} not installed')
+                    continue
+            if hasher.algorithm == 'scrypt' and options['scrypt_n']:
+                for n in options['scrypt_n'].split(','):
+                    yield hasher, {**configured, 'SCRYPT_WORK_FACTOR': int(n)}, f'scrypt n={n}'
+            elif hasher.algorithm == 'pbkdf2_sha256' and options['pbkdf2_iterations']:
+                for iterations in options['pbkdf2_iterations'].split(','):
+                    yield hasher, {**configured, 'PBKDF2_ITERATIONS': int(iterations)}, f'pbkdf2_sha256 {iterations}'
+            else:
+                yield hasher, configured, hasher.algorithm
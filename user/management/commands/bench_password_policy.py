@@ -0,0 +1,52 @@
+import re
+import timeit
+
+from django.contrib.auth import get_user_model, password_validation
+from django.core.management.base import BaseCommand
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import serializers
+
+from user.password_policy import PASSWORD_RE, CommonPasswordValidator, load_common_passwords, validate_password
+
+# The pattern the serializers used to pass to re.search on every call.
+INLINE_PATTERN = "^(?=.*[a-z])(?=.*[A-Z])(?=.*\\d)(?=.*[@$!%*?&])[A-Za-z\\d@$!%*?&]{5,}$"
+
+
+def quietly(check, *args):
+    try:
+        check(*args)
+    except (DjangoValidationError, serializers.ValidationError):
+        pass
+
+
+class Command(BaseCommand):
+    """
+    Time each step of the password policy against what it replaced
+    """
+    help = 'Micro-benchmark the password policy checks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--number', type=int, default=100_000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        user = get_user_model()(email='bench@policy.local', username='bench-policy')
+        password, long_password = 'Qwert123@xyz', 'Qwert123@' * 50
+        default_validator = password_validation.CommonPasswordValidator()
+        policy_validator = CommonPasswordValidator()
+        number = options['number']
+
+        cases = [
+            ('re.search inline pattern', lambda: re.search(INLINE_PATTERN, password), number),
+            ('compiled fullmatch', lambda: PASSWORD_RE.fullmatch(password), number),
+            ('re.search inline, 450 chars', lambda: re.search(INLINE_PATTERN, long_password), number // 10),
+            ('compiled fullmatch, 450 chars', lambda: PASSWORD_RE.fullmatch(long_password), number // 10),
+            ('common list lookup, set', lambda: quietly(default_validator.validate, password), number),
+            ('common list lookup, frozenset', lambda: quietly(policy_validator.validate, password), number),
+            ('load common list (Django)', lambda: password_validation.CommonPasswordValidator(), 20),
+            ('load common list (frozenset)', lambda: load_common_passwords(), 20),
+            ('validate_password, all steps', lambda: quietly(validate_password, password, user), number // 10),
+        ]
+        for label, statement, runs in cases:
+            best = min(timeit.repeat(statement, number=runs, repeat=options['repeat'])) / runs
+            self.stdout.write(f'{label:<32} {best * 1_000_000:>12.3f} us')
@@ -0,0 +1,53 @@
+import gzip
+import re
+
+from django.contrib.auth import password_validation
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import serializers
+
+
+# One anchored match per password, each lookahead scans the password once.
+PASSWORD_RE = re.compile(r'(?=.*[a-z])(?=.*[A-Z])(?=.*\d)(?=.*[@$!%*?&])[A-Za-z\d@$!%*?&]{5,}')
+
+COMPOSITION_MESSAGE = (
+    'Minimum five characters, at least one uppercase letter, one lowercase letter, '
+    'one number and one special character'
+)
+
+
+def load_common_passwords(path=password_validation.CommonPasswordValidator.DEFAULT_PASSWORD_LIST_PATH):
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as passwords:
+            return frozenset(password.strip() for password in passwords)
+    except OSError:
+        with open(path) as passwords:
+            return frozenset(password.strip() for password in passwords)
+
+
+# Read and decompressed once per process, when the serializers are imported.
+COMMON_PASSWORDS = load_common_passwords()
+
+
+class CommonPasswordValidator(password_validation.CommonPasswordValidator):
+    """
+    Django's common password check on the list this module loaded at startup
+    """
+    def __init__(self, password_list_path=None):
+        self.passwords = COMMON_PASSWORDS if password_list_path is None else load_common_passwords(password_list_path)
+
+
+def meets_composition(password):
+    return PASSWORD_RE.fullmatch(password) is not None
+
+
+def validate_password(password, user=None):
+    """
+    The composition rule, then every AUTH_PASSWORD_VALIDATORS entry. Raises a
+    DRF ValidationError with all the messages of the first step that fails.
+    """
+    if not meets_composition(password):
+        raise serializers.ValidationError(COMPOSITION_MESSAGE)
+    try:
+        password_validation.validate_password(password, user)
+    except DjangoValidationError as error:
+        raise serializers.ValidationError(error.messages)
@@ -3,30 +3,54 @@ from rest_framework.response import Response
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 
-import re
+from core.images import current_renditions
+from .password_policy import validate_password
+
+
+class ImageRenditionsField(serializers.Field):
+    """
+    Thumbnail URLs of an image field by size and format, empty until processed
+    """
+    def __init__(self, image_field, **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+        self.image_field = image_field
+
+    def to_representation(self, instance):
+        renditions = current_renditions(instance, self.image_field, f'{self.image_field}_renditions')
+        storage = getattr(instance, self.image_field).storage
+        request = self.context.get('request')
+
+        def url(name):
+            location = storage.url(name)
+            return request.build_absolute_uri(location) if request is not None else location
+
+        return {label: {fmt: url(name) for fmt, name in formats.items()} for label, formats in renditions.items()}
+
 
 class UserSerializer(serializers.ModelSerializer):
     """
         User serializer for signup and update user's fields 
     """
     confirm_password = serializers.CharField(min_length=5, write_only=True)
+    avatar_sizes = ImageRenditionsField('avatar')
 
     class Meta:
         model = get_user_model()
-        fields = ('email', 'username', 'bio', 'avatar', 'password', 'confirm_password')
+        fields = ('email', 'username', 'bio', 'avatar', 'avatar_sizes', 'password', 'confirm_password')
         extra_kwargs = {
             'password': {'write_only': True}
         }
 
     def validate(self, attrs):
-        regex = "^(?=.*[a-z])(?=.*[A-Z])(?=.*\d)(?=.*[@$!%*?&])[A-Za-z\d@$!%*?&]{5,}$"
         if attrs.get('password'):
-            if re.search(regex, attrs['password']):
-                if attrs['password'] == attrs['confirm_password']:
-                    attrs.pop('confirm_password')
-                    return attrs
-                raise serializers.ValidationError('Passwords must be equal!')
-            raise serializers.ValidationError('Minimum five characters, at least one uppercase letter, one lowercase letter, one number and one special character')
+            user = self.instance or get_user_model()(email=attrs.get('email'), username=attrs.get('username'))
+            validate_password(attrs['password'], user)
+            if attrs['password'] == attrs['confirm_password']:
+                attrs.pop('confirm_password')
+                return attrs
+            raise serializers.ValidationError('Passwords must be equal!')
         return attrs
 
     def create(self, validated_data):
@@ -38,9 +62,11 @@ class UserSerializer(serializers.ModelSerializer):
         
 
 class UserProfileManagerSerializer(serializers.ModelSerializer):
+    avatar_sizes = ImageRenditionsField('avatar')
+
     class Meta:
         model = get_user_model()
-        fields = ('email', 'username', 'bio', 'avatar',)
+        fields = ('email', 'username', 'bio', 'avatar', 'avatar_sizes')
 
     def update(self, instance, validated_data):
         user = super().update(instance, validated_data)
@@ -64,15 +90,14 @@ class ResetPasswordSerializer(serializers.Serializer):
 
 
     def validate(self, attrs):
-        regex = "^(?=.*[a-z])(?=.*[A-Z])(?=.*\d)(?=.*[@$!%*?&])[A-Za-z\d@$!%*?&]{5,}$"
-        if self.context['request'].user.check_password(attrs['old_password']):
+        user = self.context['request'].user
+        if user.check_password(attrs['old_password']):
             if attrs.get('new_password'):
-                if re.search(regex, attrs['new_password']):
-                    if attrs['new_password'] == attrs['confirm_new_password']:
-                        attrs.pop('confirm_new_password')
-                        return attrs
-                    raise serializers.ValidationError('Passwords must be equal!')
-                raise serializers.ValidationError('Minimum five characters, at least one uppercase letter, one lowercase letter, one number and one special character')
+                validate_password(attrs['new_password'], user)
+                if attrs['new_password'] == attrs['confirm_new_password']:
+                    attrs.pop('confirm_new_password')
+                    return attrs
+                raise serializers.ValidationError('Passwords must be equal!')
             return attrs
         raise serializers.ValidationError("Password is Invalid")
 
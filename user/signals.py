@@ -0,0 +1,24 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.settings import api_settings
+
+from core.images import needs_processing
+from core.models import User
+from .authentication import forget_user
+from .tasks import process_avatar
+
+
+@receiver(post_save, sender=User)
+def queue_avatar_processing(sender, instance, **kwargs):
+    if needs_processing(instance, 'avatar', 'avatar_renditions'):
+        process_avatar.delay(instance.pk, instance.avatar.name)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_authenticated_user(sender, instance, **kwargs):
+    # Again on commit, a request may cache the old row before this one commits.
+    user_id = getattr(instance, api_settings.USER_ID_FIELD)
+    forget_user(user_id)
+    transaction.on_commit(lambda: forget_user(user_id))
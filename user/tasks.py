@@ -0,0 +1,8 @@
+from core.images import process_image_field
+from core.models import User
+from core.tasks import task
+
+
+@task
+def process_avatar(user_id, name):
+    process_image_field(User, user_id, 'avatar', 'avatar_renditions', name)
@@ -0,0 +1,95 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from user.authentication import get_user_cache
+
+USER_PROFILE_URL = reverse("user:profile")
+USER_RESET_PASSWORD_URL = reverse('user:reset-password')
+
+
+@override_settings(AUTH_USER_CACHE={'BACKEND': 'user.authentication.LocMemUserCache', 'OPTIONS': {'timeout': 60}})
+class CachedJWTAuthenticationTests(TestCase):
+    """
+    Users behind a JWT are looked up once and then served from the user cache
+    """
+    def setUp(self):
+        get_user_cache().clear()
+        self.user = get_user_model().objects.create_user(
+            email='user@email.com', password='Qwert123@', username='user', avatar='upload/images/a.png'
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def test_user_query_skipped_once_cached(self):
+        """
+        Test only the first request loads the user row
+        """
+        with self.assertNumQueries(1):
+            first = self.client.get(USER_PROFILE_URL)
+        with self.assertNumQueries(0):
+            second = self.client.get(USER_PROFILE_URL)
+
+        self.assertEqual(first.data, second.data)
+        self.assertTrue(second.data['avatar'].endswith('/media/upload/images/a.png'))
+
+    def test_password_not_cached(self):
+        """
+        Test the password hash stays out of the cache
+        """
+        self.client.get(USER_PROFILE_URL)
+
+        self.assertNotIn('password', get_user_cache().get(self.user.id))
+
+    def test_reset_password_drops_cached_user(self):
+        """
+        Test a password change through the API invalidates the entry
+        """
+        self.client.get(USER_PROFILE_URL)
+
+        res = self.client.put(USER_RESET_PASSWORD_URL, {
+            'old_password': 'Qwert123@', 'new_password': 'Asdfg123@', 'confirm_new_password': 'Asdfg123@',
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsNone(get_user_cache().get(self.user.id))
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('Asdfg123@'))
+
+    def test_deactivated_user_rejected(self):
+        """
+        Test deactivating a cached user takes effect on the next request
+        """
+        self.client.get(USER_PROFILE_URL)
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(USER_PROFILE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_cached_users_are_copies(self):
+        """
+        Test changes a request makes to its user do not leak into the cache
+        """
+        self.client.get(USER_PROFILE_URL)
+        values = get_user_cache().get(self.user.id)
+        values['avatar_renditions']['source'] = 'changed'
+
+        self.assertEqual(get_user_cache().get(self.user.id)['avatar_renditions'], {})
+
+    @override_settings(AUTH_USER_CACHE={'OPTIONS': {'max_entries': 1}})
+    def test_lru_bounded(self):
+        """
+        Test the least recently used user is evicted past max_entries
+        """
+        other = get_user_model().objects.create_user(email='other@email.com', password='Qwert123@', username='other')
+        self.client.get(USER_PROFILE_URL)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(other)}')
+        self.client.get(USER_PROFILE_URL)
+
+        self.assertIsNone(get_user_cache().get(self.user.id))
+        self.assertIsNotNone(get_user_cache().get(other.id))
@@ -0,0 +1,169 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from PIL import Image
+
+from core.images import rendition_formats, stored_names
+from core.models import MediaBlob
+
+USER_PROFILE_URL = reverse("user:profile")
+MEDIA_ROOT = tempfile.mkdtemp()
+IMAGE_PIPELINE = {
+    'MAX_BYTES': 200 * 1024,
+    'MAX_DIMENSION': 1000,
+    'SIZES': {'small': 32, 'medium': 128},
+    'FORMATS': ('webp', 'jpeg'),
+    'QUALITY': 80,
+}
+
+
+def image_upload(name='avatar.jpg', size=(400, 300), image_format='JPEG', exif=True, **options):
+    image = Image.new('RGB', size, (200, 30, 30))
+    buffer = BytesIO()
+    if exif:
+        metadata = Image.Exif()
+        metadata[0x010f] = 'SecretCamera'  # Make
+        options['exif'] = metadata
+    image.save(buffer, image_format, **options)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type=f'image/{image_format.lower()}')
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    IMAGE_PIPELINE=IMAGE_PIPELINE,
+    TASK_QUEUE={'BROKER': 'core.tasks.ImmediateBroker'},
+)
+class AvatarPipelineTests(TestCase):
+    """
+    Avatar uploads are limited, cleaned and thumbnailed
+    """
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='user@email.com', password='test132456', username='user')
+        self.client.force_authenticate(self.user)
+
+    def upload(self, upload):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.patch(USER_PROFILE_URL, {'avatar': upload}, format='multipart')
+
+    def test_avatar_thumbnails(self):
+        """
+        Test an upload gets every size and format and loses its metadata
+        """
+        res = self.upload(image_upload())
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.user.refresh_from_db()
+        with Image.open(self.user.avatar.path) as original:
+            self.assertNotIn(0x010f, original.getexif())
+        res = self.client.get(USER_PROFILE_URL)
+        sizes = res.data['avatar_sizes']
+        self.assertEqual(set(sizes), {'small', 'medium'})
+        self.assertEqual(set(sizes['small']), set(rendition_formats()))
+        renditions = self.user.avatar_renditions['sizes']
+        for label, edge in (('small', 32), ('medium', 128)):
+            with self.user.avatar.storage.open(renditions[label]['jpeg']) as thumbnail, Image.open(thumbnail) as image:
+                self.assertEqual(max(image.size), edge)
+                self.assertNotIn(0x010f, image.getexif())
+
+    def test_png_metadata_stripped(self):
+        """
+        Test a PNG original loses its EXIF when re-encoded
+        """
+        self.upload(image_upload('avatar.png', image_format='PNG'))
+
+        self.user.refresh_from_db()
+        with Image.open(self.user.avatar.path) as original:
+            self.assertEqual(original.format, 'PNG')
+            self.assertNotIn(0x010f, original.getexif())
+            self.assertNotIn('exif', original.info)
+
+    def test_gif_comment_stripped(self):
+        """
+        Test a GIF original loses its comment when re-encoded
+        """
+        self.upload(image_upload('avatar.gif', image_format='GIF', exif=False, comment=b'secret'))
+
+        self.user.refresh_from_db()
+        with Image.open(self.user.avatar.path) as original:
+            self.assertEqual(original.format, 'GIF')
+            self.assertNotIn('comment', original.info)
+
+    def test_animated_gif_rejected(self):
+        """
+        Test animated uploads are refused instead of flattened to one frame
+        """
+        frames = [Image.new('P', (40, 40), color) for color in (1, 2)]
+        buffer = BytesIO()
+        frames[0].save(buffer, 'GIF', save_all=True, append_images=frames[1:], duration=100)
+
+        res = self.upload(SimpleUploadedFile('animated.gif', buffer.getvalue(), content_type='image/gif'))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.avatar)
+
+    def test_processed_avatar_references(self):
+        """
+        Test the cleaned image and thumbnails are referenced, the raw upload is released
+        """
+        self.upload(image_upload())
+        self.user.refresh_from_db()
+
+        names = stored_names(self.user.avatar.name, self.user.avatar_renditions)
+        referenced = MediaBlob.objects.filter(references__gt=0)
+        self.assertEqual(set(referenced.values_list('name', flat=True)), set(names))
+        self.assertEqual(MediaBlob.objects.filter(references=0).count(), 1)
+
+    def test_replaced_avatar_hides_old_thumbnails(self):
+        """
+        Test thumbnails of a previous avatar are not served for a new one
+        """
+        self.upload(image_upload())
+        self.user.refresh_from_db()
+        self.user.avatar = image_upload('other.png', image_format='PNG', exif=False)
+        self.user.save()
+
+        res = self.client.get(USER_PROFILE_URL)
+
+        self.assertEqual(res.data['avatar_sizes'], {})
+
+    def test_avatar_too_many_bytes(self):
+        """
+        Test uploads over MAX_BYTES are rejected
+        """
+        res = self.upload(SimpleUploadedFile('big.jpg', b'0' * (201 * 1024), content_type='image/jpeg'))
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_avatar_too_large(self):
+        """
+        Test uploads over MAX_DIMENSION are rejected before processing
+        """
+        res = self.upload(image_upload(size=(1200, 10), exif=False))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.avatar)
+
+    def test_avatar_sizes_are_absolute_urls(self):
+        """
+        Test thumbnail URLs are built like the avatar URL
+        """
+        self.upload(image_upload())
+        self.user.refresh_from_db()
+
+        self.assertTrue(self.user.avatar_renditions['sizes'])
+        res = self.client.get(USER_PROFILE_URL)
+        self.assertTrue(res.data['avatar_sizes']['medium']['jpeg'].startswith('http://testserver/media/'))
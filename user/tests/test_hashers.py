@@ -0,0 +1,78 @@
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, make_password
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from user.hashers import acheck_password, amake_password
+
+USER_SIGNIN_URL = reverse("user:signin")
+PASSWORD_HASHING = {'SCRYPT_WORK_FACTOR': 2 ** 10, 'PBKDF2_ITERATIONS': 1000}
+
+
+@override_settings(PASSWORD_HASHING=PASSWORD_HASHING)
+class PasswordHashingTests(TestCase):
+    """
+    Passwords hashed with scrypt and upgraded at login
+    """
+    def create_user(self, password='Qwert123@'):
+        return get_user_model().objects.create_user(email='user@email.com', username='user', password=password)
+
+    def signin(self, password='Qwert123@'):
+        return APIClient().post(USER_SIGNIN_URL, {'email': 'user@email.com', 'password': password})
+
+    def test_new_password_uses_scrypt(self):
+        """
+        Test new users get a scrypt hash with the configured cost
+        """
+        user = self.create_user()
+
+        self.assertTrue(user.password.startswith('scrypt$1024$'))
+        self.assertTrue(user.check_password('Qwert123@'))
+        self.assertFalse(user.check_password('Qwert123!'))
+
+    def test_old_algorithm_rehashed_at_signin(self):
+        """
+        Test a PBKDF2 hash is replaced by scrypt on a successful signin only
+        """
+        user = self.create_user()
+        user.password = make_password('Qwert123@', hasher='pbkdf2_sha256')
+        user.save()
+
+        self.assertEqual(self.signin('wrong').status_code, status.HTTP_401_UNAUTHORIZED)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$'))
+
+        self.assertEqual(self.signin().status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('scrypt$'))
+
+    def test_changed_cost_rehashed_at_signin(self):
+        """
+        Test raising the work factor upgrades hashes made with the old one
+        """
+        user = self.create_user()
+
+        with override_settings(PASSWORD_HASHING={**PASSWORD_HASHING, 'SCRYPT_WORK_FACTOR': 2 ** 11}):
+            self.assertEqual(self.signin().status_code, status.HTTP_200_OK)
+
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('scrypt$2048$'))
+
+    def test_async_helpers(self):
+        """
+        Test the thread pool helpers hash, check and upgrade like the sync ones
+        """
+        encoded = async_to_sync(amake_password)('Qwert123@')
+        self.assertTrue(check_password('Qwert123@', encoded))
+
+        user = self.create_user()
+        user.password = make_password('Qwert123@', hasher='pbkdf2_sha256')
+        user.save()
+
+        self.assertFalse(async_to_sync(acheck_password)(user, 'wrong'))
+        self.assertTrue(async_to_sync(acheck_password)(user, 'Qwert123@'))
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('scrypt$'))
@@ -0,0 +1,72 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.password_validation import get_default_password_validators
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from user.password_policy import COMMON_PASSWORDS, CommonPasswordValidator, meets_composition
+
+USER_SIGNUP_URL = reverse("user:signup")
+USER_RESET_PASSWORD_URL = reverse('user:reset-password')
+
+
+class PasswordPolicyTests(TestCase):
+    """
+    One password policy for signup and reset password
+    """
+    def signup(self, password, email='test@email.ir'):
+        return APIClient().post(USER_SIGNUP_URL, {
+            'email': email, 'username': 'testname', 'bio': 'bio',
+            'password': password, 'confirm_password': password,
+        })
+
+    def test_composition(self):
+        """
+        Test the composition rule matches the whole password
+        """
+        self.assertTrue(meets_composition('Qwert123@'))
+        for password in ('qwert123@', 'QWERT123@', 'Qwerty@@@', 'Qwert1234', 'Qw1@', 'Qwert123@\n', 'Qwert 123@'):
+            self.assertFalse(meets_composition(password), password)
+
+    def test_common_password_rejected(self):
+        """
+        Test a password from the common list is refused at signup
+        """
+        res = self.signup('P@ssw0rd')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('This password is too common.', res.data['non_field_errors'])
+
+    def test_similar_to_email_rejected(self):
+        """
+        Test the signup payload is compared with the password
+        """
+        res = self.signup('Testnamer1@', email='testnamer1@email.ir')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(get_user_model().objects.exists())
+
+    def test_reset_password_uses_policy(self):
+        """
+        Test a new password is checked against the same validators
+        """
+        user = get_user_model().objects.create_user(email='user@email.com', password='Qwert123@', username='user')
+        client = APIClient()
+        client.force_authenticate(user)
+
+        res = client.put(USER_RESET_PASSWORD_URL, {
+            'old_password': 'Qwert123@', 'new_password': 'P@ssw0rd', 'confirm_new_password': 'P@ssw0rd',
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('This password is too common.', res.data['non_field_errors'])
+
+    def test_common_passwords_loaded_once(self):
+        """
+        Test the configured validator shares the frozen list
+        """
+        validator = next(v for v in get_default_password_validators() if isinstance(v, CommonPasswordValidator))
+
+        self.assertIs(validator.passwords, COMMON_PASSWORDS)
+        self.assertIsInstance(COMMON_PASSWORDS, frozenset)